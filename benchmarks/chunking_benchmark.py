@@ -0,0 +1,108 @@
+"""
+Benchmark for the chunking strategies on generated Python pull requests.
+
+Compares line-count chunking (HunkProcessor, REVIEW_MAX_LINES changes per chunk)
+with function-aware chunking (SymbolChunker, REVIEW_CHUNK_MAX_TOKENS per chunk).
+Each chunk is one first-turn LLM call, so chunks per PR is the floor on calls per PR;
+"split functions" counts functions whose changes were spread over several chunks,
+which is what sends the agent back for get_function_content turns.
+
+Usage: python -m benchmarks.chunking_benchmark
+"""
+import difflib
+import random
+from src.brain.agents.utils import estimate_tokens
+from src.utils.hunk_processor import HunkProcessor
+from src.utils.symbol_chunker import SymbolChunker
+
+# (functions in the file, functions touched by the PR)
+SCENARIOS = [(40, 5), (200, 30), (1000, 120)]
+MAX_LINES = 10
+MAX_TOKENS = 1200
+SEED = 7
+
+
+def generate_source(n_functions: int, rng: random.Random) -> list[str]:
+    """Builds a module of small and large functions, a few nested in classes."""
+    lines = []
+    for i in range(n_functions):
+        indent = ""
+        if i % 10 == 0:
+            lines.append(f"class Handler{i}:")
+            indent = "    "
+        lines.append(f"{indent}def handle_{i}(payload, retries=3):")
+        for j in range(rng.choice([4, 8, 30])):
+            lines.append(f"{indent}    value_{j} = payload.get('key_{j}', {j}) * retries")
+        lines.append(f"{indent}    return value_0")
+        lines.append("")
+    return lines
+
+
+def edit_source(lines: list[str], n_touched: int, rng: random.Random) -> list[str]:
+    """Edits several statements in n_touched functions, like a refactoring PR would."""
+    starts = [i for i, line in enumerate(lines) if line.lstrip().startswith("def ")]
+    new = list(lines)
+    for start in sorted(rng.sample(starts, n_touched), reverse=True):
+        end = start + 1
+        while end < len(lines) and lines[end].strip() and not lines[end].lstrip().startswith("def "):
+            end += 1
+        body = list(range(start + 1, end - 1))
+        for i in sorted(rng.sample(body, min(len(body), rng.randint(2, 12))), reverse=True):
+            new[i] = new[i].replace("* retries", "* (retries + 1)")
+            if rng.random() < 0.3:
+                new.insert(i + 1, new[i].split("=")[0].rstrip() + " = max(0, " + new[i].split("=")[0].strip() + ")")
+    return new
+
+
+def unified_patch(old: list[str], new: list[str]) -> str:
+    diff = difflib.unified_diff(old, new, lineterm="", n=3)
+    return "\n".join(line for line in diff if not line.startswith(("---", "+++")))
+
+
+def function_of(line_no: int, starts: list[int]) -> int:
+    owner = None
+    for start in starts:
+        if start > line_no:
+            break
+        owner = start
+    return owner
+
+
+def split_functions(chunks: list[dict], new: list[str]) -> int:
+    """Functions whose changed lines ended up in more than one chunk."""
+    starts = [i + 1 for i, line in enumerate(new) if line.lstrip().startswith("def ")]
+    seen = {}
+    for index, chunk in enumerate(chunks):
+        for line in chunk["content"].splitlines():
+            number, sep, _ = line.partition(": +")
+            if sep and number.isdigit():
+                seen.setdefault(function_of(int(number), starts), set()).add(index)
+    return sum(1 for chunks_of in seen.values() if len(chunks_of) > 1)
+
+
+def main():
+    rng = random.Random(SEED)
+    chunker = SymbolChunker()
+    print(f"{'functions':>9} | {'touched':>7} | {'strategy':<8} | {'calls/PR':>8} | {'split fns':>9} | {'changes/call':>12} | {'diff tokens':>11}")
+    print("-" * 84)
+    for n_functions, n_touched in SCENARIOS:
+        old = generate_source(n_functions, rng)
+        new = edit_source(old, n_touched, rng)
+        patch = unified_patch(old, new)
+        content = "\n".join(new) + "\n"
+
+        strategies = [
+            ("lines", list(HunkProcessor.chunk_patch("bench.py", patch, MAX_LINES))),
+            ("symbols", chunker.chunk_patch("bench.py", patch, content, MAX_TOKENS)),
+        ]
+        for name, chunks in strategies:
+            changes = sum(c["changes"] for c in chunks)
+            tokens = sum(estimate_tokens(c["content"]) for c in chunks)
+            print(
+                f"{n_functions:>9} | {n_touched:>7} | {name:<8} | {len(chunks):>8} | {split_functions(chunks, new):>9} | "
+                f"{changes / len(chunks):>12.1f} | {tokens:>11}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark for UniversalParser traversal on large generated Python files.
+
+Compares the previous recursive walks (reproduced below as the baseline) with the
+TreeCursor / Query based implementation and the lockstep SemanticFilter comparison.
+
+Usage: python -m benchmarks.parser_benchmark
+"""
+import sys
+import time
+from src.code_parser.language import NODE_TYPES
+from src.code_parser.tree_sitter_parser import UniversalParser
+from src.services.semantic_filter import SemanticFilter
+
+SIZES = [5_000, 20_000, 50_000]
+REPEATS = 3
+
+
+def generate_source(n_lines: int) -> str:
+    """Builds a Python file of roughly n_lines with classes, methods and comments."""
+    lines = []
+    i = 0
+    while len(lines) < n_lines:
+        lines.extend([
+            f"class Service{i}:",
+            f"    # handles request batch {i}",
+            f"    def handle_{i}(self, payload, retries=3):",
+            "        total = 0  # running total",
+            "        for item in payload:",
+            f"            if item.get('value', 0) > {i}:",
+            "                total += item['value'] * retries",
+            "        return total",
+            "",
+        ])
+        i += 1
+    lines.append("def target_function():\n    return 42\n")
+    return "\n".join(lines)
+
+
+# --- Baseline: the previous recursive implementation ---
+
+def legacy_semantic_tokens(parser, content, lang):
+    tree = parser.get_parser(lang).parse(bytes(content, "utf8"))
+    tokens = []
+
+    def walk(node):
+        if node.is_extra or "comment" in node.type:
+            return
+        if not node.children:
+            text = node.text.decode("utf8").strip()
+            if text:
+                tokens.append(text)
+            return
+        for child in node.children:
+            walk(child)
+
+    walk(tree.root_node)
+    return "".join(tokens)
+
+
+def legacy_semantic_change(parser, old, new, lang):
+    return legacy_semantic_tokens(parser, old, lang) != legacy_semantic_tokens(parser, new, lang)
+
+
+def legacy_structure(parser, content, lang):
+    tree = parser.get_parser(lang).parse(bytes(content, "utf8"))
+    mapping = NODE_TYPES.get(lang, {})
+    results, visited = [], set()
+
+    def walk(node):
+        if node.type in mapping:
+            line_no = node.start_point[0] + 1
+            if line_no not in visited:
+                results.append(f"Line {line_no}: {mapping[node.type]} {parser._extract_name(node)}")
+                visited.add(line_no)
+        for child in node.children:
+            walk(child)
+
+    walk(tree.root_node)
+    return "\n".join(results)
+
+
+def legacy_find(parser, content, lang, target):
+    tree = parser.get_parser(lang).parse(bytes(content, "utf8"))
+    mapping = NODE_TYPES.get(lang, {})
+
+    def find(node):
+        if node.type in mapping and parser._extract_name(node) == target:
+            return node
+        for child in node.children:
+            result = find(child)
+            if result:
+                return result
+        return None
+
+    return find(tree.root_node)
+
+
+def best_of(func, *args) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = UniversalParser()
+    semantic_filter = SemanticFilter()
+    lang = "python"
+    filename = "service.py"
+    print(f"{'lines':>8} | {'operation':<18} | {'recursive (s)':>13} | {'cursor/query (s)':>16} | {'speedup':>7}")
+    print("-" * 75)
+    for size in SIZES:
+        content = generate_source(size)
+        # Comment-only edit: both sides are walked to the end before they compare equal
+        commented = content.replace("# running total", "# running sum")
+        cases = [
+            ("semantic change", (legacy_semantic_change, parser, content, commented, lang),
+             (semantic_filter.is_semantic_change, content, commented, filename)),
+            ("file structure", (legacy_structure, parser, content, lang), (parser.parse_structure, content, lang)),
+            ("find function", (legacy_find, parser, content, lang, "target_function"),
+             (parser.extract_function_content, content, lang, "target_function")),
+        ]
+        for name, old_case, new_case in cases:
+            old = best_of(*old_case)
+            new = best_of(*new_case)
+            print(f"{size:>8} | {name:<18} | {old:>13.3f} | {new:>16.3f} | {old / new:>6.1f}x")
+
+    # Deeply nested input: the recursive walk overflows, the cursor walk does not
+    depth = sys.getrecursionlimit() * 2
+    nested = "x = " + "[" * depth + "]" * depth + "\n"
+    try:
+        legacy_semantic_tokens(parser, nested, lang)
+        print(f"\nnesting depth {depth}: recursive walk completed")
+    except RecursionError:
+        print(f"\nnesting depth {depth}: recursive walk hit RecursionError")
+    changed = semantic_filter.is_semantic_change(nested, nested.replace("x = ", "y = "), filename)
+    print(f"nesting depth {depth}: lockstep walk completed (semantic change={changed})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from src.api.webhook import ingest_stats
+from src.brain.agents.base_agent import agent_stats
+from src.services.cascade import cascade_stats
+from src.services.llm.pool import pool_snapshots
+from src.services.review_cache import review_cache
+from src.services.review_memory import memory_stats
+from src.services.scheduler import chunk_scheduler, screen_scheduler
+from src.services.scm.rate_limit import rate_limit_governor
+from src.utils.generated_detector import detection_stats
+from src.utils.metrics import Family, metrics
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _family(name: str, kind: str, help_text: str, samples: list) -> Family:
+    return Family(f"{metrics.prefix}_{name}", kind, help_text, samples)
+
+def _service_families():
+    """Exposes the existing in-process stats snapshots as Prometheus families."""
+    ingest = ingest_stats.snapshot()
+    yield _family("webhook_received_total", "counter", "Webhook deliveries received.", [({}, ingest["received"])])
+    yield _family("webhook_duplicates_total", "counter", "Redelivered webhooks dropped.", [({}, ingest["duplicates_dropped"])])
+    yield _family("webhook_shed_total", "counter", "Webhooks shed under load.", [({}, ingest["shed"])])
+    yield _family("webhook_ingest_seconds", "histogram", "Webhook receipt to 202 latency.", [({}, ingest["latency"])])
+
+    scheduler = chunk_scheduler.snapshot()
+    yield _family("scheduler_active", "gauge", "Chunks being reviewed.", [({}, scheduler["active"])])
+    yield _family("scheduler_queued", "gauge", "Chunks waiting for a review slot.", [({}, scheduler["queued"])])
+    yield _family("scheduler_completed_total", "counter", "Chunks the scheduler has run.", [({}, scheduler["completed"])])
+    yield _family("scheduler_max_concurrency", "gauge", "Review slots across all repositories.", [({}, scheduler["max_concurrency"])])
+    yield _family("scheduler_avg_chunk_seconds", "gauge", "Moving average of a chunk's review time.", [({}, scheduler["avg_chunk_seconds"])])
+    yield _family("scheduler_repo_active", "gauge", "Chunks being reviewed, by repository.", [
+        ({"repo": repo}, count) for repo, count in sorted(scheduler["running_by_repo"].items())
+    ])
+    yield _family("scheduler_repo_queued", "gauge", "Chunks waiting for a review slot, by repository.", [
+        ({"repo": repo}, count) for repo, count in sorted(scheduler["queued_by_repo"].items())
+    ])
+
+    cache = review_cache.snapshot()
+    yield _family("review_cache_lookups_total", "counter", "Review result cache lookups.", [
+        ({"result": "hit"}, cache["hits"]), ({"result": "miss"}, cache["misses"])
+    ])
+
+    cascade = cascade_stats.snapshot()
+    yield _family("cascade_chunks_total", "counter", "Chunks seen by the cascade screening tier.", [
+        ({"result": "screened"}, cascade["screened"]),
+        ({"result": "escalated"}, cascade["escalated"]),
+        ({"result": "screen_failure"}, cascade["screen_failures"])
+    ])
+    # Escalation rate = escalated / screened from the counter above
+    yield _family("cascade_screen_tokens_total", "counter", "Tokens spent by the screening tier.", [({}, cascade["screen_tokens"])])
+    yield _family("cascade_deep_tokens_avoided_total", "counter", "Estimated deep-tier tokens not spent on chunks screened clean.", [
+        ({}, cascade["deep_tokens_avoided"])
+    ])
+    yield _family("cascade_cost_saved_total", "counter", "Deep-tier cost avoided minus screening cost, at the configured prices.", [
+        ({}, cascade["cost_saved"])
+    ])
+    screening = screen_scheduler.snapshot()
+    yield _family("cascade_screen_active", "gauge", "Chunks being screened.", [({}, screening["active"])])
+    yield _family("cascade_screen_queued", "gauge", "Chunks waiting for a screening slot.", [({}, screening["queued"])])
+    yield _family("cascade_screen_completed_total", "counter", "Chunks the screening scheduler has run.", [({}, screening["completed"])])
+
+    generated = detection_stats.snapshot()
+    yield _family("generated_files_total", "counter", "Files skipped as generated, by heuristic.", [
+        ({"heuristic": heuristic}, entry["files"]) for heuristic, entry in sorted(generated.items())
+    ])
+    yield _family("generated_changes_total", "counter", "Changed lines kept from the LLM by skipping generated files, by heuristic.", [
+        ({"heuristic": heuristic}, entry["changes"]) for heuristic, entry in sorted(generated.items())
+    ])
+    yield _family("generated_patch_chars_total", "counter", "Patch characters kept from the LLM by skipping generated files, by heuristic.", [
+        ({"heuristic": heuristic}, entry["patch_chars"]) for heuristic, entry in sorted(generated.items())
+    ])
+
+    memory = memory_stats.snapshot()
+    yield _family("memory_chunks_total", "counter", "Chunk prompts built with PR memory.", [({}, memory["chunks"])])
+    yield _family("memory_tokens_total", "counter", "PR memory tokens injected into prompts.", [({}, memory["injected_tokens"])])
+    yield _family("memory_file_tokens_total", "counter", "Tokens injecting every comment on the file would have cost.", [({}, memory["file_tokens"])])
+    yield _family("memory_tokens_saved_total", "counter", "PR memory tokens left out by range scoping.", [({}, memory["tokens_saved"])])
+    yield _family("memory_comments_total", "counter", "Existing comments considered for PR memory, by result.", [
+        ({"result": "injected"}, memory["comments_injected"]), ({"result": "capped"}, memory["comments_capped"])
+    ])
+
+    agents = agent_stats.snapshot()
+    yield _family("agent_chunks_total", "counter", "Chunks reviewed by the agent, by prefetched context.", [
+        ({"context": group}, values["chunks"]) for group, values in agents.items()
+    ])
+    yield _family("agent_llm_calls_total", "counter", "Agent LLM turns, by prefetched context (turns per chunk = this / chunks).", [
+        ({"context": group}, values["llm_calls"]) for group, values in agents.items()
+    ])
+    yield _family("agent_tool_calls_total", "counter", "Agent tool calls, by prefetched context.", [
+        ({"context": group}, values["tool_calls"]) for group, values in agents.items()
+    ])
+
+    limits = rate_limit_governor.snapshot()
+    yield _family("github_rate_limit_remaining", "gauge", "Remaining GitHub API requests per token and resource.", [
+        ({"token": state["token"], "resource": state["resource"]}, state["remaining"])
+        for state in limits if state["remaining"] is not None
+    ])
+    yield _family("github_rate_limit_limit", "gauge", "GitHub API request quota per token and resource.", [
+        ({"token": state["token"], "resource": state["resource"]}, state["limit"])
+        for state in limits if state["limit"] is not None
+    ])
+    yield _family("github_rate_limit_reset_timestamp_seconds", "gauge", "When each GitHub quota resets (Unix time).", [
+        ({"token": state["token"], "resource": state["resource"]}, state["reset"])
+        for state in limits if state["reset"] is not None
+    ])
+
+    healthy, outstanding, latency = [], [], []
+    for provider, model, endpoints in pool_snapshots():
+        for endpoint in endpoints:
+            labels = {"provider": provider, "model": model, "endpoint": endpoint["name"]}
+            healthy.append((labels, int(endpoint["healthy"])))
+            outstanding.append((labels, endpoint["outstanding"]))
+            latency.append((labels, endpoint["latency"]))
+    yield _family("llm_endpoint_healthy", "gauge", "Whether a pooled LLM endpoint is in rotation.", healthy)
+    yield _family("llm_endpoint_outstanding", "gauge", "In-flight requests per pooled LLM endpoint.", outstanding)
+    yield _family("llm_endpoint_latency_seconds", "histogram", "Request latency per pooled LLM endpoint.", latency)
+
+metrics.register_collector(_service_families)
+
+@router.get("/metrics")
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,26 +1,82 @@
+import asyncio
+import threading
+import time
 from fastapi import APIRouter, Request, HTTPException, BackgroundTasks
+from fastapi.responses import JSONResponse
+from src.config import settings
 from src.handlers.github_handler import GitHubEventHandler
+from src.services.scheduler import chunk_scheduler
+from src.utils.histogram import LatencyHistogram
+from src.utils.cache_backends import get_cache
 
 router = APIRouter(prefix="/webhook")
 
-@router.post("/github")
+# Recently seen X-GitHub-Delivery IDs; redeliveries and retries reuse the same ID.
+# With a shared CACHE_BACKEND a delivery is handled once across all workers.
+seen_deliveries = get_cache("webhook_deliveries", settings.webhook_dedupe_max_entries, settings.webhook_dedupe_ttl)
+
+class IngestStats:
+    """Webhook ingest counters and latency (request received -> 202 returned)."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.received = 0
+        self.duplicates_dropped = 0
+        self.shed = 0
+        self.latency = LatencyHistogram([0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1])
+
+    def record(self, seconds: float, duplicate: bool = False, shed: bool = False):
+        with self._lock:
+            self.received += 1
+            if duplicate:
+                self.duplicates_dropped += 1
+            if shed:
+                self.shed += 1
+        self.latency.observe(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "received": self.received,
+                "duplicates_dropped": self.duplicates_dropped,
+                "shed": self.shed,
+                "latency": self.latency.snapshot()
+            }
+
+ingest_stats = IngestStats()
+
+@router.post("/github", status_code=202)
 async def github_webhook(request: Request, background_tasks: BackgroundTasks):
+    started = time.perf_counter()
     body = await request.body()
     signature = request.headers.get("X-Hub-Signature-256")
     
     # Use SCM class for static utility
     if not GitHubEventHandler.verify_signature(body, signature):
         raise HTTPException(status_code=401, detail="Invalid signature")
-    
-    try:
-        payload = await request.json()
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid JSON: {str(e)}")
 
     event = request.headers.get("X-GitHub-Event")
     if not event:
         raise HTTPException(status_code=400, detail="Missing X-GitHub-Event header")
 
-    # Delegate all business logic to the event handler
-    background_tasks.add_task(GitHubEventHandler.handle_event, event, payload)
-    return {"status": "event_received"}
+    delivery_id = request.headers.get("X-GitHub-Delivery")
+
+    # Shed load while the review queue is saturated. Checked before dedupe so that
+    # a redelivery of this event is accepted once the backlog drains.
+    if event != "ping" and chunk_scheduler.saturated:
+        retry_after = chunk_scheduler.retry_after()
+        ingest_stats.record(time.perf_counter() - started, shed=True)
+        return JSONResponse(
+            status_code=503,
+            content={"status": "overloaded", "delivery": delivery_id},
+            headers={"Retry-After": str(retry_after)}
+        )
+    # Off the event loop: a shared cache backend does network/disk I/O
+    if delivery_id and not await asyncio.to_thread(seen_deliveries.add_if_absent, delivery_id):
+        ingest_stats.record(time.perf_counter() - started, duplicate=True)
+        return {"status": "duplicate_ignored", "delivery": delivery_id}
+
+    # The verified bytes are parsed exactly once, in the background, so the reply
+    # doesn't depend on payload size
+    background_tasks.add_task(GitHubEventHandler.handle_raw_event, event, body, delivery_id)
+    ingest_stats.record(time.perf_counter() - started)
+    return {"status": "event_received", "delivery": delivery_id}
@@ -1,16 +1,54 @@
+import threading
 from src.config import settings
 
+class AgentStats:
+    """
+    Process-wide agent turn counts per reviewed chunk, split by whether the chunk
+    came with prefetched enclosing-symbol context, so the two can be compared.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._groups = {
+            "with_context": {"chunks": 0, "llm_calls": 0, "tool_calls": 0},
+            "without_context": {"chunks": 0, "llm_calls": 0, "tool_calls": 0}
+        }
+
+    def record(self, usage: dict, with_context: bool):
+        with self._lock:
+            group = self._groups["with_context" if with_context else "without_context"]
+            group["chunks"] += 1
+            group["llm_calls"] += usage["llm_calls"]
+            group["tool_calls"] += usage["tool_calls"]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                name: {
+                    **group,
+                    "avg_turns_per_chunk": round(group["llm_calls"] / group["chunks"], 3) if group["chunks"] else 0.0,
+                    "avg_tool_calls_per_chunk": round(group["tool_calls"] / group["chunks"], 3) if group["chunks"] else 0.0
+                }
+                for name, group in self._groups.items()
+            }
+
+agent_stats = AgentStats()
+
 class BaseAgent:
     def __init__(self, llm_client, scm_client):
         self.llm = llm_client
         self.scm = scm_client
         self.tool_call_max_retries = int(settings.tool_call_max_retries)
         self.tool_call_retry_delay = int(settings.tool_call_retry_delay)
+        self.usage = {"llm_calls": 0, "tool_calls": 0, "input_tokens": 0, "output_tokens": 0}
         self.registered_tools = {
             "get_file_structure": self.scm.get_file_structure,
             "get_function_content": self.scm.get_function_content
         }
 
+    @property
+    def total_tokens(self) -> int:
+        return self.usage["input_tokens"] + self.usage["output_tokens"]
+
     def llm_output_validator(self, response_text: str) -> tuple[bool, dict | None, str]:
         raise NotImplementedError("Subclasses must implement this method")
 
@@ -5,11 +5,14 @@ from src.config import settings
 from src.brain.agents.utils import (
     llm_output_parser, 
     llm_call, 
+    call_usage,
+    take_last_usage,
     execute_tool, 
     validate_required_keys, 
     validate_tool_structure, 
     validate_content_structure
 )
+from src.utils.metrics import agent_turns, invalid_outputs
 from src.brain.agents.base_agent import BaseAgent
 # Configure logging
 logger = logging.getLogger("review_agent")
@@ -50,22 +53,38 @@ class ReviewAgent(BaseAgent):
             logger.error(f"Error processing comments: {e}")
             return False, None, "Error processing comments"
 
-    def run(self, system_prompt: str, user_message: str) -> list:
+    def run(self, system_prompt: str, user_message: str, initial_response: str = None) -> list:
+        """
+        Runs the review loop. If initial_response is given (e.g. a first turn answered
+        through a batch API), the loop resumes from it instead of making the first call.
+        """
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_message}
         ]
 
         while True:
-            response_text = llm_call(self.llm, messages)
+            if initial_response is not None:
+                # The batch results already recorded this turn's usage; estimate it here
+                response_text, initial_response = initial_response, None
+                take_last_usage()
+            else:
+                response_text = llm_call(self.llm, messages)
             if response_text is None:
                 raise Exception("LLM call failed")
+
+            self.usage["llm_calls"] += 1
+            agent_turns.inc(agent="review")
+            input_tokens, output_tokens = call_usage(messages, response_text)
+            self.usage["input_tokens"] += input_tokens
+            self.usage["output_tokens"] += output_tokens
             
             messages.append({"role": "assistant", "content": response_text})
             is_valid, generated_content, error = self.llm_output_validator(response_text)
             
             if not is_valid:
                 logger.error(f"Invalid LLM output: {error}")
+                invalid_outputs.inc(agent="review")
                 messages.append({"role": "user", "content": error})
                 continue
             
@@ -76,6 +95,7 @@ class ReviewAgent(BaseAgent):
                 tool_name = tool_data["tool"]
                 tool_args = tool_data["args"]
                 logger.info(f"Agent requesting tool: {tool_name}")
+                self.usage["tool_calls"] += 1
                 
                 is_success, tool_result, tool_error = execute_tool(
                     tool_name, 
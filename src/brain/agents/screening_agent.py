@@ -0,0 +1,69 @@
+import logging
+from src.brain.agents.utils import (
+    llm_output_parser,
+    llm_call,
+    call_usage,
+    validate_required_keys
+)
+from src.utils.metrics import agent_turns, invalid_outputs
+from src.brain.agents.base_agent import BaseAgent
+
+logger = logging.getLogger("screening_agent")
+
+class ScreeningAgent(BaseAgent):
+    """
+    Cheap first-tier reviewer: returns a structured verdict on whether a chunk
+    needs a deep review. Has no tools and gives up after a few invalid answers.
+    """
+    max_invalid_responses = 2
+
+    def __init__(self, llm_client, scm_client):
+        super().__init__(llm_client, scm_client)
+        self.registered_tools = {}
+
+    def llm_output_validator(self, response_text: str) -> tuple[bool, dict | None, str]:
+        generated_content = llm_output_parser(response_text)
+        if not isinstance(generated_content, dict):
+            return False, None, "LLM returned invalid JSON"
+
+        is_valid, error = validate_required_keys(generated_content, ["verdict", "risk"])
+        if not is_valid:
+            return False, generated_content, error
+
+        if generated_content["verdict"] not in ("needs_review", "clean"):
+            return False, generated_content, f"Invalid verdict: {generated_content['verdict']}"
+
+        try:
+            generated_content["risk"] = min(max(float(generated_content["risk"]), 0.0), 1.0)
+        except (TypeError, ValueError):
+            return False, generated_content, "risk must be a number between 0.0 and 1.0"
+
+        return True, generated_content, ""
+
+    def run(self, system_prompt: str, user_message: str) -> dict:
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message}
+        ]
+
+        for _ in range(self.max_invalid_responses + 1):
+            response_text = llm_call(self.llm, messages)
+            if response_text is None:
+                raise Exception("LLM call failed")
+
+            self.usage["llm_calls"] += 1
+            agent_turns.inc(agent="screening")
+            input_tokens, output_tokens = call_usage(messages, response_text)
+            self.usage["input_tokens"] += input_tokens
+            self.usage["output_tokens"] += output_tokens
+
+            messages.append({"role": "assistant", "content": response_text})
+            is_valid, generated_content, error = self.llm_output_validator(response_text)
+            if is_valid:
+                return generated_content
+
+            logger.error(f"Invalid screening output: {error}")
+            invalid_outputs.inc(agent="screening")
+            messages.append({"role": "user", "content": error})
+
+        raise Exception("Screening model did not return a valid verdict")
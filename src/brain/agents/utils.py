@@ -2,9 +2,25 @@ from typing import Dict, Any, Callable
 import json
 import logging
 import time
+from src.services.llm.base import take_last_usage
+from src.utils.metrics import stage_seconds, tool_failures
 
 logger = logging.getLogger("agent_utils")
 
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used for budgeting."""
+    return len(text) // 4 + 1 if text else 0
+
+def call_usage(messages: list[dict[str, str]], response_text: str) -> tuple[int, int]:
+    """
+    (input_tokens, output_tokens) of the last llm_call on this thread, as reported in the
+    provider's response usage. Falls back to estimates for providers that send none.
+    """
+    usage = take_last_usage()
+    if usage is not None:
+        return usage
+    return sum(estimate_tokens(str(m["content"])) for m in messages), estimate_tokens(response_text)
+
 def llm_output_parser(text: str) -> Dict | None:
     try:
         # Clean response if it contains markdown code blocks
@@ -25,8 +41,10 @@ def llm_output_parser(text: str) -> Dict | None:
         return None
 
 def llm_call(llm_client, messages: list[dict[str, str]]) -> str | None:
+    take_last_usage()
     try:
-        response_text = llm_client.generate_response(messages)
+        with stage_seconds.time(stage="llm_call"):
+            response_text = llm_client.generate_response(messages)
         logger.info("LLM response received")
         return response_text
     except Exception as e:
@@ -34,6 +52,13 @@ def llm_call(llm_client, messages: list[dict[str, str]]) -> str | None:
         return None
 
 def execute_tool(tool_name: str, tool_args: Dict[str, Any], available_tools: Dict[str, Callable], max_retries: int, retry_delay: int) -> tuple[bool, Any | None, str | None]:
+    with stage_seconds.time(stage="tool_call"):
+        success, result, error = _execute_tool(tool_name, tool_args, available_tools, max_retries, retry_delay)
+    if not success:
+        tool_failures.inc(tool=tool_name)
+    return success, result, error
+
+def _execute_tool(tool_name: str, tool_args: Dict[str, Any], available_tools: Dict[str, Callable], max_retries: int, retry_delay: int) -> tuple[bool, Any | None, str | None]:
     for _ in range(max_retries):
         try:
             if tool_name in available_tools:
@@ -1,12 +1,13 @@
-from src.brain.prompts.reviewer_prompt import PERFORMANCE_FOCUSED_PROMPT
+from src.brain.prompts.reviewer_prompt import PERFORMANCE_FOCUSED_PROMPT, SCREENING_PROMPT
 from src.config import settings
 
 PROMPT_REGISTRY = {
-    "performance": PERFORMANCE_FOCUSED_PROMPT
+    "performance": PERFORMANCE_FOCUSED_PROMPT,
+    "screening": SCREENING_PROMPT
 }
 
-def get_system_prompt(**kwargs) -> str:
-    system_prompt_name = settings.system_prompt_name
+def get_system_prompt(prompt_name: str = None, **kwargs) -> str:
+    system_prompt_name = prompt_name or settings.system_prompt_name
     if system_prompt_name not in PROMPT_REGISTRY:
         raise ValueError(f"Unknown prompt: {system_prompt_name}")
     
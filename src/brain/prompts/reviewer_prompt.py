@@ -90,3 +90,23 @@ Examples:
     "tool_call": {{}}
 }}
 """
+
+SCREENING_PROMPT = """
+You are a fast pre-screening reviewer. Decide whether the provided git diff needs a deep code review.
+
+Flag the change as "needs_review" if it could plausibly introduce:
+- Security issues (injection, auth/permission changes, secrets, unsafe deserialization, weak crypto).
+- Logic errors (changed conditions, off-by-one, error handling, concurrency, resource leaks).
+- Performance problems (nested loops over large data, repeated I/O, unbounded memory).
+
+Mark it "clean" only if the change is clearly trivial or safe (renames, logging, constants, formatting, simple tests).
+When in doubt, choose "needs_review".
+
+IMPORTANT: Return STRICT JSON only, with no markdown or extra text:
+
+{{
+    "verdict": "<'needs_review' or 'clean'>",
+    "risk": <float between 0.0 (safe) and 1.0 (very risky)>,
+    "reason": "<one short sentence>"
+}}
+"""
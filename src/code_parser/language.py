@@ -1,3 +1,36 @@
+import importlib
+import logging
+import threading
+from tree_sitter import Language, Query
+
+logger = logging.getLogger(__name__)
+
+# Extension to Tree-sitter language name mapping
+EXT_TO_LANG = {
+    "py": "python",
+    "pyi": "python",
+    "js": "javascript",
+    "jsx": "javascript",
+    "mjs": "javascript",
+    "cjs": "javascript",
+    "ts": "typescript",
+    "mts": "typescript",
+    "cts": "typescript",
+    "tsx": "tsx",
+    "go": "go",
+    "java": "java",
+    "c": "c",
+    "h": "cpp",
+    "cpp": "cpp",
+    "cc": "cpp",
+    "cxx": "cpp",
+    "hpp": "cpp",
+    "hh": "cpp",
+    "hxx": "cpp",
+    "rb": "ruby",
+    "rs": "rust",
+}
+
 NODE_TYPES = {
     "python": {
         "class_definition": "Class",
@@ -13,6 +46,11 @@ NODE_TYPES = {
         "function_declaration": "Function",
         "method_definition": "Function",
     },
+    "tsx": {
+        "class_declaration": "Class",
+        "function_declaration": "Function",
+        "method_definition": "Function",
+    },
     "go": {
         "type_spec": "Class",
         "function_declaration": "Function",
@@ -45,4 +83,125 @@ NODE_TYPES = {
         "method": "Function",
         "module": "Class",
     }
-}
\ No newline at end of file
+}
+
+# Branching / control-flow node types across the supported grammars, for complexity scoring
+BRANCH_NODE_TYPES = {
+    # Conditionals
+    "if_statement", "elif_clause", "else_clause", "if_expression", "if_let_expression", "if", "unless",
+    "if_modifier", "unless_modifier", "conditional_expression", "ternary_expression", "conditional",
+    # Loops and comprehensions
+    "for_statement", "for_in_statement", "enhanced_for_statement", "for_range_loop", "while_statement",
+    "do_statement", "for_expression", "while_expression", "loop_expression", "for", "while", "until",
+    "while_modifier", "until_modifier", "for_in_clause", "if_clause",
+    # Multi-way branches
+    "switch_statement", "switch_expression", "switch_case", "switch_label", "case_clause", "case_statement",
+    "match_statement", "match_expression", "match_arm", "expression_switch_statement", "type_switch_statement",
+    "expression_case", "type_case", "select_statement", "communication_case", "case", "when",
+    # Exceptions
+    "try_statement", "try_expression", "except_clause", "catch_clause", "rescue",
+    # Short-circuit logic and deferred control flow
+    "boolean_operator", "lambda", "lambda_expression", "await", "await_expression", "yield", "yield_expression",
+}
+# binary_expression nodes only branch for these operators
+SHORT_CIRCUIT_OPERATORS = {"&&", "||", "and", "or"}
+
+class LanguageRegistry:
+    """
+    Single owner of language support: extension mapping, node types,
+    grammar loading and compiled definition queries.
+    Grammars load lazily on first use, or eagerly via warm_up().
+    """
+    def __init__(self):
+        self._languages = {}
+        self._queries = {}
+        self._lock = threading.Lock()
+        self.ready = False
+        # Languages whose grammar failed to load during warm-up, with the error
+        self.failed_languages: dict[str, str] = {}
+
+    @property
+    def supported_languages(self) -> list[str]:
+        return sorted(set(EXT_TO_LANG.values()))
+
+    @property
+    def supported_extensions(self) -> list[str]:
+        return list(EXT_TO_LANG.keys())
+
+    def language_for_path(self, file_path: str) -> str | None:
+        """Maps a file path to a tree-sitter language name (None if unsupported)."""
+        if "." not in file_path:
+            return None
+        return EXT_TO_LANG.get(file_path.rsplit(".", 1)[-1].lower())
+
+    def node_types(self, language_name: str) -> dict:
+        return NODE_TYPES.get(language_name, {})
+
+    def get_language(self, language_name: str) -> Language:
+        """Returns the (cached) tree-sitter Language, importing the grammar on first use."""
+        language = self._languages.get(language_name)
+        if language is None:
+            with self._lock:
+                language = self._languages.get(language_name)
+                if language is None:
+                    language = self._load_language(language_name)
+                    self._languages[language_name] = language
+        return language
+
+    def get_query(self, language_name: str):
+        """
+        Returns the compiled definition query for a language, built from NODE_TYPES.
+        Each node type is captured under its label (e.g. @Class, @Function).
+        """
+        if language_name not in self._queries:
+            lang = self.get_language(language_name)
+            # Skip node types the grammar doesn't know, otherwise the whole query fails to compile
+            patterns = [
+                f"({node_type}) @{label}"
+                for node_type, label in self.node_types(language_name).items()
+                if lang.id_for_node_kind(node_type, True)
+            ]
+            with self._lock:
+                self._queries[language_name] = Query(lang, "\n".join(patterns)) if patterns else None
+        return self._queries[language_name]
+
+    def warm_up(self, languages: list[str] | None = None):
+        """
+        Eagerly loads grammars and compiles queries so the first review doesn't pay for it.
+        The registry is only ready if every requested language loaded.
+        """
+        failed = {}
+        for language_name in languages or self.supported_languages:
+            try:
+                self.get_query(language_name)
+            except Exception as e:
+                failed[language_name] = str(e)
+                logger.error(f"Failed to warm up {language_name} grammar: {e}")
+        self.failed_languages = failed
+        self.ready = not failed
+        if failed:
+            logger.error(f"Language registry not ready, grammars failed to load: {', '.join(sorted(failed))}")
+        else:
+            logger.info(f"Language registry ready: {', '.join(sorted(self._languages))}")
+
+    def _load_language(self, language_name: str) -> Language:
+        """Dynamically load the tree-sitter language module."""
+        # Special case for TypeScript/TSX which share a package
+        if language_name in ["typescript", "tsx"]:
+            try:
+                module = importlib.import_module("tree_sitter_typescript")
+                func_name = "language_typescript" if language_name == "typescript" else "language_tsx"
+                return Language(getattr(module, func_name)())
+            except Exception as e:
+                raise ValueError(f"Could not load tree_sitter_typescript: {e}")
+
+        module_name = f"tree_sitter_{language_name}"
+        try:
+            module = importlib.import_module(module_name)
+            if hasattr(module, "language"):
+                return Language(module.language())
+            raise AttributeError(f"Module {module_name} has no 'language()' function.")
+        except Exception as e:
+            raise ValueError(f"Could not load tree-sitter language for {language_name}: {e}")
+
+language_registry = LanguageRegistry()
@@ -1,41 +1,60 @@
 from src.code_parser.tree_sitter_parser import UniversalParser
-
-# Extension to Tree-sitter language name mapping
-EXT_TO_LANG = {
-    "py": "python",
-    "js": "javascript",
-    "jsx": "javascript",
-    "ts": "typescript",
-    "tsx": "typescript",
-    "go": "go",
-    "java": "java",
-    "cpp": "cpp",
-    "c": "c",
-    "rb": "ruby",
-    "rs": "rust",
-}
+from src.code_parser.language import language_registry
 
 def analysis_file_structure(content: str, file_path: str) -> str:
-    file_extension = file_path.split(".")[-1].lower()
+    lang_name = language_registry.language_for_path(file_path)
     
-    if file_extension in EXT_TO_LANG:
-        lang_name = EXT_TO_LANG[file_extension]
+    if lang_name:
         parser = UniversalParser()
         return parser.parse_structure(content, lang_name)
     else:
-        return f"Structure analysis currently only available for: {', '.join(EXT_TO_LANG.keys())}"
+        return f"Structure analysis currently only available for: {', '.join(language_registry.supported_extensions)}"
 
 def get_function_content(content: str, file_path: str, target_name: str) -> str:
-    file_extension = file_path.split(".")[-1].lower()
+    lang_name = language_registry.language_for_path(file_path)
     
-    if file_extension in EXT_TO_LANG:
-        lang_name = EXT_TO_LANG[file_extension]
+    if lang_name:
         parser = UniversalParser()
         return parser.extract_function_content(content, lang_name, target_name)
     else:
-        return f"Function extraction currently only available for: {', '.join(EXT_TO_LANG.keys())}"
-
+        return f"Function extraction currently only available for: {', '.join(language_registry.supported_extensions)}"
 
+def get_enclosing_symbols(content: str, file_path: str, ranges: list, max_chars: int) -> list:
+    """
+    For each (start_line, end_line) range, returns the enclosing function/class as
+    {"name", "signature", "start_line", "end_line", "body"} (body cut to max_chars),
+    or None. Returns [None, ...] for unsupported languages.
+    """
+    lang_name = language_registry.language_for_path(file_path)
+    if not lang_name:
+        return [None] * len(ranges)
 
+    parser = UniversalParser()
+    lines = content.splitlines()
+    symbols = []
+    for node in parser.find_enclosing_definitions(content, lang_name, ranges):
+        if node is None:
+            symbols.append(None)
+            continue
+        # Whole source lines keep the first line's indentation consistent with the rest
+        body = "\n".join(lines[node.start_point[0]:node.end_point[0] + 1])
+        if len(body) > max_chars:
+            body = body[:max_chars].rsplit("\n", 1)[0] + "\n... (truncated)"
+        symbols.append({
+            "name": parser._extract_name(node),
+            "signature": body.split("\n", 1)[0].strip(),
+            "start_line": node.start_point[0] + 1,
+            "end_line": node.end_point[0] + 1,
+            "body": body
+        })
+    return symbols
 
-    
+def count_changed_branches(content: str, file_path: str, line_sets: list) -> list[int] | None:
+    """
+    For each set of changed line numbers, counts the branching AST nodes (if/loop/
+    case/catch/boolean operators...) starting on those lines. None for unsupported languages.
+    """
+    lang_name = language_registry.language_for_path(file_path)
+    if not lang_name:
+        return None
+    return UniversalParser().count_branches(content, lang_name, line_sets)
@@ -1,31 +1,73 @@
-import importlib
-from tree_sitter import Parser, Language
-from src.code_parser.language import NODE_TYPES
+from tree_sitter import Parser
+from src.code_parser.language import language_registry, BRANCH_NODE_TYPES, SHORT_CIRCUIT_OPERATORS
+
+try:
+    # tree-sitter >= 0.25 moved query execution onto QueryCursor
+    from tree_sitter import QueryCursor
+except ImportError:
+    QueryCursor = None
+
+class SemanticCursor:
+    """
+    Forward-only cursor over the semantic nodes of a tree (comments, extras and
+    whitespace-only leaves are skipped). Holds only the TreeCursor path, so walking
+    a file needs constant memory beyond the tree itself. 'depth' is the current
+    node's nesting level, so callers can tell the same token in another scope apart.
+    """
+    def __init__(self, tree, source: bytes):
+        self.cursor = tree.walk()
+        self.source = memoryview(source)
+        self.depth = 0
+        self.done = False
+        self._settle()
+
+    @property
+    def node(self):
+        return self.cursor.node
+
+    def is_leaf(self) -> bool:
+        return self.cursor.node.child_count == 0
+
+    def text(self) -> memoryview:
+        node = self.cursor.node
+        return self.source[node.start_byte:node.end_byte]
+
+    def token(self) -> bytes:
+        return self.text().tobytes().strip()
+
+    def descend(self):
+        """Moves to the first semantic node inside the current subtree (or past it)."""
+        if self.cursor.goto_first_child():
+            self.depth += 1
+            self._settle()
+        else:
+            self.skip()
+
+    def skip(self):
+        """Moves past the current subtree to the next semantic node."""
+        while not self.cursor.goto_next_sibling():
+            if not self.cursor.goto_parent():
+                self.done = True
+                return
+            self.depth -= 1
+        self._settle()
+
+    def _settle(self):
+        while not self.done and self._is_noise():
+            self.skip()
+
+    def _is_noise(self) -> bool:
+        node = self.cursor.node
+        if node.is_extra or "comment" in node.type:
+            return True
+        return node.child_count == 0 and not self.token()
 
 class UniversalParser:
     def __init__(self):
         self.parsers = {}
 
     def get_language(self, language_name: str):
-        """Dynamically load the tree-sitter language module."""
-        # Special case for TypeScript/TSX which share a package
-        if language_name in ["typescript", "tsx"]:
-            try:
-                module = importlib.import_module("tree_sitter_typescript")
-                func_name = "language_typescript" if language_name == "typescript" else "language_tsx"
-                return Language(getattr(module, func_name)())
-            except Exception as e:
-                raise ValueError(f"Could not load tree_sitter_typescript: {e}")
-
-        module_name = f"tree_sitter_{language_name}"
-        try:
-            module = importlib.import_module(module_name)
-            if hasattr(module, "language"):
-                return Language(module.language())
-            raise AttributeError(f"Module {module_name} has no 'language()' function.")
-        except Exception as e:
-            raise ValueError(f"Could not load tree-sitter language for {language_name}: {e}")
-
+        return language_registry.get_language(language_name)
 
     def get_parser(self, language_name: str):
         if language_name not in self.parsers:
@@ -33,68 +75,51 @@ class UniversalParser:
             self.parsers[language_name] = Parser(lang)
         return self.parsers[language_name]
 
-    def get_semantic_tokens(self, content: str, language_name: str) -> str:
-        """Extracts a normalized string of semantic tokens (ignoring comments/whitespace)."""
-        try:
-            parser = self.get_parser(language_name)
-            tree = parser.parse(bytes(content, "utf8"))
-            tokens = []
-            self._walk_semantic(tree.root_node, tokens)
-            return "".join(tokens)
-        except Exception:
-            return ""
-
-    def _walk_semantic(self, node, tokens):
-        """Recursively collects semantic tokens, ignoring comments."""
-        # Tree-sitter 'extra' nodes are usually comments/whitespace
-        # We also check for 'comment' in the type string for robustness
-        if node.is_extra or "comment" in node.type:
-            return
+    def get_query(self, language_name: str):
+        return language_registry.get_query(language_name)
 
-        if not node.children:
-            text = node.text.decode("utf8").strip()
-            if text:
-                tokens.append(text)
-            return
+    def _find_definitions(self, root, language_name: str) -> list:
+        """Returns all definition nodes under root in document (pre-)order."""
+        query = self.get_query(language_name)
+        if query is None:
+            return []
 
-        for child in node.children:
-            self._walk_semantic(child, tokens)
+        captures = QueryCursor(query).captures(root) if QueryCursor else query.captures(root)
+        nodes = [node for group in captures.values() for node in group]
+        # Outer nodes first when two definitions start at the same byte
+        nodes.sort(key=lambda n: (n.start_byte, -n.end_byte))
+        return nodes
+
+    def parse(self, content: str, language_name: str):
+        """Parses content and returns (tree, source_bytes)."""
+        source = bytes(content, "utf8")
+        return self.get_parser(language_name).parse(source), source
 
     def parse_structure(self, content: str, language_name: str) -> str:
         try:
             parser = self.get_parser(language_name)
             tree = parser.parse(bytes(content, "utf8"))
+            mapping = language_registry.node_types(language_name)
             
             results = []
             visited_lines = set() # Prevent duplicate reports for the same line
             
-            self._walk(tree.root_node, language_name, results, visited_lines)
+            for node in self._find_definitions(tree.root_node, language_name):
+                line_no = node.start_point[0] + 1
+
+                # Only report the FIRST thing found on a specific line to avoid duplicates
+                if line_no not in visited_lines:
+                    name = self._extract_name(node)
+                    results.append((line_no, f"Line {line_no}: {mapping[node.type]} {name}"))
+                    visited_lines.add(line_no)
             
             # Final Sort
-            results.sort(key=lambda x: int(x.split(":")[0].replace("Line ", "")))
+            results.sort(key=lambda x: x[0])
             
-            return "\n".join(results) if results else "No classes or functions found."
+            return "\n".join(r[1] for r in results) if results else "No classes or functions found."
         except Exception as e:
             return f"Error parsing {language_name} file structure: {str(e)}"
 
-    def _walk(self, node, lang, results, visited_lines):
-        node_type = node.type
-        mapping = NODE_TYPES.get(lang, {})
-        
-        if node_type in mapping:
-            line_no = node.start_point[0] + 1
-            
-            # Only report the FIRST thing found on a specific line to avoid duplicates
-            if line_no not in visited_lines:
-                label = mapping[node_type]
-                name = self._extract_name(node)
-                results.append(f"Line {line_no}: {label} {name}")
-                visited_lines.add(line_no)
-        
-        # Always recurse
-        for child in node.children:
-            self._walk(child, lang, results, visited_lines)
-
     def _extract_name(self, node):
         """Finds the most logical identifier for a definition node."""
         # Generic name-holding child types across many grammars
@@ -126,17 +151,53 @@ class UniversalParser:
         except Exception as e:
             return f"Error extracting function content: {str(e)}"
 
+    def find_enclosing_definitions(self, content: str, language_name: str, ranges: list) -> list:
+        """
+        Parses content once and returns, for each (start_line, end_line) range (1-based),
+        the innermost function/class node spanning it, or the one containing its first
+        line when no definition spans the whole range. None where there is neither.
+        """
+        tree, _ = self.parse(content, language_name)
+        definitions = self._find_definitions(tree.root_node, language_name)
+        results = []
+        for start, end in ranges:
+            spanning, containing = None, None
+            # Definitions are in pre-order, so a later match is nested in an earlier one
+            for node in definitions:
+                first, last = node.start_point[0] + 1, node.end_point[0] + 1
+                if first <= start <= last:
+                    containing = node
+                    if end <= last:
+                        spanning = node
+            results.append(spanning or containing)
+        return results
+
+    def count_branches(self, content: str, language_name: str, line_sets: list) -> list[int]:
+        """
+        Parses content once and returns, for each set of (1-based) line numbers, how many
+        branching nodes (see BRANCH_NODE_TYPES) start on those lines. Comments and
+        strings are syntax nodes of their own, so keywords inside them don't count.
+        """
+        tree, _ = self.parse(content, language_name)
+        per_line = {}
+        cursor = tree.walk()
+        while True:
+            node = cursor.node
+            # Named nodes only: keyword tokens share their type names ("if", "case"...)
+            if node.is_named and node.type in BRANCH_NODE_TYPES or (
+                node.type in ("binary_expression", "binary")
+                and any(child.type in SHORT_CIRCUIT_OPERATORS for child in node.children)
+            ):
+                line = node.start_point[0] + 1
+                per_line[line] = per_line.get(line, 0) + 1
+            if cursor.goto_first_child():
+                continue
+            while not cursor.goto_next_sibling():
+                if not cursor.goto_parent():
+                    return [sum(per_line.get(line, 0) for line in lines) for lines in line_sets]
+
     def _find_node_by_name(self, node, lang, target_name):
-        node_type = node.type
-        mapping = NODE_TYPES.get(lang, {})
-        
-        if node_type in mapping:
-            name = self._extract_name(node)
-            if name == target_name:
-                return node
-        
-        for child in node.children:
-            result = self._find_node_by_name(child, lang, target_name)
-            if result:
-                return result
+        for candidate in self._find_definitions(node, lang):
+            if self._extract_name(candidate) == target_name:
+                return candidate
         return None
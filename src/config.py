@@ -1,5 +1,6 @@
 import os
 from enum import Enum
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class LLMProvider(str, Enum):
@@ -18,6 +19,15 @@ class Settings(BaseSettings):
     app_name: str = "Pull Request Pilot"
     debug: bool = False
     github_base_url: str = os.getenv("GITHUB_BASE_URL")
+    github_per_page: int = int(os.getenv("GITHUB_PER_PAGE", 100))
+    github_page_concurrency: int = int(os.getenv("GITHUB_PAGE_CONCURRENCY", 4))
+    github_http_cache: bool = os.getenv("GITHUB_HTTP_CACHE", "true").lower() == "true"
+    github_http_cache_max_entries: int = int(os.getenv("GITHUB_HTTP_CACHE_MAX_ENTRIES", 2000))
+    github_rate_limit_slowdown: int = int(os.getenv("GITHUB_RATE_LIMIT_SLOWDOWN", 1000))
+    github_rate_limit_reserve: int = int(os.getenv("GITHUB_RATE_LIMIT_RESERVE", 500))
+    github_rate_limit_max_wait: float = float(os.getenv("GITHUB_RATE_LIMIT_MAX_WAIT", 900))
+    github_graphql: bool = os.getenv("GITHUB_GRAPHQL", "false").lower() == "true"
+    github_graphql_comments_per_thread: int = int(os.getenv("GITHUB_GRAPHQL_COMMENTS_PER_THREAD", 50))
     ollama_base_url: str = os.getenv("OLLAMA_BASE_URL")
     llm_provider: str = os.getenv("LLM_PROVIDER")
     
@@ -27,13 +37,104 @@ class Settings(BaseSettings):
     system_prompt_name: str = os.getenv("SYSTEM_PROMPT_NAME")
     tool_call_max_retries: int = os.getenv("TOOL_CALL_MAX_RETRIES", 3)
     tool_call_retry_delay: int = os.getenv("TOOL_CALL_RETRY_DELAY", 5)
+
+    # Local state (ledger, batch store, SQLite cache); empty = $XDG_DATA_HOME/pr-pilot
+    data_dir: str = os.getenv("DATA_DIR", "")
     
+    # Webhook Ingest (X-GitHub-Delivery dedupe)
+    webhook_dedupe_ttl: float = float(os.getenv("WEBHOOK_DEDUPE_TTL", 86400))
+    webhook_dedupe_max_entries: int = int(os.getenv("WEBHOOK_DEDUPE_MAX_ENTRIES", 10000))
+
+    # Review Scheduling (shared by all active reviews; weights like "org/repo=2,org/other=0.5")
+    # 0 = follow the LLM endpoint pool's capacity (10 without a pool) / half the global cap
+    scheduler_max_concurrency: int = int(os.getenv("SCHEDULER_MAX_CONCURRENCY", 0))
+    scheduler_per_repo_limit: int = int(os.getenv("SCHEDULER_PER_REPO_LIMIT", 0))
+    scheduler_max_queued: int = int(os.getenv("SCHEDULER_MAX_QUEUED", 1000))
+    scheduler_repo_weights: str = os.getenv("SCHEDULER_REPO_WEIGHTS", "")
+
     # Review Strategy
     review_max_lines: int = int(os.getenv("REVIEW_MAX_LINES", 10))
+    review_chunking: str = os.getenv("REVIEW_CHUNKING", "lines")  # lines | symbols
+    review_chunk_max_tokens: int = int(os.getenv("REVIEW_CHUNK_MAX_TOKENS", 1200))
     review_execution_mode: str = os.getenv("REVIEW_EXECUTION_MODE", "sequential")
+    low_priority_execution_mode: str = os.getenv("LOW_PRIORITY_EXECUTION_MODE", "")
     ignored_extensions: str = os.getenv("IGNORED_EXTENSIONS", ".lock,.json,.map,.svg,.png,.jpg,.jpeg,.pyc,.yml,.toml,.pyd,.md")
     ignored_files: str = os.getenv("IGNORED_FILES", ".gitignore,.env,LICENSE,CONTRIBUTING.md")
     ignored_directories: str = os.getenv("IGNORED_DIRECTORIES", "__pycache__,node_modules,.venv,tests,migrations")
+    review_token_budget: int = int(os.getenv("REVIEW_TOKEN_BUDGET", 0))
+    review_cost_budget: float = float(os.getenv("REVIEW_COST_BUDGET", 0))
+    llm_cost_per_1k_tokens: float = float(os.getenv("LLM_COST_PER_1K_TOKENS", 0))
+    repo_config_path: str = os.getenv("REPO_CONFIG_PATH", ".pr-pilot.json")
+    skip_generated_files: bool = os.getenv("SKIP_GENERATED_FILES", "true").lower() == "true"
+
+    # LLM Endpoint Pool ("url[|api_key],..." for the provider; empty = single endpoint from above)
+    llm_pool_endpoints: str = os.getenv("LLM_POOL_ENDPOINTS", "")
+    llm_pool_max_inflight_per_endpoint: int = int(os.getenv("LLM_POOL_MAX_INFLIGHT_PER_ENDPOINT", 4))
+    # How long a call waits for a free slot when every endpoint is at its in-flight limit
+    llm_pool_acquire_timeout: float = float(os.getenv("LLM_POOL_ACQUIRE_TIMEOUT", 120))
+    llm_pool_health_interval: float = float(os.getenv("LLM_POOL_HEALTH_INTERVAL", 15))
+    llm_pool_error_window: int = int(os.getenv("LLM_POOL_ERROR_WINDOW", 20))
+    llm_pool_min_requests: int = int(os.getenv("LLM_POOL_MIN_REQUESTS", 5))
+    llm_pool_max_error_rate: float = float(os.getenv("LLM_POOL_MAX_ERROR_RATE", 0.5))
+    llm_pool_max_latency: float = float(os.getenv("LLM_POOL_MAX_LATENCY", 0))
+    llm_pool_eject_seconds: float = float(os.getenv("LLM_POOL_EJECT_SECONDS", 30))
+
+    # Model Cascade (cheap screening tier in front of the configured LLM_PROVIDER)
+    cascade_enabled: bool = os.getenv("CASCADE_ENABLED", "false").lower() == "true"
+    cascade_screen_provider: str = os.getenv("CASCADE_SCREEN_PROVIDER", "ollama")
+    cascade_screen_model: str = os.getenv("CASCADE_SCREEN_MODEL", "")
+    cascade_screen_endpoints: str = os.getenv("CASCADE_SCREEN_ENDPOINTS", "")
+    # Screening slots, separate from the deep tier's (0 = the screening pool's capacity, 10 without a pool)
+    cascade_screen_concurrency: int = int(os.getenv("CASCADE_SCREEN_CONCURRENCY", 0))
+    cascade_risk_threshold: float = float(os.getenv("CASCADE_RISK_THRESHOLD", 0.5))
+    cascade_always_escalate_score: float = float(os.getenv("CASCADE_ALWAYS_ESCALATE_SCORE", 0))
+    cascade_screen_cost_per_1k_tokens: float = float(os.getenv("CASCADE_SCREEN_COST_PER_1K_TOKENS", 0))
+
+    # Batch Execution Mode
+    batch_store_path: str = os.getenv("BATCH_STORE_PATH", "")
+    batch_poll_interval: float = float(os.getenv("BATCH_POLL_INTERVAL", 60))
+    batch_max_wait: float = float(os.getenv("BATCH_MAX_WAIT", 86400))
+    # A polling worker renews its lease on a batch every poll; others only take over expired leases
+    batch_lease_seconds: float = float(os.getenv("BATCH_LEASE_SECONDS", 300))
+    # How often workers look for batches whose owner stopped (0 = only at startup)
+    batch_resume_interval: float = float(os.getenv("BATCH_RESUME_INTERVAL", 300))
+    # Share of LLM_COST_PER_1K_TOKENS that batch APIs take off (OpenAI and Anthropic: 50%)
+    batch_cost_discount: float = float(os.getenv("BATCH_COST_DISCOUNT", 0.5))
+
+    # Cross-PR Review Result Cache (identical hunks in backports/cherry-picks)
+    review_cache_enabled: bool = os.getenv("REVIEW_CACHE_ENABLED", "true").lower() == "true"
+    review_cache_ttl: float = float(os.getenv("REVIEW_CACHE_TTL", 604800))
+    review_cache_max_entries: int = int(os.getenv("REVIEW_CACHE_MAX_ENTRIES", 5000))
+
+    # Review Memory: prior comments injected per chunk (0 tokens = no cap)
+    review_memory_line_margin: int = int(os.getenv("REVIEW_MEMORY_LINE_MARGIN", 20))
+    review_memory_max_tokens: int = int(os.getenv("REVIEW_MEMORY_MAX_TOKENS", 800))
+
+    # Context Prefetch: enclosing function/class attached to each chunk from the head content
+    context_prefetch: bool = os.getenv("CONTEXT_PREFETCH", "true").lower() == "true"
+    context_prefetch_max_chars: int = int(os.getenv("CONTEXT_PREFETCH_MAX_CHARS", 4000))
+
+    # Review Ledger: posted comments, reviewed chunks and run timings per PR
+    review_ledger_enabled: bool = os.getenv("REVIEW_LEDGER_ENABLED", "true").lower() == "true"
+    review_ledger_path: str = os.getenv("REVIEW_LEDGER_PATH", "")
+
+    # File Fetching
+    max_file_fetch_bytes: int = int(os.getenv("MAX_FILE_FETCH_BYTES", 1048576))
+    file_fetch_concurrency: int = int(os.getenv("FILE_FETCH_CONCURRENCY", 8))
+    file_cache_max_entries: int = int(os.getenv("FILE_CACHE_MAX_ENTRIES", 2000))
+    file_cache_ttl: float = float(os.getenv("FILE_CACHE_TTL", 86400))
+
+    # Cache Backend shared by the SCM and agent layers: memory | sqlite | redis
+    cache_backend: str = os.getenv("CACHE_BACKEND", "memory")
+    cache_sqlite_path: str = os.getenv("CACHE_SQLITE_PATH", "")
+    cache_redis_url: str = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    # Connect/read timeout, and how long a failed server is skipped (calls are cache misses meanwhile)
+    cache_redis_timeout: float = float(os.getenv("CACHE_REDIS_TIMEOUT", 1))
+    cache_redis_cooldown: float = float(os.getenv("CACHE_REDIS_COOLDOWN", 30))
+
+    # Language Support
+    language_warmup: bool = os.getenv("LANGUAGE_WARMUP", "true").lower() == "true"
+    language_warmup_languages: str = os.getenv("LANGUAGE_WARMUP_LANGUAGES", "")
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
     def __init__(self):
@@ -52,4 +153,14 @@ class Settings(BaseSettings):
         if self.llm_provider.lower() not in allowed_providers:
             raise ValueError(f"LLM_PROVIDER must be one of: {', '.join(allowed_providers)}. Got: {self.llm_provider}")
 
+    @model_validator(mode="after")
+    def _resolve_data_paths(self):
+        # Empty paths put each store under DATA_DIR rather than the working directory
+        if not self.data_dir:
+            self.data_dir = os.path.join(os.getenv("XDG_DATA_HOME") or os.path.expanduser("~/.local/share"), "pr-pilot")
+        for field, filename in (("batch_store_path", "batches.db"), ("review_ledger_path", "ledger.db"), ("cache_sqlite_path", "cache.db")):
+            if not getattr(self, field):
+                setattr(self, field, os.path.join(self.data_dir, filename))
+        return self
+
 settings = Settings()
@@ -2,6 +2,7 @@ from src.models.github_model import PullRequestEvent
 from src.services.reviewer import ReviewerService
 import hmac
 import hashlib
+import json
 from fastapi import HTTPException
 from src.config import settings
 
@@ -35,6 +36,18 @@ class GitHubEventHandler:
 
         return hmac.compare_digest(received_signature, computed_signature)
 
+    @classmethod
+    async def handle_raw_event(cls, event: str, body: bytes, delivery_id: str = None):
+        """
+        Parse a verified webhook body (once) and dispatch it.
+        """
+        try:
+            payload = json.loads(body)
+        except (ValueError, UnicodeDecodeError) as e:
+            print(f"Dropping GitHub delivery {delivery_id}: invalid JSON ({e})")
+            return
+        await cls.handle_event(event, payload)
+
     @classmethod
     async def handle_event(cls, event: str, payload: dict):
         """
@@ -61,8 +74,11 @@ class GitHubEventHandler:
         print(f"GitHub PR event | action={action} | pr={pr_number} | repo={repo_name}")
         
         if action in ["opened", "synchronize"]:
-            reviewer = ReviewerService()
-            await reviewer.review_pull_request(repo_name, pr_number)
+            # Draft PRs are low priority and can run in a cheaper execution mode (e.g. batch)
+            draft = pr_event.pull_request.draft
+            execution_mode = settings.low_priority_execution_mode if draft else None
+            reviewer = ReviewerService(priority="low" if draft else "normal")
+            await reviewer.review_pull_request(repo_name, pr_number, execution_mode=execution_mode or None)
 
     @staticmethod
     async def handle_push(payload: dict):
@@ -75,5 +91,7 @@ class GitHubEventHandler:
 
         print(f"GitHub Push event | repo={repo_name} | commit={commit_sha}")
         
-        reviewer = ReviewerService()
-        await reviewer.review_commit(repo_name, commit_sha)
+        # Push reviews are low priority: they wait out a low GitHub rate limit instead of
+        # spending it, and run in the cheaper low-priority execution mode (e.g. batch)
+        reviewer = ReviewerService(priority="low")
+        await reviewer.review_commit(repo_name, commit_sha, execution_mode=settings.low_priority_execution_mode or None)
@@ -1,10 +1,48 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
 from src.api.webhook import router as webhook_router
+from src.api.metrics import router as metrics_router
+from src.code_parser.language import language_registry
+from src.config import settings
+from src.services.reviewer import ReviewerService
 
-app = FastAPI(title="Pull Request Pilot")
+logger = logging.getLogger(__name__)
+
+async def _watch_pending_batches():
+    # The service is built inside the task so a misconfigured provider can't block startup
+    await ReviewerService().watch_pending_batches()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load tree-sitter grammars in the background so cold-start cost doesn't land on the first review
+    warmup_task = None
+    if settings.language_warmup:
+        languages = [name.strip() for name in settings.language_warmup_languages.split(",") if name.strip()]
+        warmup_task = asyncio.create_task(asyncio.to_thread(language_registry.warm_up, languages or None))
+
+    # Pick up batch reviews whose worker stopped while polling them, now and periodically
+    batch_watch_task = asyncio.create_task(_watch_pending_batches())
+    yield
+    batch_watch_task.cancel()
+    if warmup_task and not warmup_task.done():
+        warmup_task.cancel()
+
+app = FastAPI(title="Pull Request Pilot", lifespan=lifespan)
 
 @app.get("/health")
 def health():
     return {"status": "OK"}
 
-app.include_router(webhook_router)
\ No newline at end of file
+@app.get("/ready")
+def ready():
+    if settings.language_warmup and language_registry.failed_languages:
+        failed = ", ".join(sorted(language_registry.failed_languages))
+        raise HTTPException(status_code=503, detail=f"Language grammars failed to load: {failed}")
+    if settings.language_warmup and not language_registry.ready:
+        raise HTTPException(status_code=503, detail="Language grammars are still loading")
+    return {"status": "READY"}
+
+app.include_router(webhook_router)
+app.include_router(metrics_router)
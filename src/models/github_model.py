@@ -6,6 +6,7 @@ class GitHubUser(BaseModel):
 class PullRequest(BaseModel):
     title: str
     user: GitHubUser
+    draft: bool = False
 
 class Repository(BaseModel):
     full_name: str
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+
+class PathOverride(BaseModel):
+    path: str
+    model: str | None = None
+    chunk_size: int | None = None
+    chunking: str | None = None
+    risk_weight: float | None = None
+
+class RepoReviewConfig(BaseModel):
+    """
+    Per-repository review rules, read from settings.repo_config_path in the repository.
+    """
+    ignore: list[str] = []
+    max_file_size: int | None = None
+    overrides: list[PathOverride] = []
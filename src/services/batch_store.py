@@ -0,0 +1,138 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from src.config import settings
+
+# Identifies this process as the owner of the batches it is polling
+PROCESS_OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Statuses of batches that are not finished; the lease decides whether anyone is still polling them
+OPEN_STATUSES = ("pending", "polling", "resuming")
+
+class BatchStore:
+    """
+    SQLite record of submitted batch jobs, so polling and the agent loop can resume
+    after a restart. Each batch stores the prepared chunk prompts it was built from,
+    and each chunk is recorded with its comments once they are posted, so a resumed
+    batch neither reposts them nor loses them from the file's memory.
+
+    A batch is owned by the process polling it, which keeps renewing a lease.
+    Other processes (restarted workers, other containers on the same volume) only
+    take over batches whose lease has expired, so a live batch is never finished twice.
+    """
+    def __init__(self, path: str = None, owner: str = PROCESS_OWNER, lease_seconds: float = None):
+        self.path = path or settings.batch_store_path
+        self.owner = owner
+        self.lease_seconds = lease_seconds or settings.batch_lease_seconds
+        self._local = threading.local()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS batches (
+                    batch_id TEXT PRIMARY KEY,
+                    provider TEXT NOT NULL,
+                    model TEXT,
+                    repo_id TEXT NOT NULL,
+                    pr_id INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    items TEXT NOT NULL,
+                    owner TEXT,
+                    lease_until REAL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS batch_items (
+                    batch_id TEXT NOT NULL,
+                    custom_id TEXT NOT NULL,
+                    comments TEXT NOT NULL,
+                    PRIMARY KEY (batch_id, custom_id)
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread, reused; "with conn" only wraps a transaction, it doesn't close it
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def save(self, batch_id: str, provider: str, model: str, repo_id: str, pr_id: int, items: list[dict]):
+        """Records a just-submitted batch as owned and being polled by this process."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO batches
+                    (batch_id, provider, model, repo_id, pr_id, status, created_at, items, owner, lease_until)
+                VALUES (?, ?, ?, ?, ?, 'polling', ?, ?, ?, ?)
+                """,
+                (batch_id, provider, model, repo_id, pr_id, now, json.dumps(items), self.owner, now + self.lease_seconds)
+            )
+
+    def renew(self, batch_id: str) -> bool:
+        """Extends this process's lease on a batch; False if another process took it over."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE batches SET lease_until = ? WHERE batch_id = ? AND owner = ? AND status = 'polling'",
+                (time.time() + self.lease_seconds, batch_id, self.owner)
+            )
+            return cursor.rowcount == 1
+
+    def pending(self) -> list[dict]:
+        """Unfinished batches nobody holds a live lease on."""
+        placeholders = ", ".join("?" for _ in OPEN_STATUSES)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM batches WHERE status IN ({placeholders}) AND COALESCE(lease_until, 0) < ? ORDER BY created_at",
+                (*OPEN_STATUSES, time.time())
+            ).fetchall()
+        return [{**dict(row), "items": json.loads(row["items"])} for row in rows]
+
+    def claim(self, batch_id: str) -> bool:
+        """Atomically takes over an unfinished batch whose lease expired, so only one worker resumes it."""
+        placeholders = ", ".join("?" for _ in OPEN_STATUSES)
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"""
+                UPDATE batches SET status = 'polling', owner = ?, lease_until = ?
+                WHERE batch_id = ? AND status IN ({placeholders}) AND COALESCE(lease_until, 0) < ?
+                """,
+                (self.owner, now + self.lease_seconds, batch_id, *OPEN_STATUSES, now)
+            )
+            return cursor.rowcount == 1
+
+    def mark_item_done(self, batch_id: str, custom_id: str, comments: list[dict]) -> bool:
+        """
+        Records that a chunk of a batch was reviewed and its comments posted.
+        False if it was already recorded, so its batch usage is only charged once.
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO batch_items (batch_id, custom_id, comments) VALUES (?, ?, ?)",
+                (batch_id, custom_id, json.dumps(comments))
+            )
+            return cursor.rowcount == 1
+
+    def done_items(self, batch_id: str) -> dict[str, list[dict]]:
+        """{custom_id: posted comments} of the chunks already finished."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT custom_id, comments FROM batch_items WHERE batch_id = ?", (batch_id,)).fetchall()
+        return {row["custom_id"]: json.loads(row["comments"]) for row in rows}
+
+    def mark(self, batch_id: str, status: str):
+        with self._connect() as conn:
+            conn.execute("UPDATE batches SET status = ? WHERE batch_id = ? AND owner = ?", (status, batch_id, self.owner))
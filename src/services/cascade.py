@@ -0,0 +1,95 @@
+import logging
+import threading
+from src.config import settings
+from src.brain.agents.screening_agent import ScreeningAgent
+from src.brain.prompts.prompt_registory import get_system_prompt
+
+logger = logging.getLogger(__name__)
+
+class CascadeStats:
+    """
+    Process-wide counters for the model cascade: escalation rate and the
+    deep-tier spend avoided by chunks the screening tier marked clean.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.screened = 0
+        self.escalated = 0
+        self.screen_failures = 0
+        self.screen_tokens = 0
+        self.deep_tokens_avoided = 0
+
+    def record(self, escalated: bool, screen_tokens: int, deep_estimate: int, failed: bool = False):
+        with self._lock:
+            self.screened += 1
+            self.screen_tokens += screen_tokens
+            if failed:
+                self.screen_failures += 1
+            if escalated:
+                self.escalated += 1
+            else:
+                self.deep_tokens_avoided += deep_estimate
+
+    @property
+    def escalation_rate(self) -> float:
+        return self.escalated / self.screened if self.screened else 0.0
+
+    @property
+    def cost_saved(self) -> float:
+        avoided = self.deep_tokens_avoided / 1000 * settings.llm_cost_per_1k_tokens
+        spent = self.screen_tokens / 1000 * settings.cascade_screen_cost_per_1k_tokens
+        return avoided - spent
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "screened": self.screened,
+                "escalated": self.escalated,
+                "screen_failures": self.screen_failures,
+                "escalation_rate": round(self.escalation_rate, 4),
+                "screen_tokens": self.screen_tokens,
+                "deep_tokens_avoided": self.deep_tokens_avoided,
+                "cost_saved": round(self.cost_saved, 4)
+            }
+
+cascade_stats = CascadeStats()
+
+class ModelCascade:
+    """
+    Two-tier review: a cheap screening model sees every chunk and only chunks it
+    flags (or that score above the risk bypass) go to the expensive deep model.
+    """
+    def __init__(self, screen_llm, scm):
+        self.screen_llm = screen_llm
+        self.scm = scm
+        self.risk_threshold = settings.cascade_risk_threshold
+        self.always_escalate_score = settings.cascade_always_escalate_score
+
+    def should_escalate(self, chunk: dict, user_message: str, deep_estimate: int) -> bool:
+        """
+        Screens a chunk and records the outcome. Escalates on 'needs_review', on a
+        screening risk at or above the threshold, and whenever screening fails.
+        """
+        filename, start, end = chunk["filename"], chunk["start_line"], chunk["end_line"]
+
+        risk_score = chunk.get("risk", {}).get("score", 0)
+        if self.always_escalate_score and risk_score >= self.always_escalate_score:
+            logger.info(f"Cascade: escalating {filename} lines {start}-{end} (risk score {risk_score})")
+            cascade_stats.record(True, 0, deep_estimate)
+            return True
+
+        agent = ScreeningAgent(self.screen_llm, self.scm)
+        try:
+            verdict = agent.run(get_system_prompt(prompt_name="screening"), user_message)
+        except Exception as e:
+            logger.warning(f"Cascade: screening failed for {filename} lines {start}-{end}, escalating: {e}")
+            cascade_stats.record(True, agent.total_tokens, deep_estimate, failed=True)
+            return True
+
+        escalate = verdict["verdict"] == "needs_review" or verdict["risk"] >= self.risk_threshold
+        logger.info(
+            f"Cascade: {filename} lines {start}-{end} screened as {verdict['verdict']} "
+            f"(risk {verdict['risk']}) -> {'escalate' if escalate else 'skip'}"
+        )
+        cascade_stats.record(escalate, agent.total_tokens, deep_estimate)
+        return escalate
@@ -0,0 +1,71 @@
+import re
+from dataclasses import dataclass
+
+ADDED_FILE_HEADER_RE = re.compile(r'^@@ -0,0 \+1(?:,(\d+))? @@')
+
+@dataclass
+class FetchPlan:
+    """Which revisions of a changed file the review needs, and under which paths."""
+    base_path: str | None = None
+    head_path: str | None = None
+    # Head content rebuilt from the patch, when the patch is the whole file
+    head_content: str | None = None
+    # Reason to leave the file out of the review entirely
+    skip: str | None = None
+
+    @property
+    def semantic_check(self) -> bool:
+        """The semantic filter can only compare two revisions."""
+        return bool(self.base_path and self.head_path)
+
+def content_from_added_patch(patch: str) -> str | None:
+    """
+    Rebuilds a new file's content from its patch (a single "@@ -0,0 +1,N @@" hunk
+    of added lines). Returns None if the patch isn't the complete file.
+    """
+    lines = patch.splitlines()
+    header = ADDED_FILE_HEADER_RE.match(lines[0]) if lines else None
+    if not header:
+        return None
+    expected = int(header.group(1)) if header.group(1) is not None else 1
+    content = [line[1:] for line in lines[1:] if line.startswith('+')]
+    if len(content) != expected or any(line[:1] not in ('+', '\\') for line in lines[1:]):
+        return None
+    return "\n".join(content) + ("" if lines[-1].startswith('\\') else "\n")
+
+def plan_content_fetches(file_diff: dict, has_base: bool, needs_head: bool) -> FetchPlan:
+    """
+    Decides from the /files metadata (status, previous_filename, additions,
+    deletions, changes) which contents to fetch for a file:
+
+    - removed: skipped, there is nothing left in the head to comment on
+    - renamed/copied without changes: skipped
+    - added: no base fetch; the head comes from the patch itself
+    - renamed/copied: the base is read under previous_filename
+    - otherwise both revisions, for the semantic filter
+
+    needs_head says whether head content is wanted beyond the semantic filter
+    (context prefetch or symbol chunking).
+    """
+    filename = file_diff["filename"]
+    status = file_diff.get("status") or "modified"
+    changes = file_diff.get("changes")
+    if changes is None:
+        changes = (file_diff.get("additions") or 0) + (file_diff.get("deletions") or 0)
+
+    if status == "removed":
+        return FetchPlan(skip="file removed")
+    if status in ("renamed", "copied", "changed", "unchanged") and not changes:
+        return FetchPlan(skip=f"{status} without content changes")
+
+    if status == "added":
+        head_content = content_from_added_patch(file_diff.get("patch") or "")
+        if head_content is not None or not needs_head:
+            return FetchPlan(head_content=head_content)
+        return FetchPlan(head_path=filename)
+
+    base_path = None
+    if has_base:
+        base_path = file_diff.get("previous_filename") if status in ("renamed", "copied") else filename
+    head_path = filename if base_path or needs_head else None
+    return FetchPlan(base_path=base_path, head_path=head_path)
@@ -1,26 +1,31 @@
+import json
 import requests
 from typing import List, Dict
 from fastapi import HTTPException
 from src.config import settings
-from src.services.llm.base import LLMClient
+from src.services.llm.base import LLMClient, BatchResult
 
 class AnthropicLLM(LLMClient):
+    provider = "anthropic"
+    supports_batch = True
+
     def __init__(self):
         self.api_key = settings.anthropic_api_key
         # Using the generic 'model_name' from settings which defaults to Claude
         self.model = settings.model_name 
         self.api_url = settings.anthropic_base_url
 
-    def generate_response(self, messages: List[Dict[str, str]]) -> str:
+    def _headers(self) -> dict:
         if not self.api_key:
             raise HTTPException(status_code=500, detail="Anthropic API key not configured")
 
-        headers = {
+        return {
             "x-api-key": self.api_key,
             "anthropic-version": "2023-06-01",
             "content-type": "application/json"
         }
 
+    def _payload(self, messages: List[Dict[str, str]]) -> dict:
         # Extract system prompt if present, as Anthropic handles it separately
         system_prompt = None
         filtered_messages = []
@@ -39,6 +44,18 @@ class AnthropicLLM(LLMClient):
         
         if system_prompt:
             data["system"] = system_prompt
+        return data
+
+    def _batches_url(self) -> str:
+        """Message Batches endpoint derived from the configured messages URL."""
+        url = self.api_url.rstrip("/")
+        if url.endswith("/v1/messages"):
+            return f"{url}/batches"
+        return f"{url}/v1/messages/batches"
+
+    def generate_response(self, messages: List[Dict[str, str]]) -> str:
+        headers = self._headers()
+        data = self._payload(messages)
 
         try:
             response = requests.post(self.api_url, headers=headers, json=data, timeout=60)
@@ -49,7 +66,54 @@ class AnthropicLLM(LLMClient):
                 )
             
             result = response.json()
+            usage = result.get("usage") or {}
+            self.record_usage(usage.get("input_tokens"), usage.get("output_tokens"))
             return result["content"][0]["text"]
             
         except requests.exceptions.RequestException as e:
             raise HTTPException(status_code=500, detail=f"Failed to connect to Anthropic: {str(e)}")
+
+    def submit_batch(self, batch_requests: List[tuple[str, List[Dict[str, str]]]]) -> str:
+        data = {
+            "requests": [
+                {"custom_id": custom_id, "params": self._payload(messages)}
+                for custom_id, messages in batch_requests
+            ]
+        }
+        try:
+            response = requests.post(self._batches_url(), headers=self._headers(), json=data, timeout=120)
+            if response.status_code != 200:
+                raise HTTPException(status_code=response.status_code, detail=f"Anthropic batch error: {response.text}")
+            return response.json()["id"]
+        except requests.exceptions.RequestException as e:
+            raise HTTPException(status_code=500, detail=f"Failed to connect to Anthropic: {str(e)}")
+
+    def get_batch_results(self, batch_id: str) -> Dict[str, BatchResult] | None:
+        try:
+            response = requests.get(f"{self._batches_url()}/{batch_id}", headers=self._headers(), timeout=60)
+            if response.status_code != 200:
+                raise HTTPException(status_code=response.status_code, detail=f"Anthropic batch error: {response.text}")
+
+            batch = response.json()
+            if batch.get("processing_status") != "ended":
+                return None
+
+            results = {}
+            results_url = batch.get("results_url")
+            if results_url:
+                output = requests.get(results_url, headers=self._headers(), timeout=120)
+                if output.status_code != 200:
+                    raise HTTPException(status_code=output.status_code, detail=f"Anthropic batch results error: {output.text}")
+                for line in output.text.splitlines():
+                    if not line.strip():
+                        continue
+                    item = json.loads(line)
+                    result = item.get("result") or {}
+                    if result.get("type") == "succeeded":
+                        usage = result["message"].get("usage") or {}
+                        results[item["custom_id"]] = BatchResult(
+                            result["message"]["content"][0]["text"], usage.get("input_tokens"), usage.get("output_tokens")
+                        )
+            return results
+        except requests.exceptions.RequestException as e:
+            raise HTTPException(status_code=500, detail=f"Failed to connect to Anthropic: {str(e)}")
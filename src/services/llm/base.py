@@ -1,7 +1,36 @@
+import copy
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import List, Dict, NamedTuple
+from src.config import settings
+from src.utils.metrics import llm_tokens, llm_cost
+
+# Usage of the last interactive response on each thread: an agent's calls run on one worker
+# thread, and pools or endpoint copies all record through the client that answered
+_last_usage = threading.local()
+
+def take_last_usage() -> tuple[int, int] | None:
+    """
+    Returns (input_tokens, output_tokens) reported by the last response on this thread
+    and clears it. None if the provider sent no usage fields.
+    """
+    usage = getattr(_last_usage, "value", None)
+    _last_usage.value = None
+    return usage
+
+class BatchResult(NamedTuple):
+    """One request's answer from a finished batch, with the usage fields the provider reported."""
+    text: str
+    input_tokens: int | None = None
+    output_tokens: int | None = None
 
 class LLMClient(ABC):
+    provider = "unknown"
+    supports_health_check = False
+    supports_batch = False
+    # Price of this client's tokens; None charges the deep-review rate (LLM_COST_PER_1K_TOKENS)
+    cost_per_1k_tokens: float | None = None
+
     @abstractmethod
     def generate_response(self, messages: List[Dict[str, str]]) -> str:
         """
@@ -9,3 +38,59 @@ class LLMClient(ABC):
         Messages should be in the format: [{"role": "user/system", "content": "..."}]
         """
         pass
+
+    def with_endpoint(self, url: str, api_key: str = None) -> "LLMClient":
+        """
+        Returns a copy of this client pointed at another endpoint (and optionally API key).
+        """
+        client = copy.copy(self)
+        client.api_url = url
+        if api_key:
+            client.api_key = api_key
+        return client
+
+    def with_model(self, model: str) -> "LLMClient":
+        """
+        Returns a copy of this client that sends requests to another model.
+        """
+        client = copy.copy(self)
+        client.model = model
+        return client
+
+    def health_check(self) -> bool:
+        """
+        Lightweight liveness probe for the endpoint. Clients without a cheap probe
+        (supports_health_check = False) report healthy and rely on passive error tracking.
+        """
+        return True
+
+    def submit_batch(self, batch_requests: List[tuple[str, List[Dict[str, str]]]]) -> str:
+        """
+        Submit (custom_id, messages) pairs to the provider's discounted batch API.
+        Returns the provider batch ID.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support batch requests")
+
+    def get_batch_results(self, batch_id: str) -> Dict[str, BatchResult] | None:
+        """
+        Returns {custom_id: BatchResult} once the batch has finished (requests that
+        failed are left out), or None while it is still running. Usage is not recorded
+        here, since a resumed batch is fetched again; callers record each result once.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support batch requests")
+
+    def record_usage(self, input_tokens: int, output_tokens: int, batch: bool = False):
+        """
+        Adds a response's usage fields to the token and cost counters for this provider/model,
+        charged at the client's own rate. Batch API results get the discounted batch rate.
+        """
+        if not batch:
+            reported = input_tokens is not None or output_tokens is not None
+            _last_usage.value = (input_tokens or 0, output_tokens or 0) if reported else None
+        model = getattr(self, "model", None) or ""
+        llm_tokens.inc(input_tokens or 0, provider=self.provider, model=model, type="input")
+        llm_tokens.inc(output_tokens or 0, provider=self.provider, model=model, type="output")
+        rate = settings.llm_cost_per_1k_tokens if self.cost_per_1k_tokens is None else self.cost_per_1k_tokens
+        if batch:
+            rate *= 1 - settings.batch_cost_discount
+        llm_cost.inc(((input_tokens or 0) + (output_tokens or 0)) / 1000 * rate, provider=self.provider, model=model)
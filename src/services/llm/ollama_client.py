@@ -1,3 +1,4 @@
+import copy
 import requests
 from typing import List, Dict
 from fastapi import HTTPException
@@ -5,6 +6,9 @@ from src.config import settings
 from src.services.llm.base import LLMClient
 
 class OllamaLLM(LLMClient):
+    provider = "ollama"
+    supports_health_check = True
+
     def __init__(self):
         self.base_url = settings.ollama_base_url
         self.model = settings.ollama_model
@@ -26,10 +30,24 @@ class OllamaLLM(LLMClient):
                 raise HTTPException(status_code=response.status_code, detail=f"Ollama API Error: {response.text}")
             
             # Response format for chat is {"message": {"role": "assistant", "content": "..."}}
-            return response.json().get("message", {}).get("content", "")
+            result = response.json()
+            self.record_usage(result.get("prompt_eval_count"), result.get("eval_count"))
+            return result.get("message", {}).get("content", "")
         except requests.exceptions.RequestException as e:
             raise HTTPException(status_code=500, detail=f"Failed to connect to Ollama: {str(e)}")
 
+    def with_endpoint(self, url: str, api_key: str = None) -> "OllamaLLM":
+        client = copy.copy(self)
+        client.base_url = url.rstrip("/")
+        return client
+
+    def health_check(self) -> bool:
+        """Ollama lists local models at /api/tags; cheap enough to poll."""
+        try:
+            return requests.get(f"{self.base_url}/api/tags", timeout=5).status_code == 200
+        except requests.exceptions.RequestException:
+            return False
+
 if __name__ == "__main__":
     ollama = OllamaLLM()
     print(ollama.generate_response([{"role": "user", "content": "Hello, how are you?"}]))
\ No newline at end of file
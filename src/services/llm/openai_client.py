@@ -1,30 +1,43 @@
+import json
 import requests
 from typing import List, Dict
 from fastapi import HTTPException
 from src.config import settings
-from src.services.llm.base import LLMClient
+from src.services.llm.base import LLMClient, BatchResult
+
+# Batch jobs still queued or running on OpenAI's side
+BATCH_PENDING_STATUSES = ("validating", "in_progress", "finalizing", "cancelling")
 
 class OpenAILLM(LLMClient):
+    provider = "openai"
+    supports_batch = True
+
     def __init__(self):
         self.api_key = settings.openai_api_key
         self.model = settings.openai_model
         self.api_url = settings.openai_base_url
 
-    def generate_response(self, messages: List[Dict[str, str]]) -> str:
+    def _headers(self) -> dict:
         if not self.api_key:
             raise HTTPException(status_code=500, detail="OpenAI API key not configured")
+        return {"Authorization": f"Bearer {self.api_key}"}
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        data = {
+    def _payload(self, messages: List[Dict[str, str]]) -> dict:
+        return {
             "model": self.model,
             "messages": messages,
             "temperature": 0.7
         }
 
+    def _api_root(self) -> str:
+        """API root (e.g. https://api.openai.com/v1) derived from the chat completions URL."""
+        return self.api_url.rstrip("/").removesuffix("/chat/completions")
+
+    def generate_response(self, messages: List[Dict[str, str]]) -> str:
+        headers = self._headers()
+        headers["Content-Type"] = "application/json"
+        data = self._payload(messages)
+
         try:
             response = requests.post(self.api_url, headers=headers, json=data, timeout=60)
             if response.status_code != 200:
@@ -34,7 +47,76 @@ class OpenAILLM(LLMClient):
                 )
             
             result = response.json()
+            usage = result.get("usage") or {}
+            self.record_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"))
             return result["choices"][0]["message"]["content"]
             
         except requests.exceptions.RequestException as e:
             raise HTTPException(status_code=500, detail=f"Failed to connect to OpenAI: {str(e)}")
+
+    def submit_batch(self, batch_requests: List[tuple[str, List[Dict[str, str]]]]) -> str:
+        """Uploads a JSONL input file and creates a /v1/chat/completions batch."""
+        lines = [
+            json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._payload(messages)
+            })
+            for custom_id, messages in batch_requests
+        ]
+        root = self._api_root()
+        try:
+            upload = requests.post(
+                f"{root}/files",
+                headers=self._headers(),
+                data={"purpose": "batch"},
+                files={"file": ("batch.jsonl", "\n".join(lines).encode("utf-8"), "application/jsonl")},
+                timeout=120
+            )
+            if upload.status_code != 200:
+                raise HTTPException(status_code=upload.status_code, detail=f"OpenAI file upload error: {upload.text}")
+
+            batch = requests.post(
+                f"{root}/batches",
+                headers=self._headers(),
+                json={"input_file_id": upload.json()["id"], "endpoint": "/v1/chat/completions", "completion_window": "24h"},
+                timeout=60
+            )
+            if batch.status_code != 200:
+                raise HTTPException(status_code=batch.status_code, detail=f"OpenAI batch error: {batch.text}")
+            return batch.json()["id"]
+        except requests.exceptions.RequestException as e:
+            raise HTTPException(status_code=500, detail=f"Failed to connect to OpenAI: {str(e)}")
+
+    def get_batch_results(self, batch_id: str) -> Dict[str, BatchResult] | None:
+        root = self._api_root()
+        try:
+            response = requests.get(f"{root}/batches/{batch_id}", headers=self._headers(), timeout=60)
+            if response.status_code != 200:
+                raise HTTPException(status_code=response.status_code, detail=f"OpenAI batch error: {response.text}")
+
+            batch = response.json()
+            if batch.get("status") in BATCH_PENDING_STATUSES:
+                return None
+
+            # Expired/cancelled batches may still carry partial output
+            results = {}
+            output_file_id = batch.get("output_file_id")
+            if output_file_id:
+                output = requests.get(f"{root}/files/{output_file_id}/content", headers=self._headers(), timeout=120)
+                if output.status_code != 200:
+                    raise HTTPException(status_code=output.status_code, detail=f"OpenAI batch output error: {output.text}")
+                for line in output.text.splitlines():
+                    if not line.strip():
+                        continue
+                    item = json.loads(line)
+                    response_data = item.get("response") or {}
+                    if response_data.get("status_code") == 200:
+                        usage = response_data["body"].get("usage") or {}
+                        results[item["custom_id"]] = BatchResult(
+                            response_data["body"]["choices"][0]["message"]["content"], usage.get("prompt_tokens"), usage.get("completion_tokens")
+                        )
+            return results
+        except requests.exceptions.RequestException as e:
+            raise HTTPException(status_code=500, detail=f"Failed to connect to OpenAI: {str(e)}")
@@ -0,0 +1,269 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import List, Dict
+from fastapi import HTTPException
+from src.config import settings
+from src.services.llm.base import LLMClient
+from src.utils.histogram import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Client errors caused by the request itself; retrying on another endpoint won't help
+NON_RETRYABLE_STATUS = {400, 404, 413, 422}
+
+class PoolEndpoint:
+    """One LLM endpoint (host or API key) with its own load, error and latency tracking."""
+    def __init__(self, name: str, client: LLMClient):
+        self.name = name
+        self.client = client
+        self.outstanding = 0
+        self.recent = deque(maxlen=settings.llm_pool_error_window)  # (ok, seconds)
+        self.latency = LatencyHistogram()
+        self.ejected_until = 0.0
+        self._clients_by_model = {}
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.ejected_until
+
+    @property
+    def error_rate(self) -> float:
+        if not self.recent:
+            return 0.0
+        return sum(1 for ok, _ in self.recent if not ok) / len(self.recent)
+
+    @property
+    def avg_latency(self) -> float:
+        timings = [seconds for ok, seconds in self.recent if ok]
+        return sum(timings) / len(timings) if timings else 0.0
+
+    def client_for(self, model: str = None) -> LLMClient:
+        if not model or model == getattr(self.client, "model", None):
+            return self.client
+        if model not in self._clients_by_model:
+            self._clients_by_model[model] = self.client.with_model(model)
+        return self._clients_by_model[model]
+
+    def eject(self, reason: str):
+        self.ejected_until = time.monotonic() + settings.llm_pool_eject_seconds
+        self.recent.clear()
+        logger.warning(f"LLM pool: ejecting {self.name} for {settings.llm_pool_eject_seconds}s ({reason})")
+
+    def snapshot(self) -> dict:
+        return {
+            "name": self.name,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "error_rate": round(self.error_rate, 3),
+            "latency": self.latency.snapshot()
+        }
+
+class LLMClientPool(LLMClient):
+    """
+    Spreads requests over several endpoints/API keys of one provider.
+    Routing is least-outstanding-requests among healthy endpoints below their
+    in-flight cap (calls wait for a free slot when all are at it); endpoints whose
+    recent error rate or latency climbs too high are ejected for a while, a
+    background probe re-admits them, and failed calls fail over to the next endpoint.
+    """
+    def __init__(self, endpoints: List[PoolEndpoint], model: str = None):
+        if not endpoints:
+            raise ValueError("LLMClientPool requires at least one endpoint")
+        self.endpoints = endpoints
+        self.model = model or getattr(endpoints[0].client, "model", None)
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+        self._probe_thread = None
+        self._views = {}
+
+    def with_model(self, model: str) -> LLMClient:
+        """
+        A view of this pool for another model (per-path overrides): it shares the
+        endpoints, their load and error tracking, and the single health probe.
+        """
+        if not model or model == self.model:
+            return self
+        with self._lock:
+            if model not in self._views:
+                self._views[model] = PoolModelView(self, model)
+            return self._views[model]
+
+    def generate_response(self, messages: List[Dict[str, str]]) -> str:
+        return self._generate(messages, self.model)
+
+    def _generate(self, messages: List[Dict[str, str]], model: str) -> str:
+        self._ensure_probe()
+        tried = set()
+        last_error = None
+
+        while len(tried) < len(self.endpoints):
+            endpoint = self._acquire(tried)
+            tried.add(endpoint.name)
+            start = time.monotonic()
+            try:
+                response = endpoint.client_for(model).generate_response(messages)
+            except HTTPException as e:
+                self._release(endpoint, ok=False, seconds=time.monotonic() - start)
+                if e.status_code in NON_RETRYABLE_STATUS:
+                    raise
+                last_error = e
+                logger.warning(f"LLM pool: {endpoint.name} failed ({e.status_code}), failing over")
+                continue
+            except Exception as e:
+                self._release(endpoint, ok=False, seconds=time.monotonic() - start)
+                last_error = e
+                logger.warning(f"LLM pool: {endpoint.name} failed ({e}), failing over")
+                continue
+
+            self._release(endpoint, ok=True, seconds=time.monotonic() - start)
+            return response
+
+        raise HTTPException(status_code=503, detail=f"All LLM endpoints failed: {last_error}")
+
+    @property
+    def supports_batch(self) -> bool:
+        return self.endpoints[0].client.supports_batch
+
+    def submit_batch(self, batch_requests) -> str:
+        # Batch IDs are bound to the account that created them, so batches always use the first endpoint
+        return self.endpoints[0].client_for(self.model).submit_batch(batch_requests)
+
+    def get_batch_results(self, batch_id: str):
+        return self.endpoints[0].client_for(self.model).get_batch_results(batch_id)
+
+    def record_usage(self, input_tokens: int, output_tokens: int, batch: bool = False):
+        self.endpoints[0].client_for(self.model).record_usage(input_tokens, output_tokens, batch)
+
+    def _acquire(self, exclude: set) -> PoolEndpoint:
+        """
+        Takes a slot on the best endpoint not yet tried. Endpoints at
+        LLM_POOL_MAX_INFLIGHT_PER_ENDPOINT are skipped; when all are, waits up to
+        LLM_POOL_ACQUIRE_TIMEOUT for one to free up.
+        """
+        limit = settings.llm_pool_max_inflight_per_endpoint
+        deadline = time.monotonic() + settings.llm_pool_acquire_timeout
+        with self._lock:
+            while True:
+                candidates = [e for e in self.endpoints if e.name not in exclude]
+                healthy = [e for e in candidates if e.healthy]
+                # If everything is ejected, still try the remaining endpoints rather than fail outright
+                available = [e for e in healthy or candidates if limit <= 0 or e.outstanding < limit]
+                if available:
+                    endpoint = min(available, key=lambda e: (e.outstanding, e.avg_latency))
+                    endpoint.outstanding += 1
+                    return endpoint
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise HTTPException(status_code=503, detail=f"All LLM endpoints are at their in-flight limit ({limit})")
+                self._slot_freed.wait(remaining)
+
+    def _release(self, endpoint: PoolEndpoint, ok: bool, seconds: float):
+        with self._lock:
+            endpoint.outstanding -= 1
+            # Waiters exclude different endpoints, so only they can tell whether this slot suits them
+            self._slot_freed.notify_all()
+            endpoint.recent.append((ok, seconds))
+            if ok:
+                endpoint.latency.observe(seconds)
+
+            if len(endpoint.recent) >= settings.llm_pool_min_requests and endpoint.healthy:
+                if endpoint.error_rate > settings.llm_pool_max_error_rate:
+                    endpoint.eject(f"error rate {endpoint.error_rate:.0%}")
+                elif settings.llm_pool_max_latency and endpoint.avg_latency > settings.llm_pool_max_latency:
+                    endpoint.eject(f"avg latency {endpoint.avg_latency:.1f}s")
+
+    def _ensure_probe(self):
+        if self._probe_thread is None and settings.llm_pool_health_interval > 0:
+            with self._lock:
+                if self._probe_thread is None:
+                    self._probe_thread = threading.Thread(target=self._probe_loop, name="llm-pool-probe", daemon=True)
+                    self._probe_thread.start()
+
+    def _probe_loop(self):
+        while True:
+            time.sleep(settings.llm_pool_health_interval)
+            for endpoint in self.endpoints:
+                # Endpoints without a real probe are re-admitted when their ejection expires
+                if not endpoint.client.supports_health_check:
+                    continue
+                try:
+                    ok = endpoint.client.health_check()
+                except Exception:
+                    ok = False
+                with self._lock:
+                    if not ok and endpoint.healthy:
+                        endpoint.eject("health probe failed")
+                    elif ok and not endpoint.healthy:
+                        endpoint.ejected_until = 0.0
+                        self._slot_freed.notify_all()
+                        logger.info(f"LLM pool: {endpoint.name} passed health probe, re-admitted")
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            return [e.snapshot() for e in self.endpoints]
+
+class PoolModelView(LLMClient):
+    """Sends requests for one model through a shared LLMClientPool (see LLMClientPool.with_model)."""
+    def __init__(self, pool: LLMClientPool, model: str):
+        self.pool = pool
+        self.model = model
+
+    @property
+    def supports_batch(self) -> bool:
+        return self.pool.supports_batch
+
+    def with_model(self, model: str) -> LLMClient:
+        return self.pool.with_model(model)
+
+    def generate_response(self, messages: List[Dict[str, str]]) -> str:
+        return self.pool._generate(messages, self.model)
+
+    def submit_batch(self, batch_requests) -> str:
+        return self.pool.endpoints[0].client_for(self.model).submit_batch(batch_requests)
+
+    def get_batch_results(self, batch_id: str):
+        return self.pool.endpoints[0].client_for(self.model).get_batch_results(batch_id)
+
+    def record_usage(self, input_tokens: int, output_tokens: int, batch: bool = False):
+        self.pool.endpoints[0].client_for(self.model).record_usage(input_tokens, output_tokens, batch)
+
+def parse_endpoints(value: str) -> list[tuple[str, str | None]]:
+    """Parses 'url[|api_key],url[|api_key]' into (url, api_key) pairs."""
+    endpoints = []
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        url, _, api_key = entry.partition("|")
+        endpoints.append((url.strip(), api_key.strip() or None))
+    return endpoints
+
+def pool_capacity(endpoint_count: int) -> int:
+    """Concurrent requests a pool of endpoint_count endpoints can take."""
+    return endpoint_count * settings.llm_pool_max_inflight_per_endpoint
+
+# Pools are process-wide so probes and load tracking survive across reviews
+_POOLS: dict[tuple, LLMClientPool] = {}
+_pools_lock = threading.Lock()
+
+def get_llm_pool(provider: str, base_client: LLMClient, endpoints: str) -> LLMClientPool:
+    """Returns the shared pool for a provider/endpoint list, creating it on first use."""
+    # Tiers priced differently (deep review, screening) keep their own pools even on the same endpoints
+    key = (provider, getattr(base_client, "model", None), endpoints, base_client.cost_per_1k_tokens)
+    with _pools_lock:
+        if key not in _POOLS:
+            members = []
+            for i, (url, api_key) in enumerate(parse_endpoints(endpoints)):
+                client = base_client.with_endpoint(url, api_key)
+                # Keys must never end up in logs, so endpoints are named by URL and position
+                members.append(PoolEndpoint(f"{provider}[{i}]@{url}", client))
+            _POOLS[key] = LLMClientPool(members)
+        return _POOLS[key]
+
+def pool_snapshots() -> list[tuple[str, str, list[dict]]]:
+    """(provider, model, endpoint snapshots) for every pool created so far."""
+    with _pools_lock:
+        pools = list(_POOLS.items())
+    return [(provider, model or "", pool.snapshot()) for (provider, model, *_), pool in pools]
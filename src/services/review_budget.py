@@ -0,0 +1,89 @@
+import logging
+import threading
+from src.config import settings
+from src.brain.agents.base_agent import agent_stats
+
+logger = logging.getLogger(__name__)
+
+# Expected size of a final answer, added to the prompt size when reserving budget for a chunk
+EXPECTED_OUTPUT_TOKENS = 400
+# Agent turns assumed per chunk until this process has reviewed some
+DEFAULT_EXPECTED_TURNS = 2
+MAX_SUMMARY_ENTRIES = 50
+
+def expected_turns() -> float:
+    """
+    Average LLM turns per chunk the agent has reviewed so far (at least 1). Every
+    tool-using turn resends the prompt, so a chunk's reservation is scaled by it.
+    """
+    groups = agent_stats.snapshot().values()
+    chunks = sum(group["chunks"] for group in groups)
+    if not chunks:
+        return DEFAULT_EXPECTED_TURNS
+    return max(1.0, sum(group["llm_calls"] for group in groups) / chunks)
+
+class ReviewBudget:
+    """
+    Per-PR LLM budget. Chunks reserve their estimated size (prompt and answer times
+    the expected agent turns) one at a time in risk order before any of them run, and
+    settle with the tokens the agent actually used; chunks that don't fit are skipped.
+    A limit of 0 means unlimited.
+    """
+    def __init__(self, max_tokens: int = 0, max_cost: float = 0.0, cost_per_1k_tokens: float = 0.0):
+        self.cost_per_1k_tokens = cost_per_1k_tokens
+        limits = [max_tokens] if max_tokens else []
+        if max_cost and cost_per_1k_tokens:
+            limits.append(int(max_cost / cost_per_1k_tokens * 1000))
+        self.max_tokens = min(limits) if limits else 0
+        self.used_tokens = 0
+        self.reserved_tokens = 0
+        self.reviewed = []
+        self.skipped = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "ReviewBudget":
+        return cls(
+            max_tokens=settings.review_token_budget,
+            max_cost=settings.review_cost_budget,
+            cost_per_1k_tokens=settings.llm_cost_per_1k_tokens
+        )
+
+    @property
+    def cost(self) -> float:
+        return self.used_tokens / 1000 * self.cost_per_1k_tokens
+
+    def try_reserve(self, chunk: dict, estimate: int) -> bool:
+        """Reserves budget for a chunk; records it as skipped if the estimate doesn't fit."""
+        with self._lock:
+            if self.max_tokens and self.used_tokens + self.reserved_tokens + estimate > self.max_tokens:
+                self.skipped.append(chunk)
+                return False
+            self.reserved_tokens += estimate
+            self.reviewed.append(chunk)
+            return True
+
+    def settle(self, estimate: int, actual: int):
+        """Replaces a reservation with the tokens actually used."""
+        with self._lock:
+            self.reserved_tokens -= estimate
+            self.used_tokens += actual
+
+    def summary_comment(self) -> str | None:
+        """Markdown listing the chunks skipped for budget, or None if nothing was skipped."""
+        if not self.skipped:
+            return None
+
+        lines = [
+            "### PR Pilot: review budget reached",
+            f"Reviewed {len(self.reviewed)} of {len(self.reviewed) + len(self.skipped)} chunks "
+            f"(~{self.used_tokens} tokens, budget {self.max_tokens}), highest risk first. "
+            "These lower-risk changes were not reviewed:",
+            ""
+        ]
+        for chunk in self.skipped[:MAX_SUMMARY_ENTRIES]:
+            risk = chunk.get("risk", {}).get("score", "n/a")
+            lines.append(f"- `{chunk['filename']}` lines {chunk['start_line']}-{chunk['end_line']} (risk {risk})")
+        if len(self.skipped) > MAX_SUMMARY_ENTRIES:
+            lines.append(f"- ... and {len(self.skipped) - MAX_SUMMARY_ENTRIES} more")
+        return "\n".join(lines)
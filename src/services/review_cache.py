@@ -0,0 +1,103 @@
+import hashlib
+import logging
+import re
+import threading
+from src.config import settings
+from src.code_parser.language import language_registry
+from src.brain.prompts.prompt_registory import PROMPT_REGISTRY
+from src.utils.cache_backends import get_cache
+
+logger = logging.getLogger(__name__)
+
+HUNK_HEADER_RE = re.compile(r'^@@ -\d+(?:,\d+)? \+\d+(?:,\d+)? @@ ?')
+NUMBERED_LINE_RE = re.compile(r'^(\d+): ')
+
+def normalize_hunk(content: str) -> tuple[str, str]:
+    """
+    Strips line numbers from a numbered chunk (see HunkProcessor.chunk_patch).
+    A chunk can hold several hunks (SymbolChunker), so each hunk marker keeps its
+    offset from the chunk's first line: the same hunks further apart aren't a match.
+    Returns (normalized body, enclosing-symbol signature from the first hunk header).
+    """
+    signature = ""
+    lines = []
+    first_line = None
+    hunk_marker = None  # index of the marker waiting for its hunk's first line number
+    for line in content.splitlines():
+        if line.startswith("@@"):
+            header = HUNK_HEADER_RE.match(line)
+            if header:
+                # git puts the enclosing function/class line after the second @@
+                signature = signature or line[header.end():].strip()
+            hunk_marker = len(lines)
+            lines.append("@@")
+            continue
+        numbered = NUMBERED_LINE_RE.match(line)
+        if numbered:
+            line_no = int(numbered.group(1))
+            first_line = line_no if first_line is None else first_line
+            if hunk_marker is not None:
+                lines[hunk_marker] = f"@@ +{line_no - first_line}"
+                hunk_marker = None
+            line = line[numbered.end():]
+        lines.append(line)
+    return "\n".join(lines), signature
+
+def hunk_fingerprint(chunk: dict) -> str:
+    """Position-independent key: normalized diff + language + enclosing symbol."""
+    body, signature = normalize_hunk(chunk["content"])
+    language = language_registry.language_for_path(chunk["filename"]) or ""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (language, signature, body):
+        digest.update(part.encode("utf-8", "replace"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+class ReviewResultCache:
+    """
+    Per-repository cache of raw review comments keyed by hunk fingerprint, so
+    identical changes (backports, cherry-picks) reuse one LLM review across PRs and
+    branches. Comments can quote the repo's code (the agent reads files through
+    tools), so results are never shared between repositories.
+    Comment lines are stored relative to the chunk start and remapped on reuse.
+    """
+    def __init__(self):
+        # Shared across workers with CACHE_BACKEND=sqlite/redis
+        self._store = get_cache("review_results", settings.review_cache_max_entries, settings.review_cache_ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _namespace(model: str, prompt_name: str = None) -> str:
+        """
+        Results are only valid for the prompt text and model that produced them:
+        changing either moves lookups to a fresh namespace, old entries age out.
+        """
+        prompt = PROMPT_REGISTRY.get(prompt_name or settings.system_prompt_name, "")
+        return hashlib.blake2b(f"{model}\0{prompt}".encode(), digest_size=8).hexdigest()
+
+    def _key(self, repo_id: str, chunk: dict, model: str) -> str:
+        return f"{repo_id}:{self._namespace(model)}:{hunk_fingerprint(chunk)}"
+
+    def get(self, repo_id: str, chunk: dict, model: str) -> list | None:
+        """Returns cached comments remapped onto this chunk's lines, or None."""
+        entry = self._store.get(self._key(repo_id, chunk, model))
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        start = chunk["start_line"]
+        return [{**c, "line": start + c["line"]} for c in entry]
+
+    def set(self, repo_id: str, chunk: dict, model: str, comments: list):
+        start = chunk["start_line"]
+        relative = [{**c, "line": int(c["line"]) - start} for c in comments]
+        self._store.set(self._key(repo_id, chunk, model), relative)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+review_cache = ReviewResultCache()
@@ -0,0 +1,88 @@
+import json
+import logging
+import threading
+from collections import OrderedDict
+from fastapi import HTTPException
+from pydantic import ValidationError
+from src.config import settings
+from src.models.review_config_model import RepoReviewConfig
+from src.utils.filter_utils import PathMatcher, compile_globs, settings_ignore_patterns
+from src.utils.generated_detector import GeneratedFileDetector, parse_gitattributes
+
+logger = logging.getLogger(__name__)
+
+class ReviewConfig:
+    """
+    Compiled form of a repository's review rules merged with the global settings.
+    """
+    def __init__(self, repo_config: RepoReviewConfig = None, gitattributes: str = None):
+        self.repo_config = repo_config or RepoReviewConfig()
+        self.generated_detector = GeneratedFileDetector(parse_gitattributes(gitattributes or ""))
+        self.matcher = PathMatcher(self.repo_config.ignore, case_insensitive_patterns=settings_ignore_patterns())
+        self.max_file_size = self.repo_config.max_file_size or settings.max_file_fetch_bytes
+        self._overrides = [(compile_globs([o.path]), o) for o in self.repo_config.overrides]
+
+    def should_review(self, file_path: str) -> bool:
+        return not self.matcher.is_ignored(file_path)
+
+    def rules_for(self, file_path: str) -> dict:
+        """
+        Per-path settings ('model', 'chunk_size', 'chunking', 'risk_weight'). Later overrides win, like gitignore.
+        """
+        rules = {"model": None, "chunk_size": settings.review_max_lines, "chunking": settings.review_chunking, "risk_weight": None}
+        for regex, override in self._overrides:
+            if regex and regex.fullmatch(file_path):
+                rules.update(override.model_dump(exclude={"path"}, exclude_none=True))
+        return rules
+
+# Compiled configs keyed by (repo_id, sha)
+_CONFIG_CACHE: OrderedDict[tuple[str, str], ReviewConfig] = OrderedDict()
+_CONFIG_CACHE_SIZE = 256
+_cache_lock = threading.Lock()
+
+def load_review_config(scm, repo_id: str, ref: str | None) -> ReviewConfig:
+    """
+    Fetches and compiles the repository's review config (and .gitattributes) at the given ref.
+    Results are cached per (repo, SHA); a missing or invalid file yields the global defaults.
+    Without a SHA (e.g. a root commit has no base) the default branch is read, which can
+    change at any time, so that result isn't cached. Neither is a config built after a
+    failed fetch (5xx, 403, rate limit): the next review retries instead of losing the
+    repo's rules for every PR on that base.
+    """
+    key = (repo_id, ref)
+    with _cache_lock:
+        if ref and key in _CONFIG_CACHE:
+            _CONFIG_CACHE.move_to_end(key)
+            return _CONFIG_CACHE[key]
+
+    repo_config = None
+    complete = True  # every file was read or is known to be missing
+    try:
+        # Most repositories have no config file: a 404 is the normal case, not an error
+        raw = scm.get_file_content(repo_id, settings.repo_config_path, ref=ref, missing_ok=True)
+        if raw is not None:
+            repo_config = RepoReviewConfig(**json.loads(raw))
+            logger.info(f"Loaded review config for {repo_id}@{ref}")
+    except HTTPException as e:
+        if e.status_code != 404:
+            complete = False
+            logger.warning(f"Failed to fetch review config for {repo_id}@{ref}: {e.detail}")
+    except (ValueError, TypeError, ValidationError) as e:
+        logger.warning(f"Invalid review config {settings.repo_config_path} in {repo_id}@{ref}: {e}")
+
+    gitattributes = None
+    try:
+        gitattributes = scm.get_file_content(repo_id, ".gitattributes", ref=ref, missing_ok=True)
+    except HTTPException as e:
+        if e.status_code != 404:
+            complete = False
+            logger.warning(f"Failed to fetch .gitattributes for {repo_id}@{ref}: {e.detail}")
+
+    config = ReviewConfig(repo_config, gitattributes)
+    if not ref or not complete:
+        return config
+    with _cache_lock:
+        _CONFIG_CACHE[key] = config
+        if len(_CONFIG_CACHE) > _CONFIG_CACHE_SIZE:
+            _CONFIG_CACHE.popitem(last=False)
+    return config
@@ -0,0 +1,180 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from src.config import settings
+
+# The sync watermark is set this far back, so comments written while a sync was
+# in flight (or under clock skew) are fetched again next time; upserts make that harmless
+SYNC_OVERLAP_SECONDS = 60
+
+class ReviewLedger:
+    """
+    SQLite history of each PR's reviews: comments known from GitHub (synced
+    incrementally with since=), comments the bot posted and for which chunk,
+    reviewed chunk fingerprints per head SHA, and run timings.
+    """
+    def __init__(self, path: str = None):
+        self.path = path or settings.review_ledger_path
+        self._local = threading.local()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS comments (
+                    repo_id TEXT NOT NULL,
+                    pr_id INTEGER NOT NULL,
+                    comment_id INTEGER NOT NULL,
+                    path TEXT,
+                    line INTEGER,
+                    body TEXT NOT NULL,
+                    author TEXT,
+                    updated_at TEXT,
+                    PRIMARY KEY (repo_id, pr_id, comment_id)
+                );
+                CREATE TABLE IF NOT EXISTS posted (
+                    repo_id TEXT NOT NULL,
+                    pr_id INTEGER NOT NULL,
+                    head_sha TEXT,
+                    fingerprint TEXT,
+                    path TEXT NOT NULL,
+                    line INTEGER NOT NULL,
+                    body TEXT NOT NULL,
+                    posted_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS chunks (
+                    repo_id TEXT NOT NULL,
+                    pr_id INTEGER NOT NULL,
+                    path TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    head_sha TEXT,
+                    comments INTEGER NOT NULL,
+                    reviewed_at REAL NOT NULL,
+                    PRIMARY KEY (repo_id, pr_id, path, fingerprint)
+                );
+                CREATE TABLE IF NOT EXISTS runs (
+                    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    repo_id TEXT NOT NULL,
+                    pr_id INTEGER NOT NULL,
+                    head_sha TEXT,
+                    execution_mode TEXT,
+                    started_at REAL NOT NULL,
+                    finished_at REAL,
+                    chunks INTEGER,
+                    comments INTEGER,
+                    tokens INTEGER
+                );
+                CREATE TABLE IF NOT EXISTS syncs (
+                    repo_id TEXT NOT NULL,
+                    pr_id INTEGER NOT NULL,
+                    synced_at TEXT NOT NULL,
+                    PRIMARY KEY (repo_id, pr_id)
+                );
+                CREATE INDEX IF NOT EXISTS posted_pr ON posted (repo_id, pr_id);
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread, reused; "with conn" only wraps a transaction, it doesn't close it
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def sync_watermark() -> str:
+        moment = datetime.fromtimestamp(time.time() - SYNC_OVERLAP_SECONDS, timezone.utc)
+        return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def last_synced(self, repo_id: str, pr_id: int) -> str | None:
+        """ISO timestamp of the last comment sync, for GitHub's since= parameter."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT synced_at FROM syncs WHERE repo_id = ? AND pr_id = ?", (repo_id, pr_id)).fetchone()
+        return row["synced_at"] if row else None
+
+    def record_comments(self, repo_id: str, pr_id: int, comments: list[dict], synced_at: str = None):
+        """Upserts comments fetched from GitHub and, if given, moves the sync watermark."""
+        rows = [
+            (
+                repo_id, pr_id, c["id"], c.get("path"), c.get("line") or c.get("original_line"),
+                c.get("body") or "", (c.get("user") or {}).get("login"), c.get("updated_at")
+            )
+            for c in comments if c.get("id") is not None
+        ]
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO comments VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            if synced_at:
+                conn.execute("INSERT OR REPLACE INTO syncs VALUES (?, ?, ?)", (repo_id, pr_id, synced_at))
+
+    def record_posted(self, repo_id: str, pr_id: int, head_sha: str, fingerprint: str, path: str, line: int, body: str):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO posted VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (repo_id, pr_id, head_sha, fingerprint, path, int(line), body, time.time())
+            )
+
+    def memory(self, repo_id: str, pr_id: int) -> list[dict]:
+        """
+        Review memory for a PR: every known comment plus the bot's own posts, newest
+        first, in the shape of GitHub's comment objects (repeats are left to the caller).
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT path, line, body, updated_at FROM comments WHERE repo_id = ? AND pr_id = ?
+                UNION ALL
+                SELECT path, line, body, strftime('%Y-%m-%dT%H:%M:%SZ', posted_at, 'unixepoch') FROM posted
+                WHERE repo_id = ? AND pr_id = ?
+                ORDER BY updated_at DESC
+                """,
+                (repo_id, pr_id, repo_id, pr_id)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def chunk_reviewed(self, repo_id: str, pr_id: int, path: str, fingerprint: str) -> bool:
+        """True if this hunk of path was already reviewed in the PR, at any head SHA."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM chunks WHERE repo_id = ? AND pr_id = ? AND path = ? AND fingerprint = ?",
+                (repo_id, pr_id, path, fingerprint)
+            ).fetchone()
+        return row is not None
+
+    def record_chunk(self, repo_id: str, pr_id: int, path: str, fingerprint: str, head_sha: str, comments: int):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (repo_id, pr_id, path, fingerprint, head_sha, comments, time.time())
+            )
+
+    def start_run(self, repo_id: str, pr_id: int, head_sha: str, execution_mode: str) -> int:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO runs (repo_id, pr_id, head_sha, execution_mode, started_at) VALUES (?, ?, ?, ?, ?)",
+                (repo_id, pr_id, head_sha, execution_mode, time.time())
+            )
+            return cursor.lastrowid
+
+    def finish_run(self, run_id: int, chunks: int, comments: int, tokens: int):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE runs SET finished_at = ?, chunks = ?, comments = ?, tokens = ? WHERE run_id = ?",
+                (time.time(), chunks, comments, tokens, run_id)
+            )
+
+    def runs(self, repo_id: str = None, limit: int = 100) -> list[dict]:
+        """Most recent runs with their duration, for throughput analysis."""
+        query = "SELECT *, finished_at - started_at AS duration FROM runs"
+        params = ()
+        if repo_id:
+            query += " WHERE repo_id = ?"
+            params = (repo_id,)
+        query += " ORDER BY run_id DESC LIMIT ?"
+        with self._connect() as conn:
+            rows = conn.execute(query, (*params, limit)).fetchall()
+        return [dict(row) for row in rows]
@@ -0,0 +1,101 @@
+import threading
+from src.config import settings
+from src.brain.agents.utils import estimate_tokens
+
+class MemoryStats:
+    """
+    Process-wide counters for review memory: tokens injected into chunk prompts
+    versus what injecting every comment on the file would have cost.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.chunks = 0
+        self.injected_tokens = 0
+        self.file_tokens = 0
+        self.comments_injected = 0
+        self.comments_capped = 0
+
+    def record(self, injected_tokens: int, file_tokens: int, injected: int, capped: int):
+        with self._lock:
+            self.chunks += 1
+            self.injected_tokens += injected_tokens
+            self.file_tokens += file_tokens
+            self.comments_injected += injected
+            self.comments_capped += capped
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "chunks": self.chunks,
+                "injected_tokens": self.injected_tokens,
+                "file_tokens": self.file_tokens,
+                "tokens_saved": self.file_tokens - self.injected_tokens,
+                "avg_tokens_per_chunk": round(self.injected_tokens / self.chunks, 1) if self.chunks else 0.0,
+                "comments_injected": self.comments_injected,
+                "comments_capped": self.comments_capped
+            }
+
+memory_stats = MemoryStats()
+
+def memory_by_file(existing_comments: list) -> dict:
+    """
+    Groups existing comments by file as {"line", "body", "updated_at"} entries,
+    dropping exact repeats (the ledger can hold a bot comment twice: as posted and as synced).
+    """
+    grouped = {}
+    seen = set()
+    for comment in existing_comments:
+        path = comment.get("path")
+        if not path:
+            continue
+        line = comment.get("line") or comment.get("original_line")
+        key = (path, line, comment.get("body"))
+        if key in seen:
+            continue
+        seen.add(key)
+        grouped.setdefault(path, []).append({
+            "line": int(line) if line else None,
+            "body": comment.get("body") or "",
+            "updated_at": comment.get("updated_at") or comment.get("created_at") or ""
+        })
+    return grouped
+
+def known_comments(entries: list) -> set:
+    """Normalized (line, body) pairs of a file's existing comments, for the post-generation dedupe."""
+    return {(entry["line"], entry["body"].lower().strip()) for entry in entries}
+
+def symbol_ranges(chunks: list) -> dict:
+    """Line ranges of every chunk per (filename, enclosing symbol), for symbol-scoped memory."""
+    ranges = {}
+    for chunk in chunks:
+        if chunk.get("symbol"):
+            ranges.setdefault((chunk["filename"], chunk["symbol"]), []).append((chunk["start_line"], chunk["end_line"]))
+    return ranges
+
+def select_memory(entries: list, chunk: dict, ranges: list = (), margin: int = None, max_tokens: int = None) -> tuple[str, int]:
+    """
+    Formats the comments relevant to one chunk for the system prompt: those within
+    the chunk's lines plus a margin, or on another chunk of the same enclosing
+    symbol. Most recent comments are kept first until max_tokens is reached.
+    Returns (memory text, its estimated tokens).
+    """
+    margin = settings.review_memory_line_margin if margin is None else margin
+    max_tokens = settings.review_memory_max_tokens if max_tokens is None else max_tokens
+    low, high = chunk["start_line"] - margin, chunk["end_line"] + margin
+
+    def in_scope(line):
+        return line is not None and (low <= line <= high or any(start <= line <= end for start, end in ranges))
+
+    relevant = sorted((e for e in entries if in_scope(e["line"])), key=lambda e: e["updated_at"], reverse=True)
+    selected, used = [], 0
+    for entry in relevant:
+        line = f"Line {entry['line']}: {entry['body']}"
+        tokens = estimate_tokens(line)
+        if max_tokens and used + tokens > max_tokens:
+            break
+        selected.append((entry["line"], line))
+        used += tokens
+
+    file_tokens = sum(estimate_tokens(f"Line {e['line']}: {e['body']}") for e in entries)
+    memory_stats.record(used, file_tokens, len(selected), len(relevant) - len(selected))
+    return "\n".join(line for _, line in sorted(selected, key=lambda s: s[0])) or "None", used
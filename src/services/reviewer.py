@@ -1,158 +1,552 @@
 import asyncio
 import logging
+import os
+import time
+from itertools import groupby
 from src.config import settings
 from src.services.scm.github import GitHubSCM
+from src.services.scm.base import FileTooLargeError
 from src.services.llm.openai_client import OpenAILLM
 from src.services.llm.ollama_client import OllamaLLM
 from src.services.llm.anthropic_client import AnthropicLLM
+from src.services.llm.pool import get_llm_pool
 from src.brain.prompts.prompt_registory import get_system_prompt
 from src.brain.agents.review_agent import ReviewAgent
-from src.utils.filter_utils import should_review_file
+from src.brain.agents.base_agent import agent_stats
+from src.code_parser.parser import get_enclosing_symbols
+from src.services.review_config import load_review_config
+from src.utils.generated_detector import detection_stats
+from src.utils.risk_scorer import prioritize_chunks, add_ast_complexity
+from src.services.review_budget import ReviewBudget, EXPECTED_OUTPUT_TOKENS, expected_turns
+from src.brain.agents.utils import estimate_tokens
+from src.services.cascade import ModelCascade
+from src.services.batch_store import BatchStore
+from src.services.review_cache import review_cache, hunk_fingerprint
+from src.services.review_ledger import ReviewLedger
+from src.services.review_memory import memory_by_file, symbol_ranges, select_memory, known_comments
+from src.services.scheduler import chunk_scheduler, screen_scheduler
 from src.utils.hunk_processor import HunkProcessor
+from src.utils.metrics import stage_seconds, files_filtered, chunks_total
+from src.utils.symbol_chunker import SymbolChunker
 from src.services.semantic_filter import SemanticFilter
+from src.services.fetch_planner import plan_content_fetches
 
 logger = logging.getLogger(__name__)
 
 class ReviewerService:
-    def __init__(self):
-        self.scm = GitHubSCM(settings.github_token)
+    def __init__(self, priority: str = "normal"):
+        self.scm = GitHubSCM(settings.github_token, priority=priority)
         self.llm = self._init_llm_client()
         self.semantic_filter = SemanticFilter()
+        self.symbol_chunker = SymbolChunker()
+        self._fetch_slots = asyncio.Semaphore(settings.file_fetch_concurrency)
+        self._llm_by_model = {}
+        self.cascade = None
+        self._batch_store = None
+        self._ledger = None
+        if settings.cascade_enabled:
+            screen_llm = self._init_llm_client(
+                settings.cascade_screen_provider, settings.cascade_screen_model, settings.cascade_screen_endpoints,
+                cost_per_1k_tokens=settings.cascade_screen_cost_per_1k_tokens
+            )
+            self.cascade = ModelCascade(screen_llm, self.scm)
 
-    def _init_llm_client(self):
-        """Initialize and return the configured LLM client."""
+    def _init_llm_client(self, provider: str = None, model: str = None, endpoints: str = None, cost_per_1k_tokens: float = None):
+        """
+        Initialize and return the configured LLM client (optionally a specific provider/model,
+        and a token price other than LLM_COST_PER_1K_TOKENS, e.g. for the screening tier).
+        With several endpoints configured, returns a shared load-balanced pool over them.
+        """
         providers = {
             "openai": OpenAILLM,
             "ollama": OllamaLLM,
             "anthropic": AnthropicLLM
         }
         
-        provider = settings.llm_provider.lower()
+        provider = (provider or settings.llm_provider).lower()
         if provider not in providers:
             logger.error(f"Unsupported LLM provider: {provider}")
             raise ValueError(f"Unsupported LLM provider: {provider}")
             
-        return providers[provider]()
+        client = providers[provider]()
+        if model:
+            client.model = model
+        client.cost_per_1k_tokens = cost_per_1k_tokens
+
+        endpoints = settings.llm_pool_endpoints if endpoints is None else endpoints
+        if endpoints:
+            return get_llm_pool(provider, client, endpoints)
+        return client
+
+    @property
+    def batch_store(self) -> BatchStore:
+        if self._batch_store is None:
+            self._batch_store = BatchStore()
+        return self._batch_store
+
+    @property
+    def ledger(self) -> ReviewLedger | None:
+        if self._ledger is None and settings.review_ledger_enabled:
+            self._ledger = ReviewLedger()
+        return self._ledger
+
+    def _model_name(self, chunk: dict) -> str:
+        return chunk.get("model") or getattr(self.llm, "model", None) or settings.llm_provider
 
-    async def review_pull_request(self, repo_id: str, pr_id: int):
+    def _llm_for(self, model: str = None):
+        """Returns the LLM client, switched to a per-path model override if one is set."""
+        if not model or model == getattr(self.llm, "model", None):
+            return self.llm
+        if model not in self._llm_by_model:
+            # A pool hands out a view that shares its endpoints and health probe
+            self._llm_by_model[model] = self.llm.with_model(model)
+        return self._llm_by_model[model]
+
+    async def review_pull_request(self, repo_id: str, pr_id: int, execution_mode: str = None):
+        execution_mode = execution_mode or settings.review_execution_mode
         logger.info(f"Starting review for PR {repo_id}#{pr_id}")
         
+        snapshot = None
+        if settings.github_graphql:
+            # One GraphQL query for metadata, the file list and review threads;
+            # patches for the listed files are then recovered from the raw diff below
+            try:
+                snapshot = await asyncio.to_thread(self.scm.get_pull_request_snapshot, repo_id, pr_id)
+            except Exception as e:
+                logger.warning(f"GraphQL snapshot failed for PR {pr_id}, falling back to REST: {e}")
+
         try:
             # Fetch PR metadata to get base/head refs for semantic filtering
-            pr_data = self.scm.get_pull_request(repo_id, pr_id)
+            # In a worker thread: a rate-limited request may wait for the reset
+            pr_data = snapshot["pull_request"] if snapshot else await asyncio.to_thread(self.scm.get_pull_request, repo_id, pr_id)
             base_sha = pr_data.get("base", {}).get("sha")
             head_sha = pr_data.get("head", {}).get("sha")
-            
-            file_diffs = self.scm.get_pull_request_file_diffs(repo_id, pr_id)
-        except Exception as e:
-            logger.exception(f"Failed to fetch file diffs for PR {pr_id}")
+        except Exception:
+            logger.exception(f"Failed to fetch PR {pr_id}")
             return []
 
+        run_id = None
+        if self.ledger:
+            run_id = await asyncio.to_thread(self.ledger.start_run, repo_id, pr_id, head_sha, execution_mode)
+
+        # Per-repo rules come from the base commit so a PR can't loosen its own review
+        review_config = await asyncio.to_thread(load_review_config, self.scm, repo_id, base_sha)
+
+        file_diffs = snapshot["files"] if snapshot else []
         review_tasks = []
-        for fd in file_diffs:
-            filename = fd.get('filename')
-            patch = fd.get('patch')
-            
-            if not patch or not should_review_file(filename):
-                continue
+        if not snapshot:
+            review_tasks = await self._stream_review_tasks(repo_id, pr_id, file_diffs, review_config, base_sha, head_sha)
+            if review_tasks is None:
+                return []
 
-            # Semantic Filter: skip files where changes are only comments or whitespace
-            try:
-                # We offload large file fetching to external threads to keep event loop responsive
-                old_content = await asyncio.to_thread(self.scm.get_file_content, repo_id, filename, ref=base_sha)
-                new_content = await asyncio.to_thread(self.scm.get_file_content, repo_id, filename, ref=head_sha)
-                
-                if not self.semantic_filter.is_semantic_change(old_content, new_content, filename):
-                    logger.info(f"Skipping {filename}: Change is non-semantic (comments/whitespace only).")
-                    continue
-            except Exception as e:
-                logger.warning(f"Semantic filter failed for {filename}, proceeding with review: {e}")
-                
-            # Split patch into small focus chunks (e.g. 10 lines of changes)
-            chunks = list(HunkProcessor.chunk_patch(filename, patch, settings.review_max_lines))
-            review_tasks.extend(chunks)
+        # /files caps its listing and omits patches for large diffs (GraphQL lists none): fill the gaps from the raw diff
+        recovered = await self._recover_truncated_patches(repo_id, pr_id, file_diffs, review_config, pr_data.get("changed_files"))
+        if recovered is None and snapshot:
+            # Every GraphQL patch comes from the raw diff (406 on oversized diffs): use the REST listing instead
+            logger.warning(f"Falling back to the REST file listing for PR {pr_id}.")
+            file_diffs = []
+            review_tasks = await self._stream_review_tasks(repo_id, pr_id, file_diffs, review_config, base_sha, head_sha)
+            if review_tasks is None:
+                return []
+        review_tasks.extend(await self._build_review_tasks(repo_id, recovered or [], review_config, base_sha, head_sha))
         
         if not review_tasks:
             logger.info(f"No changes requiring review for PR {pr_id} after filtering.")
+            if run_id:
+                await asyncio.to_thread(self.ledger.finish_run, run_id, 0, 0, 0)
             return []
 
-        # Review Memory: Fetch existing comments to avoid repetition
-        logger.info(f"Fetching existing comments for PR {pr_id} to initialize review memory.")
+        # Review Memory: existing comments, to avoid repetition
+        logger.info(f"Loading existing comments for PR {pr_id} to initialize review memory.")
         try:
-            existing_comments = await asyncio.to_thread(self.scm.get_pull_request_comments, repo_id, pr_id)
+            existing_comments = await self._pull_request_memory(repo_id, pr_id, snapshot)
         except Exception as e:
             logger.warning(f"Failed to fetch existing comments: {e}")
             existing_comments = []
 
-        # Group comments by file for efficient memory passing
-        memory_by_file = {}
-        for comment in existing_comments:
-            file_path = comment.get('path')
-            if not file_path: continue
-            
-            if file_path not in memory_by_file:
-                memory_by_file[file_path] = []
-            
-            # Simplified comment representation for the prompt
-            memory_by_file[file_path].append(f"Line {comment.get('line')}: {comment.get('body')}")
+        memory = memory_by_file(existing_comments)
+
+        # Highest-risk chunks first, so a limited budget is spent where it matters
+        review_tasks = prioritize_chunks(review_tasks)
+        budget = ReviewBudget.from_settings()
+
+        logger.info(f"Processing {len(review_tasks)} review chunks in {execution_mode} mode.")
+
+        all_comments = await self._execute_review(repo_id, pr_id, review_tasks, memory, budget, execution_mode)
+
+        summary = budget.summary_comment()
+        if summary:
+            logger.info(f"Review budget reached for PR {pr_id}: skipped {len(budget.skipped)} low-risk chunks.")
+            try:
+                await asyncio.to_thread(self.scm.post_comment, repo_id, pr_id, summary)
+            except Exception as e:
+                logger.warning(f"Failed to post budget summary: {e}")
+        
+        if run_id:
+            await asyncio.to_thread(self.ledger.finish_run, run_id, len(review_tasks), len(all_comments), budget.used_tokens)
+        logger.info(f"Completed PR review with {len(all_comments)} comments (~{budget.used_tokens} tokens).")
+        return all_comments
+
+    async def _pull_request_memory(self, repo_id: str, pr_id: int, snapshot: dict = None) -> list:
+        """
+        Returns the PR's existing comments. With the ledger, only comments changed since
+        the last sync are fetched from GitHub and the full memory is read from the ledger,
+        which also holds what the bot itself posted.
+        """
+        if not self.ledger:
+            if snapshot:
+                return snapshot["comments"]
+            return await asyncio.to_thread(self.scm.get_pull_request_comments, repo_id, pr_id)
+
+        watermark = self.ledger.sync_watermark()
+        if snapshot:
+            fetched = snapshot["comments"]
+        else:
+            since = await asyncio.to_thread(self.ledger.last_synced, repo_id, pr_id)
+            fetched = await asyncio.to_thread(self.scm.get_pull_request_comments, repo_id, pr_id, since)
+        await asyncio.to_thread(self.ledger.record_comments, repo_id, pr_id, fetched, watermark)
+        return await asyncio.to_thread(self.ledger.memory, repo_id, pr_id)
+
+    async def _stream_review_tasks(self, repo_id: str, pr_id: int, file_diffs: list, review_config, base_sha: str, head_sha: str) -> list | None:
+        """
+        Lists the PR's files over REST (appending them to file_diffs) and builds their
+        review chunks. Files from page one are filtered and chunked while the remaining
+        pages download. Returns None if the listing fails.
+        """
+        file_tasks = []
+        try:
+            async for fd in self.scm.aiter_pull_request_file_diffs(repo_id, pr_id):
+                file_diffs.append(fd)
+                file_tasks.append(asyncio.create_task(self._file_review_tasks(repo_id, fd, review_config, base_sha, head_sha)))
+        except Exception:
+            logger.exception(f"Failed to fetch file diffs for PR {pr_id}")
+            for task in file_tasks:
+                task.cancel()
+            return None
+        return [chunk for chunks in await asyncio.gather(*file_tasks) for chunk in chunks]
+
+    async def _recover_truncated_patches(self, repo_id: str, pr_id: int, file_diffs: list, review_config, expected_files: int = None) -> list | None:
+        """
+        Recovers patches missing from the /files listing by streaming the PR's raw diff.
+        Only patches of files that are missing (and not ignored) are kept in memory.
+        Returns the recovered file entries, or None if the raw diff couldn't be read.
+        """
+        missing = {
+            fd.get('filename') for fd in file_diffs
+            if not fd.get('patch') and fd.get('changes') and review_config.should_review(fd.get('filename'))
+        }
+        listing_truncated = bool(expected_files) and len(file_diffs) < expected_files
+        if not missing and not listing_truncated:
+            return []
+
+        known = {fd.get('filename') for fd in file_diffs}
+
+        def collect():
+            recovered = {}
+            for fd in self.scm.iter_pull_request_file_diffs(repo_id, pr_id):
+                filename = fd['filename']
+                if not fd.get('patch') or not review_config.should_review(filename):
+                    continue
+                if filename in missing or (listing_truncated and filename not in known):
+                    recovered[filename] = fd
+            return recovered
+
+        try:
+            recovered = await asyncio.to_thread(collect)
+        except Exception as e:
+            logger.warning(f"Could not recover truncated patches for PR {pr_id} from the raw diff: {e}")
+            return None
+
+        logger.info(f"Recovered {len(recovered)} patches for PR {pr_id} from the raw diff ({len(missing)} truncated, listing {len(file_diffs)}/{expected_files}).")
+        return list(recovered.values())
+
+    async def _build_review_tasks(self, repo_id: str, file_diffs, review_config, base_sha: str, head_sha: str) -> list:
+        """Builds review chunks for a list of per-file diffs (see _file_review_tasks), files concurrently."""
+        results = await asyncio.gather(*(
+            self._file_review_tasks(repo_id, fd, review_config, base_sha, head_sha) for fd in file_diffs
+        ))
+        return [chunk for chunks in results for chunk in chunks]
 
-        logger.info(f"Processing {len(review_tasks)} review chunks in {settings.review_execution_mode} mode.")
+    async def _file_review_tasks(self, repo_id: str, fd: dict, review_config, base_sha: str, head_sha: str) -> list:
+        """
+        Applies ignore rules, generated-file detection and the semantic filter to
+        a file's diff, then splits what is left into focused review chunks.
+        """
+        filename = fd.get('filename')
+        patch = fd.get('patch')
+        
+        if not patch:
+            return []
+        if not review_config.should_review(filename):
+            files_filtered.inc(reason="ignored")
+            return []
+
+        # Generated/vendored/minified detection uses metadata + patch only, before any fetch
+        if settings.skip_generated_files:
+            heuristic = review_config.generated_detector.detect(fd)
+            if heuristic:
+                detection_stats.record(heuristic, fd)
+                files_filtered.inc(reason="generated")
+                logger.info(f"Skipping {filename}: detected as generated ({heuristic}).")
+                return []
+
+        rules = review_config.rules_for(filename)
+
+        # Only fetch the revisions this file's status makes meaningful: added files have
+        # no base (their head is the patch), renames read the base under the old path
+        needs_head = settings.context_prefetch or rules["chunking"] == "symbols"
+        plan = plan_content_fetches(fd, bool(base_sha), needs_head)
+        if plan.skip:
+            files_filtered.inc(reason="fetch_plan")
+            logger.info(f"Skipping {filename}: {plan.skip}.")
+            return []
+
+        old_content, new_content = await asyncio.gather(
+            self._fetch_content(repo_id, plan.base_path, base_sha, review_config),
+            self._fetch_content(repo_id, plan.head_path, head_sha, review_config)
+        )
+        new_content = new_content or plan.head_content
 
+        # Semantic Filter: skip files where changes are only comments or whitespace.
+        # Only planned when both revisions are fetched, and only if both arrived.
+        if plan.semantic_check and old_content is not None and new_content is not None:
+            try:
+                with stage_seconds.time(stage="semantic_filter"):
+                    semantic = self.semantic_filter.is_semantic_change(old_content, new_content, filename)
+                if not semantic:
+                    files_filtered.inc(reason="non_semantic")
+                    logger.info(f"Skipping {filename}: Change is non-semantic (comments/whitespace only).")
+                    return []
+            except Exception as e:
+                logger.warning(f"Semantic filter failed for {filename}, proceeding with review: {e}")
+
+        # Split patch into focus chunks: per enclosing symbol, or every N changed lines (e.g. 10)
+        with stage_seconds.time(stage="chunking"):
+            chunks = None
+            if rules["chunking"] == "symbols" and new_content:
+                chunks = await asyncio.to_thread(self._symbol_chunks, filename, patch, new_content)
+            if chunks is None:
+                chunks = list(HunkProcessor.chunk_patch(filename, patch, rules["chunk_size"]))
+        for chunk in chunks:
+            chunk["head_sha"] = head_sha
+            chunk["model"] = rules["model"]
+            chunk["risk_weight"] = rules["risk_weight"]
+
+        # Risk complexity counts branching AST nodes on the added lines, not keywords in the diff text
+        if new_content:
+            await asyncio.to_thread(self._attach_ast_complexity, filename, new_content, chunks)
+
+        # The head content fetched above also gives each chunk its enclosing function/class,
+        # so the agent doesn't have to spend turns asking for it
+        if new_content and settings.context_prefetch:
+            await asyncio.to_thread(self._attach_enclosing_symbols, filename, new_content, chunks)
+        return chunks
+
+    async def _fetch_content(self, repo_id: str, path: str, ref: str, review_config) -> str | None:
+        """Fetches a file revision in a worker thread; None if not planned or unavailable."""
+        if not path:
+            return None
+        try:
+            async with self._fetch_slots:
+                return await asyncio.to_thread(self.scm.get_file_content, repo_id, path, ref=ref, max_bytes=review_config.max_file_size)
+        except FileTooLargeError as e:
+            logger.info(f"Not fetching {path}@{ref} ({e}), reviewing patch only.")
+        except Exception as e:
+            logger.warning(f"Could not fetch {path}@{ref}, proceeding with patch only: {e}")
+        return None
+
+    def _symbol_chunks(self, filename: str, patch: str, content: str) -> list | None:
+        try:
+            return self.symbol_chunker.chunk_patch(filename, patch, content, settings.review_chunk_max_tokens)
+        except Exception as e:
+            logger.warning(f"Symbol chunking failed for {filename}, using line chunks: {e}")
+            return None
+
+    @staticmethod
+    def _attach_ast_complexity(filename: str, content: str, chunks: list):
+        try:
+            add_ast_complexity(chunks, filename, content)
+        except Exception as e:
+            logger.warning(f"AST complexity failed for {filename}, using diff keywords: {e}")
+
+    @staticmethod
+    def _attach_enclosing_symbols(filename: str, content: str, chunks: list):
+        try:
+            ranges = [(chunk["start_line"], chunk["end_line"]) for chunk in chunks]
+            symbols = get_enclosing_symbols(content, filename, ranges, settings.context_prefetch_max_chars)
+        except Exception as e:
+            logger.warning(f"Could not extract enclosing symbols for {filename}: {e}")
+            return
+        for chunk, symbol in zip(chunks, symbols):
+            if symbol:
+                chunk["context"] = symbol
+
+    async def _execute_review(self, repo_id: str, pr_id: int, review_tasks: list, memory: dict, budget: ReviewBudget, execution_mode: str) -> list:
+        """Runs the review chunks in the given execution mode and returns the comments."""
         all_comments = []
+        ranges = symbol_ranges(review_tasks)
 
-        if settings.review_execution_mode == "parallel":
-            # Concurrent processing with a semaphore to avoid rate limits/overload
-            semaphore = asyncio.Semaphore(5)
-            
-            async def process_task(task):
-                async with semaphore:
-                    filename = task['filename']
-                    prev_comments = "\n".join(memory_by_file.get(filename, ["None"]))
-                    # Offload sync agent call to a thread
-                    return await asyncio.to_thread(self._run_agent_on_chunk, prev_comments, repo_id, pr_id, task)
-            
-            results = await asyncio.gather(*(process_task(t) for t in review_tasks))
+        def memory_for(task):
+            # Only comments near the chunk (or in the same symbol) go into its prompt
+            prev_comments, tokens = select_memory(
+                memory.get(task['filename'], []), task, ranges.get((task['filename'], task.get('symbol')), ())
+            )
+            logger.debug(f"Memory for {task['filename']} lines {task['start_line']}-{task['end_line']}: ~{tokens} tokens")
+            return prev_comments
+
+        if execution_mode == "parallel":
+            # Prompts are built and screened concurrently; budget is then reserved one
+            # chunk at a time in risk order, so what gets reviewed doesn't depend on
+            # which thread finished first. Concurrency is bounded by the process-wide
+            # scheduler, which shares slots fairly between repositories.
+            prepared = await asyncio.gather(*(
+                self._prepare(memory_for(t), repo_id, pr_id, t, memory.get(t['filename'], [])) for t in review_tasks
+            ))
+            reserved = [self._reserve(item, budget) for item in prepared]
+            results = await asyncio.gather(*(self._review_in_slot(item, repo_id, pr_id, budget) for item in reserved))
             for res in results:
                 all_comments.extend(res)
+        elif execution_mode == "batch":
+            prepared = []
+            for task in review_tasks:
+                item = self._reserve(await self._prepare(memory_for(task), repo_id, pr_id, task, memory.get(task['filename'], [])), budget)
+                if item:
+                    prepared.append(item)
+            all_comments.extend(await self._run_batch(repo_id, pr_id, prepared, budget))
         else:
             for task in review_tasks:
-                filename = task['filename']
-                prev_comments = "\n".join(memory_by_file.get(filename, ["None"]))
-                comments = self._run_agent_on_chunk(prev_comments, repo_id, pr_id, task)
-                all_comments.extend(comments)
-        
-        logger.info(f"Completed PR review with {len(all_comments)} comments.")
+                # One chunk at a time, still within the global schedulers' limits
+                prepared = self._reserve(await self._prepare(memory_for(task), repo_id, pr_id, task, memory.get(task['filename'], [])), budget)
+                all_comments.extend(await self._review_in_slot(prepared, repo_id, pr_id, budget))
         return all_comments
 
-    def _run_agent_on_chunk(self, previous_comments: str, repo_id: str, pr_id: int, chunk: dict) -> list:
+    async def _prepare(self, previous_comments: str, repo_id: str, pr_id: int, chunk: dict, file_memory: list = None) -> dict | None:
+        """
+        Prepares a chunk in a worker thread. With a cascade, this is where screening runs,
+        so it takes a screening slot instead of holding a deep-tier one.
+        """
+        if self.cascade:
+            return await screen_scheduler.run(repo_id, self._prepare_chunk, previous_comments, repo_id, pr_id, chunk, file_memory)
+        return await asyncio.to_thread(self._prepare_chunk, previous_comments, repo_id, pr_id, chunk, file_memory)
+
+    @staticmethod
+    def _reserve(prepared: dict | None, budget: ReviewBudget = None) -> dict | None:
         """
-        Runs the ReviewAgent on a single code chunk and posts resulting comments.
+        Reserves budget for a prepared chunk; None if it doesn't fit. Callers reserve
+        in risk order, before any chunk runs. Cached results cost nothing.
+        """
+        if not prepared or "cached_comments" in prepared:
+            return prepared
+        chunk = prepared["chunk"]
+        if budget and not budget.try_reserve(chunk, prepared["estimate"]):
+            logger.info(f"Budget exhausted, skipping {chunk['filename']} lines {chunk['start_line']}-{chunk['end_line']}")
+            chunks_total.inc(outcome="skipped_budget")
+            return None
+        chunks_total.inc(outcome="reviewed")
+        return prepared
+
+    async def _review_in_slot(self, prepared: dict | None, repo_id: str, pr_id: int, budget: ReviewBudget = None) -> list:
+        """Reviews a prepared chunk once the process-wide scheduler grants a deep-tier slot."""
+        if not prepared:
+            return []
+        return await chunk_scheduler.run(repo_id, self._review_prepared, prepared, repo_id, pr_id, budget)
+
+    def _prepare_chunk(self, previous_comments: str, repo_id: str, pr_id: int, chunk: dict, file_memory: list = None) -> dict | None:
+        """
+        Builds the prompts for a chunk and runs cascade screening (budget is reserved afterwards, see _reserve).
+        previous_comments is the scoped memory for the prompt; file_memory holds all
+        of the file's existing comments, which generated comments are deduped against.
+        Returns None if the chunk should not go to the review model.
         """
         filename = chunk['filename']
         start, end = chunk['start_line'], chunk['end_line']
         
-        logger.info(f"Reviewing {filename} lines {start}-{end} ({chunk['changes']} changes)")
-        
+        target = f"Commit: {chunk['commit_sha']}" if chunk.get("commit_sha") else f"PR #{pr_id}"
         user_message = (
             f"Repository: {repo_id}\n"
-            f"PR #{pr_id}\n"
+            f"{target}\n"
             f"File: {filename}\n"
             f"Focus Range: Lines {start} - {end}\n\n"
             f"Diff Highlights (Line-numbered):\n"
             f"{chunk['content']}\n\n"
             f"Note: Only provide comments for the lines shown above. Use the provided line numbers exactly."
         )
+        context = chunk.get("context")
+        if context:
+            user_message += (
+                f"\n\nEnclosing {context['name']} (lines {context['start_line']} - {context['end_line']}, "
+                f"head version, for reference only):\n"
+                f"{context['body']}"
+            )
         
+        # Hunks this PR's earlier runs already reviewed (e.g. untouched by a new push) are skipped
+        if self._ledger_tracks(pr_id, chunk) and self.ledger.chunk_reviewed(repo_id, pr_id, filename, hunk_fingerprint(chunk)):
+            logger.info(f"Skipping {filename} lines {start}-{end}: already reviewed in this PR")
+            chunks_total.inc(outcome="skipped_ledger")
+            return None
+
         # Inject memory into system prompt
         system_prompt = get_system_prompt(previous_feedback=previous_comments)
+
+        # The same hunk was already reviewed in another PR/branch: reuse it, no LLM call
+        if settings.review_cache_enabled:
+            cached = review_cache.get(repo_id, chunk, self._model_name(chunk))
+            if cached is not None:
+                logger.info(f"Reusing cached review for {filename} lines {start}-{end}")
+                chunks_total.inc(outcome="cached")
+                return {
+                    "chunk": chunk,
+                    "previous_comments": previous_comments,
+                    "file_memory": file_memory or [],
+                    "cached_comments": cached,
+                    "estimate": 0
+                }
+
+        # Each agent turn resends the prompt, so multi-turn chunks cost a multiple of it
+        per_turn = estimate_tokens(system_prompt) + estimate_tokens(user_message) + EXPECTED_OUTPUT_TOKENS
+        estimate = int(per_turn * expected_turns())
+
+        # Cascade: the screening tier decides whether the deep model needs to see this chunk
+        if self.cascade and not self.cascade.should_escalate(chunk, user_message, estimate):
+            chunks_total.inc(outcome="skipped_cascade")
+            return None
+
+        return {
+            "chunk": chunk,
+            "previous_comments": previous_comments,
+            "file_memory": file_memory or [],
+            "system_prompt": system_prompt,
+            "user_message": user_message,
+            "estimate": estimate
+        }
+
+    def _review_prepared(self, prepared: dict, repo_id: str, pr_id: int, budget: ReviewBudget = None, first_response: str = None) -> list:
+        """
+        Runs the ReviewAgent on a prepared chunk (optionally resuming from a first
+        response obtained through a batch API), then dedupes and posts comments.
+        """
+        chunk = prepared['chunk']
+        previous_comments = prepared['previous_comments']
+        filename = chunk['filename']
+        start, end = chunk['start_line'], chunk['end_line']
+
+        logger.info(f"Reviewing {filename} lines {start}-{end} ({chunk['changes']} changes, risk {chunk.get('risk', {}).get('score')})")
         
-        agent = ReviewAgent(self.llm, self.scm)
+        cached = prepared.get('cached_comments')
+        agent = None if cached is not None else ReviewAgent(self._llm_for(chunk.get("model")), self.scm)
         try:
-            comments = agent.run(system_prompt, user_message)
+            if cached is not None:
+                comments = cached
+            else:
+                comments = agent.run(prepared['system_prompt'], prepared['user_message'], initial_response=first_response)
+                if settings.review_cache_enabled:
+                    review_cache.set(repo_id, chunk, self._model_name(chunk), comments)
             
             # Post-generation Deduplication Filter
-            # Even if the LLM repeats itself, we catch it here.
+            # Even if the LLM repeats itself, we catch it here. Checked against every existing
+            # comment on the file, including those the prompt's memory cap left out.
             filtered_comments = []
+            known = known_comments(prepared.get('file_memory') or [])
             normalized_memory = [c.lower().strip() for c in previous_comments.split('\n')]
 
             for c in comments:
@@ -161,40 +555,289 @@ class ReviewerService:
                 
                 # Check for exact or very similar existing comment on the same line
                 memory_entry = f"line {comment_line}: {comment_body.lower().strip()}"
-                if memory_entry in normalized_memory:
+                if (comment_line, comment_body.lower().strip()) in known or memory_entry in normalized_memory:
                     logger.info(f"Skipping duplicate comment on {filename}:{comment_line}")
                     continue
                 
-                self.scm.post_inline_comment(repo_id, pr_id, filename, comment_line, comment_body)
+                # Push reviews collect comments and post them together once every chunk is done
+                if chunk.get("commit_sha"):
+                    c = {**c, "file": filename}
+                else:
+                    self.scm.post_inline_comment(repo_id, pr_id, filename, comment_line, comment_body)
                 filtered_comments.append(c)
-                
+
+            if self._ledger_tracks(pr_id, chunk):
+                self._record_in_ledger(repo_id, pr_id, chunk, filtered_comments)
             return filtered_comments
         except Exception as e:
             logger.error(f"Agent failed for {filename} chunk: {e}")
             return []
+        finally:
+            if agent:
+                agent_stats.record(agent.usage, with_context=bool(chunk.get("context")))
+            if budget and agent:
+                budget.settle(prepared['estimate'], agent.total_tokens)
+
+    def _ledger_tracks(self, pr_id: int, chunk: dict) -> bool:
+        # Push reviews have no PR to keep history for
+        return bool(pr_id) and not chunk.get("commit_sha") and self.ledger is not None
+
+    def _record_in_ledger(self, repo_id: str, pr_id: int, chunk: dict, comments: list):
+        # The comments are already posted: a ledger failure must not discard them
+        fingerprint = hunk_fingerprint(chunk)
+        try:
+            for c in comments:
+                self.ledger.record_posted(repo_id, pr_id, chunk.get("head_sha"), fingerprint, chunk["filename"], c["line"], c["comment"])
+            self.ledger.record_chunk(repo_id, pr_id, chunk["filename"], fingerprint, chunk.get("head_sha"), len(comments))
+        except Exception as e:
+            logger.warning(f"Failed to record {chunk['filename']} chunk in the review ledger: {e}")
+
+    async def _run_batch(self, repo_id: str, pr_id: int, prepared: list[dict], budget: ReviewBudget = None) -> list:
+        """
+        Sends the first turn of every prepared chunk through the provider's batch API
+        (one batch per model), persists the batch IDs and resumes the agent loop from the results.
+        Falls back to interactive calls if the provider has no batch API.
+        """
+        if not prepared:
+            return []
+
+        comments = []
+        # Cache hits need no model call, so they never go into a batch
+        for item in [item for item in prepared if "cached_comments" in item]:
+            comments.extend(await asyncio.to_thread(self._review_prepared, item, repo_id, pr_id, budget))
+        prepared = [item for item in prepared if "cached_comments" not in item]
+        if not prepared:
+            return comments
+
+        if not getattr(self.llm, "supports_batch", False):
+            logger.info(f"{settings.llm_provider} has no batch API, reviewing {len(prepared)} chunks interactively.")
+            for item in prepared:
+                comments.extend(await asyncio.to_thread(self._review_prepared, item, repo_id, pr_id, budget))
+            return comments
+
+        def by_model(item):
+            return item["chunk"].get("model") or ""
+
+        for model, group in groupby(sorted(prepared, key=by_model), key=by_model):
+            llm = self._llm_for(model or None)
+            items = [{**item, "custom_id": f"chunk-{i}"} for i, item in enumerate(group)]
+            batch_requests = [
+                (item["custom_id"], [
+                    {"role": "system", "content": item["system_prompt"]},
+                    {"role": "user", "content": item["user_message"]}
+                ])
+                for item in items
+            ]
+            try:
+                batch_id = await asyncio.to_thread(llm.submit_batch, batch_requests)
+            except Exception as e:
+                logger.warning(f"Batch submission failed, reviewing {len(items)} chunks interactively: {e}")
+                for item in items:
+                    comments.extend(await asyncio.to_thread(self._review_prepared, item, repo_id, pr_id, budget))
+                continue
+
+            logger.info(f"Submitted batch {batch_id} with {len(items)} chunks for PR {repo_id}#{pr_id}")
+            await asyncio.to_thread(
+                self.batch_store.save, batch_id, settings.llm_provider.lower(), getattr(llm, "model", None), repo_id, pr_id or 0, items
+            )
+            comments.extend(await self._complete_batch(batch_id, llm, repo_id, pr_id, items, budget))
+        return comments
 
-    async def review_commit(self, repo_id: str, commit_sha: str):
+    async def _complete_batch(self, batch_id: str, llm, repo_id: str, pr_id: int, items: list[dict], budget: ReviewBudget = None) -> list:
+        """
+        Polls a batch until it finishes, then continues each chunk's agent loop from its
+        batch response. Chunks without a result (failed or timed out) run interactively.
+        Each chunk is recorded as done once its comments are posted, which is when its
+        batch usage is charged; chunks a previous owner finished are skipped, and their
+        comments join the file memory of later chunks.
+        Push-review comments are posted per chunk and returned marked "posted".
+        """
+        deadline = time.monotonic() + settings.batch_max_wait
+        results = None
+        while True:
+            if not await asyncio.to_thread(self.batch_store.renew, batch_id):
+                logger.warning(f"Lost the lease on batch {batch_id} to another worker, leaving it to them.")
+                return []
+            try:
+                results = await asyncio.to_thread(llm.get_batch_results, batch_id)
+            except Exception as e:
+                logger.warning(f"Polling batch {batch_id} failed: {e}")
+            if results is not None:
+                break
+            if time.monotonic() >= deadline:
+                logger.warning(f"Batch {batch_id} did not finish within {settings.batch_max_wait}s, falling back to interactive review.")
+                results = {}
+                break
+            await asyncio.sleep(settings.batch_poll_interval)
+
+        logger.info(f"Batch {batch_id} finished with {len(results)}/{len(items)} results.")
+        done = await asyncio.to_thread(self.batch_store.done_items, batch_id)
+        posted = {}
+        for item in items:
+            for c in done.get(item["custom_id"], []):
+                posted.setdefault(item["chunk"]["filename"], []).append(c)
+        if done:
+            logger.info(f"Batch {batch_id}: {len(done)}/{len(items)} chunks were already posted, skipping them.")
+
+        comments = []
+        for item in items:
+            if item["custom_id"] in done:
+                continue
+            # Keep the lease alive while the agent loops run, so nobody resumes the batch meanwhile
+            if not await asyncio.to_thread(self.batch_store.renew, batch_id):
+                logger.warning(f"Lost the lease on batch {batch_id} to another worker, leaving it to them.")
+                return comments
+            chunk = item["chunk"]
+            # Comments posted since the memory snapshot was taken count as existing ones
+            item = {**item, "file_memory": item.get("file_memory", []) + [
+                {"line": int(c["line"]), "body": c["comment"], "updated_at": ""} for c in posted.get(chunk["filename"], [])
+            ]}
+            result = results.get(item["custom_id"])
+            item_comments = await asyncio.to_thread(
+                self._review_prepared, item, repo_id, pr_id, budget, result.text if result else None
+            )
+            if chunk.get("commit_sha"):
+                await self._post_commit_comments(repo_id, chunk["commit_sha"], item_comments)
+                item_comments = [{**c, "posted": True} for c in item_comments]
+            newly_done = await asyncio.to_thread(self.batch_store.mark_item_done, batch_id, item["custom_id"], item_comments)
+            # Charged when the chunk is recorded, not per fetch: a resumed batch downloads every result again
+            if newly_done and result:
+                llm.record_usage(result.input_tokens, result.output_tokens, batch=True)
+            posted.setdefault(chunk["filename"], []).extend(item_comments)
+            comments.extend(item_comments)
+
+        await asyncio.to_thread(self.batch_store.mark, batch_id, "completed")
+        return comments
+
+    async def resume_pending_batches(self) -> list[asyncio.Task]:
+        """
+        Claims batches whose polling worker stopped (its lease expired) before they were
+        completed, and finishes each in its own task. Returns the tasks.
+        """
+        tasks = []
+        for record in await asyncio.to_thread(self.batch_store.pending):
+            if not await asyncio.to_thread(self.batch_store.claim, record["batch_id"]):
+                continue
+            logger.info(f"Resuming batch {record['batch_id']} for PR {record['repo_id']}#{record['pr_id']}")
+            tasks.append(asyncio.create_task(self._resume_batch(record)))
+        return tasks
+
+    async def watch_pending_batches(self):
+        """Resumes orphaned batches at startup and then every BATCH_RESUME_INTERVAL seconds."""
+        running = set()
+        while True:
+            # The store only exists once a batch was submitted on this volume
+            if os.path.exists(settings.batch_store_path):
+                try:
+                    for task in await self.resume_pending_batches():
+                        running.add(task)
+                        task.add_done_callback(running.discard)
+                except Exception as e:
+                    logger.warning(f"Checking for pending batches failed: {e}")
+            if settings.batch_resume_interval <= 0:
+                return
+            await asyncio.sleep(settings.batch_resume_interval)
+
+    async def _resume_batch(self, record: dict) -> list:
+        repo_id, pr_id, items = record["repo_id"], record["pr_id"], record["items"]
+        # The stored memory snapshots miss whatever was posted since the batch was submitted
+        try:
+            commit_sha = items[0]["chunk"].get("commit_sha") if items else None
+            if commit_sha:
+                # Push reviews are stored with pr_id 0 and comment on the commit
+                existing = await asyncio.to_thread(self.scm.get_commit_comments, repo_id, commit_sha)
+            else:
+                existing = await self._pull_request_memory(repo_id, pr_id)
+            memory = memory_by_file(existing)
+            items = [{**item, "file_memory": memory.get(item["chunk"]["filename"], [])} for item in items]
+        except Exception as e:
+            logger.warning(f"Could not refresh review memory for batch {record['batch_id']}, using its snapshot: {e}")
+        llm = self._init_llm_client(record["provider"], record["model"])
+        try:
+            return await self._complete_batch(record["batch_id"], llm, repo_id, pr_id, items)
+        except Exception:
+            logger.exception(f"Resuming batch {record['batch_id']} failed")
+            return []
+
+    async def review_commit(self, repo_id: str, commit_sha: str, execution_mode: str = None):
+        """
+        Reviews a pushed commit with the same pipeline as pull requests: the commit
+        diff is streamed and split per file, filtered, chunked and reviewed, and the
+        resulting comments are posted once all chunks are done.
+        """
+        execution_mode = execution_mode or settings.review_execution_mode
         logger.info(f"Starting review for commit {repo_id}@{commit_sha}")
         
         try:
-            diff = self.scm.get_commit_diff(repo_id, commit_sha)
-        except Exception as e:
+            commit = await asyncio.to_thread(self.scm.get_commit, repo_id, commit_sha)
+        except Exception:
+            logger.exception(f"Failed to fetch commit: {commit_sha}")
+            return []
+
+        # The .diff endpoint compares against the first parent (also for merge commits)
+        parents = commit.get("parents") or []
+        base_sha = parents[0].get("sha") if parents else None
+        review_config = await asyncio.to_thread(load_review_config, self.scm, repo_id, base_sha or commit_sha)
+
+        # Ignored paths (lockfiles, bundles...) are dropped while the diff streams in,
+        # so their patches are never held in memory
+        def collect_file_diffs():
+            return [
+                fd for fd in self.scm.iter_commit_file_diffs(repo_id, commit_sha)
+                if fd.get("patch") and review_config.should_review(fd["filename"])
+            ]
+
+        try:
+            file_diffs = await asyncio.to_thread(collect_file_diffs)
+        except Exception:
             logger.exception(f"Failed to fetch commit diff: {commit_sha}")
             return []
 
-        system_prompt = get_system_prompt(previous_feedback="None")
-        user_message = f"Repository: {repo_id}\nCommit: {commit_sha}\n\nDiff Content:\n{diff}"
-        
-        agent = ReviewAgent(self.llm, self.scm)
+        review_tasks = await self._build_review_tasks(repo_id, file_diffs, review_config, base_sha, commit_sha)
+        if not review_tasks:
+            logger.info(f"No changes requiring review for commit {commit_sha} after filtering.")
+            return []
+        for task in review_tasks:
+            task["commit_sha"] = commit_sha
+
         try:
-            comments = agent.run(system_prompt, user_message)
-            for c in comments:
-                self.scm.post_commit_inline_comment(repo_id, commit_sha, c['file'], c['line'], c['comment'])
-            logger.info(f"Completed commit review with {len(comments)} comments.")
-            return comments
+            existing_comments = await asyncio.to_thread(self.scm.get_commit_comments, repo_id, commit_sha)
         except Exception as e:
-            logger.error(f"Agent failed to complete commit review: {e}")
-            return []
+            logger.warning(f"Failed to fetch existing commit comments: {e}")
+            existing_comments = []
+        memory = memory_by_file(existing_comments)
+
+        review_tasks = prioritize_chunks(review_tasks)
+        budget = ReviewBudget.from_settings()
+
+        logger.info(f"Processing {len(review_tasks)} review chunks for commit {commit_sha} in {execution_mode} mode.")
+        comments = await self._execute_review(repo_id, None, review_tasks, memory, budget, execution_mode)
+
+        summary = budget.summary_comment()
+        if summary:
+            logger.info(f"Review budget reached for commit {commit_sha}: skipped {len(budget.skipped)} low-risk chunks.")
+            try:
+                await asyncio.to_thread(self.scm.post_commit_comment, repo_id, commit_sha, summary)
+            except Exception as e:
+                logger.warning(f"Failed to post budget summary: {e}")
+
+        # Batch mode posts each chunk's comments as it finishes
+        await self._post_commit_comments(repo_id, commit_sha, [c for c in comments if not c.get("posted")])
+        logger.info(f"Completed commit review with {len(comments)} comments (~{budget.used_tokens} tokens).")
+        return comments
+
+    async def _post_commit_comments(self, repo_id: str, commit_sha: str, comments: list):
+        """Posts collected commit comments concurrently (GitHub has no bulk endpoint for commits)."""
+        semaphore = asyncio.Semaphore(5)
+
+        async def post(c):
+            async with semaphore:
+                try:
+                    await asyncio.to_thread(self.scm.post_commit_inline_comment, repo_id, commit_sha, c['file'], int(c['line']), c['comment'])
+                except Exception as e:
+                    logger.warning(f"Failed to post commit comment on {c['file']}:{c['line']}: {e}")
+
+        await asyncio.gather(*(post(c) for c in comments))
 
 if __name__ == "__main__":
     # Test execution
@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import deque
+from src.config import settings
+from src.services.llm.pool import parse_endpoints, pool_capacity
+
+logger = logging.getLogger(__name__)
+
+# Global chunk concurrency when neither SCHEDULER_MAX_CONCURRENCY nor an endpoint pool is configured
+DEFAULT_MAX_CONCURRENCY = 10
+
+def parse_weights(spec: str) -> dict:
+    """Parses "org/repo=2,org/other=0.5" into {repo: weight}."""
+    weights = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        repo, weight = item.split("=", 1)
+        try:
+            weights[repo.strip()] = max(float(weight), 0.01)
+        except ValueError:
+            logger.warning(f"Ignoring invalid scheduler weight: {item!r}")
+    return weights
+
+class _Ticket:
+    __slots__ = ("repo", "start", "future", "granted")
+
+    def __init__(self, repo: str, start: float, future: asyncio.Future):
+        self.repo = repo
+        self.start = start
+        self.future = future
+        self.granted = False
+
+class ChunkScheduler:
+    """
+    Process-wide scheduler for LLM review chunks, shared by all active reviews.
+
+    Start-time fair queuing across repositories: each chunk gets a virtual start
+    tag max(V, repo's last finish) and finishes at start + 1/weight, and the
+    queued chunk with the lowest start tag runs next. A repository that queued
+    300 chunks doesn't delay a 3-chunk PR from another repository by more than
+    a few slots. Concurrency is capped globally and per repository.
+    """
+    def __init__(self, max_concurrency: int, per_repo_limit: int, max_queued: int, weights: dict = None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_repo_limit = max(1, per_repo_limit)
+        self.max_queued = max_queued
+        self.weights = weights or {}
+        self._lock = threading.Lock()
+        self._queues: dict[str, deque] = {}
+        self._running: dict[str, int] = {}
+        self._last_finish: dict[str, float] = {}
+        self._virtual_time = 0.0
+        self.active = 0
+        self.queued = 0
+        self.completed = 0
+        self._avg_seconds = 0.0
+
+    @property
+    def saturated(self) -> bool:
+        return bool(self.max_queued) and self.queued >= self.max_queued
+
+    def retry_after(self) -> int:
+        """Seconds until the backlog should have drained, for a Retry-After header."""
+        per_chunk = self._avg_seconds or 10.0
+        seconds = math.ceil(self.queued / self.max_concurrency * per_chunk)
+        return min(max(seconds, 1), 600)
+
+    def _enqueue(self, repo: str) -> _Ticket:
+        future = asyncio.get_running_loop().create_future()
+        with self._lock:
+            start = max(self._virtual_time, self._last_finish.get(repo, 0.0))
+            self._last_finish[repo] = start + 1.0 / self.weights.get(repo, 1.0)
+            ticket = _Ticket(repo, start, future)
+            self._queues.setdefault(repo, deque()).append(ticket)
+            self.queued += 1
+        self._dispatch()
+        return ticket
+
+    def _dispatch(self):
+        """Grants slots to the lowest start tags among repos below their cap."""
+        with self._lock:
+            while self.active < self.max_concurrency:
+                best = None
+                for repo, queue in self._queues.items():
+                    if queue and self._running.get(repo, 0) < self.per_repo_limit:
+                        if best is None or queue[0].start < best.start:
+                            best = queue[0]
+                if best is None:
+                    return
+                self._queues[best.repo].popleft()
+                if not self._queues[best.repo]:
+                    del self._queues[best.repo]
+                self.queued -= 1
+                self.active += 1
+                self._running[best.repo] = self._running.get(best.repo, 0) + 1
+                self._virtual_time = best.start
+                best.granted = True
+                best.future.get_loop().call_soon_threadsafe(self._grant, best.future)
+
+    @staticmethod
+    def _grant(future: asyncio.Future):
+        if not future.done():
+            future.set_result(None)
+
+    def _release(self, repo: str, seconds: float = None):
+        with self._lock:
+            self.active -= 1
+            self._running[repo] -= 1
+            if not self._running[repo]:
+                del self._running[repo]
+            if seconds is not None:
+                self.completed += 1
+                # Exponential moving average of chunk service time
+                self._avg_seconds = seconds if not self._avg_seconds else 0.9 * self._avg_seconds + 0.1 * seconds
+        self._dispatch()
+
+    def _cancel(self, ticket: _Ticket):
+        with self._lock:
+            if not ticket.granted:
+                queue = self._queues.get(ticket.repo)
+                if queue and ticket in queue:
+                    queue.remove(ticket)
+                    if not queue:
+                        del self._queues[ticket.repo]
+                    self.queued -= 1
+                return
+        self._release(ticket.repo)
+
+    async def run(self, repo: str, fn, *args):
+        """Waits for a fair slot for repo, then runs fn(*args) in a worker thread."""
+        ticket = self._enqueue(repo)
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            self._cancel(ticket)
+            raise
+        started = time.monotonic()
+        try:
+            return await asyncio.to_thread(fn, *args)
+        finally:
+            self._release(repo, time.monotonic() - started)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "active": self.active,
+                "queued": self.queued,
+                "completed": self.completed,
+                "max_concurrency": self.max_concurrency,
+                "avg_chunk_seconds": round(self._avg_seconds, 3),
+                "running_by_repo": dict(self._running),
+                "queued_by_repo": {repo: len(queue) for repo, queue in self._queues.items()}
+            }
+
+def default_concurrency(max_concurrency: int, endpoints: str, per_repo_limit: int = 0) -> tuple[int, int]:
+    """
+    (global, per-repo) chunk concurrency. Unset (0) global concurrency follows the
+    capacity of the given LLM endpoint pool, so adding endpoints raises throughput;
+    without a pool it is 10. Unset per-repo concurrency is half the global cap.
+    """
+    if not max_concurrency:
+        endpoints = parse_endpoints(endpoints)
+        max_concurrency = pool_capacity(len(endpoints)) if endpoints else DEFAULT_MAX_CONCURRENCY
+    per_repo_limit = per_repo_limit or max(1, max_concurrency // 2)
+    return max_concurrency, per_repo_limit
+
+# Deep-tier review slots
+chunk_scheduler = ChunkScheduler(
+    *default_concurrency(settings.scheduler_max_concurrency, settings.llm_pool_endpoints, settings.scheduler_per_repo_limit),
+    settings.scheduler_max_queued,
+    parse_weights(settings.scheduler_repo_weights)
+)
+
+# Cascade screening slots: a chunk waiting for (or running) screening doesn't hold a
+# deep-tier slot, and clean chunks never take one
+screen_scheduler = ChunkScheduler(
+    *default_concurrency(settings.cascade_screen_concurrency, settings.cascade_screen_endpoints),
+    settings.scheduler_max_queued,
+    parse_weights(settings.scheduler_repo_weights)
+)
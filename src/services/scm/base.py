@@ -1,5 +1,16 @@
 from abc import ABC, abstractmethod
 
+class FileTooLargeError(Exception):
+    """
+    Raised when a file exceeds the configured fetch size cap.
+    Callers should fall back to patch-only review for that file.
+    """
+    def __init__(self, file_path: str, limit: int):
+        self.file_path = file_path
+        self.limit = limit
+        super().__init__(f"{file_path} exceeds the {limit} byte fetch limit")
+
+
 class BaseSCM(ABC):
     @abstractmethod
     def get_pull_request_diff(self, repo_id: str, pr_id: int) -> str:
@@ -38,11 +49,13 @@ class BaseSCM(ABC):
         pass
 
     @abstractmethod
-    def get_file_content(self, repo_id: str, file_path: str, start_line: int = None, end_line: int = None, ref: str = None) -> str:
+    def get_file_content(self, repo_id: str, file_path: str, start_line: int = None, end_line: int = None, ref: str = None, max_bytes: int = None, missing_ok: bool = False) -> str | None:
         """
         Fetch the content of a file.
         If start_line and end_line are provided, returns only that range (1-indexed).
         If ref is provided, fetches content from that specific commit/branch.
+        Raises FileTooLargeError above max_bytes (defaults to settings.max_file_fetch_bytes).
+        With missing_ok, a file that doesn't exist returns None instead of raising.
         """
         pass
     @abstractmethod
@@ -54,9 +67,10 @@ class BaseSCM(ABC):
         pass
 
     @abstractmethod
-    def get_pull_request_comments(self, repo_id: str, pr_id: int) -> list[dict]:
+    def get_pull_request_comments(self, repo_id: str, pr_id: int, since: str = None) -> list[dict]:
         """
         Fetch all comments on a pull request, including inline comments.
+        With since (ISO 8601), only comments created or updated after it.
         """
         pass
 
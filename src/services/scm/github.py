@@ -1,61 +1,223 @@
+import asyncio
 import logging
+import posixpath
+import re
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
 from fastapi import HTTPException
 from src.config import settings
-from src.services.scm.base import BaseSCM
+from src.services.scm.base import BaseSCM, FileTooLargeError
+from src.services.scm.http_cache import http_cache
+from src.utils.cache_backends import get_cache
+from src.utils.metrics import stage_seconds
+from src.services.scm.rate_limit import rate_limit_governor, token_key, RateLimitExhausted
+from src.services.scm.github_graphql import PULL_REQUEST_SNAPSHOT_QUERY, GraphQLQueryPlanner, snapshot_from_pages
+from src.utils.diff_splitter import iter_byte_lines, split_unified_diff
 from src.code_parser.parser import analysis_file_structure, get_function_content as extract_function_content
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+FULL_SHA_RE = re.compile(r"^[0-9a-f]{40}$")
+
 class GitHubSCM(BaseSCM):
     """
     GitHub implementation of the SCM interface.
     Handles GitHub-specific operations.
     """
     
-    def __init__(self, token: str):
+    def __init__(self, token: str, priority: str = "normal"):
         self.token = token
+        # "low" work (push reviews, draft PRs) yields the remaining rate limit to PR reviews
+        self.priority = priority
+        self._token_key = token_key(token)
         self.base_url = settings.github_base_url.rstrip('/')
         self.headers = {
             "Authorization": f"Bearer {self.token}",
             "Accept": "application/vnd.github.v3+json",
             "User-Agent": "Pull-Request-Pilot"
         }
+        # api.github.com/graphql, or <host>/api/graphql for GitHub Enterprise (<host>/api/v3)
+        if self.base_url.endswith("/api/v3"):
+            self.graphql_url = self.base_url[:-len("/v3")] + "/graphql"
+        else:
+            self.graphql_url = f"{self.base_url}/graphql"
+        # PR head SHAs already known in this review, so posting comments doesn't refetch the PR
+        self._head_shas = {}
+        self._file_cache = get_cache("file_contents", settings.file_cache_max_entries, settings.file_cache_ttl)
 
-    def _request(self, method: str, endpoint: str, accept: str = None, **kwargs) -> requests.Response:
+    def _request(self, method: str, endpoint: str, accept: str = None, expected_status: tuple = (), **kwargs) -> requests.Response:
         """
         Internal helper for making GitHub API requests.
+        expected_status lists error statuses the caller handles itself (e.g. 404 for an
+        optional file); they still raise, but aren't logged as errors.
         """
-        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        url = endpoint if endpoint.startswith(("http://", "https://")) else f"{self.base_url}/{endpoint.lstrip('/')}"
         headers = self.headers.copy()
         if accept:
             headers["Accept"] = accept
-            
+
+        # Revalidate cached GETs with If-None-Match; 304s don't count against the rate limit
+        cache_key = cached = None
+        if settings.github_http_cache and method == "GET" and not kwargs.get("stream"):
+            cache_key = http_cache.key(self._token_key, url, kwargs.get("params"), headers["Accept"])
+            cached = http_cache.get(cache_key)
+            if cached:
+                headers.update(cached.validators())
+
+        resource = "graphql" if url == self.graphql_url else "core"
         try:
-            response = requests.request(method, url, headers=headers, timeout=30, **kwargs)
+            for attempt in range(2):
+                rate_limit_governor.acquire(self._token_key, resource, self.priority)
+                with stage_seconds.time(stage="post" if method != "GET" and resource != "graphql" else "fetch"):
+                    response = requests.request(method, url, headers=headers, timeout=30, **kwargs)
+                rate_limit_governor.update(self._token_key, response.headers)
+
+                # Rate limited: wait for the reset once instead of failing the review
+                retry_after = rate_limit_governor.retry_after(response)
+                if attempt or retry_after is None or retry_after > settings.github_rate_limit_max_wait:
+                    break
+                logger.warning(f"GitHub rate limit hit, retrying in {retry_after:.0f}s")
+                response.close()
+                time.sleep(retry_after)
             
             # Diagnostic for debugging token permissions if needed
             scopes = response.headers.get("X-OAuth-Scopes")
             if scopes:
                 logger.debug(f"GitHub Token Scopes: {scopes}")
+
+            if response.status_code == 304 and cached:
+                return cached.to_response(response)
                 
             if response.status_code not in (200, 201):
-                logger.error(f"GitHub API Error [{response.status_code}]: {response.text}")
+                if response.status_code in expected_status:
+                    logger.debug(f"GitHub API [{response.status_code}] for {url} (expected)")
+                else:
+                    logger.error(f"GitHub API Error [{response.status_code}]: {response.text}")
                 raise HTTPException(
                     status_code=response.status_code, 
                     detail=f"GitHub API error: {response.text}"
                 )
+            if cache_key:
+                http_cache.store(cache_key, response)
             return response
+        except RateLimitExhausted as e:
+            logger.error(str(e))
+            raise HTTPException(status_code=429, detail=str(e))
         except requests.RequestException as e:
             logger.exception(f"Request to GitHub failed: {e}")
             raise HTTPException(status_code=500, detail=f"Failed to communicate with GitHub: {str(e)}")
 
+    def _first_page(self, endpoint: str, params: dict = None) -> tuple[list, dict, int]:
+        """
+        Fetches page one of a list endpoint and reads the page count from the Link header.
+        Returns (items, params for further pages, last page number).
+        """
+        params = {**(params or {}), "per_page": settings.github_per_page}
+        response = self._request("GET", endpoint, params=params)
+        last_url = response.links.get("last", {}).get("url")
+        last_page = int(parse_qs(urlparse(last_url).query).get("page", ["1"])[0]) if last_url else 1
+        return response.json(), params, last_page
+
+    def _get_page(self, endpoint: str, params: dict, page: int) -> list:
+        return self._request("GET", endpoint, params={**params, "page": page}).json()
+
+    def _paginate(self, endpoint: str, params: dict = None) -> list:
+        """
+        Fetches every page of a list endpoint. Pages after the first are fetched concurrently.
+        """
+        items, params, last_page = self._first_page(endpoint, params)
+        if last_page > 1:
+            with ThreadPoolExecutor(max_workers=settings.github_page_concurrency) as pool:
+                for page in pool.map(lambda n: self._get_page(endpoint, params, n), range(2, last_page + 1)):
+                    items.extend(page)
+        return items
+
+    async def _apaginate(self, endpoint: str, params: dict = None):
+        """
+        Async-iterator form of _paginate: yields page one's items right away while the
+        remaining pages download in the background, then the rest in page order.
+        """
+        items, params, last_page = await asyncio.to_thread(self._first_page, endpoint, params)
+        semaphore = asyncio.Semaphore(settings.github_page_concurrency)
+
+        async def fetch(page: int) -> list:
+            async with semaphore:
+                return await asyncio.to_thread(self._get_page, endpoint, params, page)
+
+        pending = [asyncio.ensure_future(fetch(n)) for n in range(2, last_page + 1)]
+        try:
+            for item in items:
+                yield item
+            for task in pending:
+                for item in await task:
+                    yield item
+        finally:
+            for task in pending:
+                task.cancel()
+
     def get_pull_request(self, repo_id: str, pr_id: int) -> dict:
         """
         Fetch pull request metadata.
         """
-        return self._request("GET", f"repos/{repo_id}/pulls/{pr_id}").json()
+        pr_data = self._request("GET", f"repos/{repo_id}/pulls/{pr_id}").json()
+        self._head_shas[(repo_id, pr_id)] = pr_data.get("head", {}).get("sha")
+        return pr_data
+
+    def _graphql(self, query: str, variables: dict) -> dict:
+        response = self._request("POST", self.graphql_url, json={"query": query, "variables": variables}).json()
+        if response.get("errors"):
+            logger.error(f"GitHub GraphQL Error: {response['errors']}")
+            raise HTTPException(status_code=502, detail=f"GitHub GraphQL error: {response['errors']}")
+        return response["data"]
+
+    @staticmethod
+    def _advance(connection: dict, remaining: int, cursors: dict, cursor_key: str) -> int:
+        """Moves a connection's cursor past the fetched page and returns how many items are left."""
+        if connection is None:
+            return remaining
+        cursors[cursor_key] = connection["pageInfo"]["endCursor"]
+        if not connection["pageInfo"]["hasNextPage"]:
+            return 0
+        return max(remaining - len(connection["nodes"]), 1)
+
+    def get_pull_request_snapshot(self, repo_id: str, pr_id: int) -> dict:
+        """
+        Fetch PR metadata, the changed-file list (without patches) and all review
+        threads in one GraphQL query, paging only the connections that need it.
+        Returns {"pull_request": ..., "files": [...], "comments": [...]} in REST shape.
+        """
+        owner, name = repo_id.split("/", 1)
+        planner = GraphQLQueryPlanner(settings.github_graphql_comments_per_thread)
+        cursors = {"filesAfter": None, "threadsAfter": None}
+        files_remaining = threads_remaining = None
+        pages = []
+        while True:
+            plan = planner.plan(files_remaining, threads_remaining)
+            data = self._graphql(PULL_REQUEST_SNAPSHOT_QUERY, {
+                "owner": owner, "name": name, "number": pr_id,
+                "withFiles": plan.files_first > 0, "filesFirst": max(plan.files_first, 1),
+                "withThreads": plan.threads_first > 0, "threadsFirst": max(plan.threads_first, 1),
+                "commentsFirst": max(plan.comments_first, 1),
+                **cursors
+            })
+            pr = data["repository"]["pullRequest"]
+            pages.append(pr)
+            logger.debug(f"GraphQL snapshot page for {repo_id}#{pr_id}: cost={data['rateLimit']['cost']} remaining={data['rateLimit']['remaining']}")
+
+            if len(pages) == 1:
+                files_remaining = pr["changedFiles"]
+                threads_remaining = pr["reviewThreads"]["totalCount"]
+            files_remaining = self._advance(pr.get("files"), files_remaining, cursors, "filesAfter")
+            threads_remaining = self._advance(pr.get("reviewThreads"), threads_remaining, cursors, "threadsAfter")
+            if not files_remaining and not threads_remaining:
+                break
+
+        snapshot = snapshot_from_pages(pages)
+        self._head_shas[(repo_id, pr_id)] = snapshot["pull_request"]["head"]["sha"]
+        return snapshot
 
     def get_pull_request_diff(self, repo_id: str, pr_id: int) -> str:
         """
@@ -64,19 +226,34 @@ class GitHubSCM(BaseSCM):
         response = self._request("GET", f"repos/{repo_id}/pulls/{pr_id}", accept="application/vnd.github.v3.diff")
         return response.text
 
+    def iter_pull_request_file_diffs(self, repo_id: str, pr_id: int):
+        """
+        Stream the pull request's unified diff and yield one /files-style entry per file.
+        Unlike /files, the raw diff isn't paged and keeps patches /files omits as too large.
+        """
+        response = self._request("GET", f"repos/{repo_id}/pulls/{pr_id}", accept="application/vnd.github.v3.diff", stream=True)
+        try:
+            yield from split_unified_diff(iter_byte_lines(response.iter_content(chunk_size=64 * 1024)))
+        finally:
+            response.close()
+
     def get_pull_request_files(self, repo_id: str, pr_id: int) -> list[str]:
         """
         Fetch the list of files changed in a pull request.
         """
-        response = self._request("GET", f"repos/{repo_id}/pulls/{pr_id}/files")
-        return [f["filename"] for f in response.json()]
+        return [f["filename"] for f in self._paginate(f"repos/{repo_id}/pulls/{pr_id}/files")]
 
     def get_pull_request_file_diffs(self, repo_id: str, pr_id: int) -> list[dict]:
         """
         Fetch the list of files and their diff patches.
         """
-        response = self._request("GET", f"repos/{repo_id}/pulls/{pr_id}/files")
-        return response.json()
+        return self._paginate(f"repos/{repo_id}/pulls/{pr_id}/files")
+
+    def aiter_pull_request_file_diffs(self, repo_id: str, pr_id: int):
+        """
+        Async iterator over the PR's files and patches, starting before all pages are fetched.
+        """
+        return self._apaginate(f"repos/{repo_id}/pulls/{pr_id}/files")
 
     def get_commit_diff(self, repo_id: str, commit_sha: str) -> str:
         """
@@ -85,33 +262,133 @@ class GitHubSCM(BaseSCM):
         response = self._request("GET", f"repos/{repo_id}/commits/{commit_sha}", accept="application/vnd.github.v3.diff")
         return response.text
 
+    def get_commit(self, repo_id: str, commit_sha: str) -> dict:
+        """
+        Fetch commit metadata (sha, parents, message).
+        The file list is paginated and not needed here, so only one entry is requested.
+        """
+        return self._request("GET", f"repos/{repo_id}/commits/{commit_sha}", params={"per_page": 1}).json()
+
+    def iter_commit_file_diffs(self, repo_id: str, commit_sha: str):
+        """
+        Stream the commit's unified diff and yield one /files-style entry per file,
+        without holding the whole diff in memory.
+        """
+        response = self._request("GET", f"repos/{repo_id}/commits/{commit_sha}", accept="application/vnd.github.v3.diff", stream=True)
+        try:
+            yield from split_unified_diff(iter_byte_lines(response.iter_content(chunk_size=64 * 1024)))
+        finally:
+            response.close()
+
+    def get_commit_comments(self, repo_id: str, commit_sha: str) -> list[dict]:
+        """
+        Fetch all comments on a commit.
+        """
+        return self._paginate(f"repos/{repo_id}/commits/{commit_sha}/comments")
+
     def get_file_structure(self, repo_id: str, file_path: str) -> str:
         """
         Analyze the file content and return a high-level structure/outline.
         """
-        content = self.get_file_content(repo_id, file_path)
+        try:
+            content = self.get_file_content(repo_id, file_path)
+        except FileTooLargeError as e:
+            return f"File is too large for structure analysis: {e}"
         return analysis_file_structure(content, file_path)
 
-    def get_file_content(self, repo_id: str, file_path: str, start_line: int = None, end_line: int = None, ref: str = None) -> str:
+    def get_file_content(self, repo_id: str, file_path: str, start_line: int = None, end_line: int = None, ref: str = None, max_bytes: int = None, missing_ok: bool = False) -> str | None:
         """
         Fetch the content of a file. Supports line-level pagination and commit refs.
+        The body is streamed and capped at max_bytes (default settings.max_file_fetch_bytes).
+        Line windows stop reading once end_line is reached.
+        Falls back to the git blob API when the contents API rejects the file as too large.
+        With missing_ok, a 404 returns None quietly (e.g. optional config files).
         """
+        limit = max_bytes or settings.max_file_fetch_bytes
+
+        # Content at a commit SHA never changes, so it is shared across reviews and workers
+        cache_key = f"{repo_id}@{ref}:{file_path}" if ref and FULL_SHA_RE.match(ref) else None
+        if cache_key:
+            content = self._file_cache.get(cache_key)
+            if content is not None:
+                if len(content.encode("utf-8")) > limit:
+                    raise FileTooLargeError(file_path, limit)
+                if start_line is not None and end_line is not None:
+                    return "\n".join(content.splitlines()[max(1, start_line) - 1:end_line])
+                return content
+
         endpoint = f"repos/{repo_id}/contents/{file_path}"
         params = {}
         if ref:
             params['ref'] = ref
-            
-        response = self._request("GET", endpoint, params=params, accept="application/vnd.github.v3.raw")
-        content = response.text
-        
-        if start_line is not None and end_line is not None:
-            lines = content.splitlines()
-            start_index = max(0, start_line - 1)
-            end_index = min(len(lines), end_line)
-            return "\n".join(lines[start_index:end_index]) if start_index < len(lines) else ""
-            
+
+        try:
+            response = self._request(
+                "GET", endpoint, params=params, accept="application/vnd.github.v3.raw", stream=True,
+                expected_status=(404,) if missing_ok else ()
+            )
+        except HTTPException as e:
+            if missing_ok and e.status_code == 404:
+                return None
+            if e.status_code != 403 or "large" not in str(e.detail).lower():
+                raise
+            logger.info(f"Contents API refused {file_path} as too large, falling back to blob API")
+            response = self._get_blob_response(repo_id, file_path, ref)
+
+        with response:
+            if start_line is not None and end_line is not None:
+                return self._read_line_window(response, file_path, start_line, end_line, limit)
+            content = self._read_capped(response, file_path, limit)
+        if cache_key:
+            self._file_cache.set(cache_key, content)
         return content
 
+    def _get_blob_response(self, repo_id: str, file_path: str, ref: str = None) -> requests.Response:
+        """
+        Resolve the blob SHA from the parent directory listing and stream the raw blob.
+        """
+        parent, name = posixpath.split(file_path)
+        params = {'ref': ref} if ref else {}
+        entries = self._request("GET", f"repos/{repo_id}/contents/{parent}", params=params).json()
+        blob_sha = next((e.get("sha") for e in entries if e.get("name") == name), None)
+        if not blob_sha:
+            raise HTTPException(status_code=404, detail=f"Blob for {file_path} not found")
+
+        return self._request("GET", f"repos/{repo_id}/git/blobs/{blob_sha}", accept="application/vnd.github.raw", stream=True)
+
+    def _read_capped(self, response: requests.Response, file_path: str, limit: int) -> str:
+        """
+        Read a streamed response body, aborting once it exceeds the size cap.
+        """
+        content_length = response.headers.get("Content-Length")
+        if content_length and int(content_length) > limit:
+            raise FileTooLargeError(file_path, limit)
+
+        buffer = bytearray()
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            buffer.extend(chunk)
+            if len(buffer) > limit:
+                raise FileTooLargeError(file_path, limit)
+        return buffer.decode("utf-8", errors="replace")
+
+    def _read_line_window(self, response: requests.Response, file_path: str, start_line: int, end_line: int, limit: int) -> str:
+        """
+        Read lines start_line..end_line (1-indexed) from a streamed response and stop
+        downloading as soon as the window is complete.
+        """
+        start_line = max(1, start_line)
+        lines = []
+        bytes_read = 0
+        for line_no, line in enumerate(response.iter_lines(chunk_size=64 * 1024), start=1):
+            bytes_read += len(line) + 1
+            if bytes_read > limit:
+                raise FileTooLargeError(file_path, limit)
+            if line_no >= start_line:
+                lines.append(line.decode("utf-8", errors="replace"))
+            if line_no >= end_line:
+                break
+        return "\n".join(lines)
+
     def post_comment(self, repo_id: str, pr_id: int, body: str) -> bool:
         """
         Post a general comment on the pull request issue.
@@ -123,13 +400,13 @@ class GitHubSCM(BaseSCM):
         """
         Post a comment on a specific line of the pull request's diff.
         """
-        # Fetch PR to get head commit sha to ensure comment is attached correctly
-        commit_id = None
-        try:
-            pr_data = self._request("GET", f"repos/{repo_id}/pulls/{pr_id}").json()
-            commit_id = pr_data.get("head", {}).get("sha")
-        except Exception as e:
-            logger.warning(f"Could not fetch PR details for commit_id: {e}")
+        # Head commit sha ensures the comment is attached correctly (fetched once per PR)
+        commit_id = self._head_shas.get((repo_id, pr_id))
+        if not commit_id:
+            try:
+                commit_id = self.get_pull_request(repo_id, pr_id).get("head", {}).get("sha")
+            except Exception as e:
+                logger.warning(f"Could not fetch PR details for commit_id: {e}")
 
         data = {
             "body": body,
@@ -144,6 +421,13 @@ class GitHubSCM(BaseSCM):
         self._request("POST", f"repos/{repo_id}/pulls/{pr_id}/comments", json=data)
         return True
 
+    def post_commit_comment(self, repo_id: str, commit_sha: str, body: str) -> bool:
+        """
+        Post a general comment on a commit.
+        """
+        self._request("POST", f"repos/{repo_id}/commits/{commit_sha}/comments", json={"body": body})
+        return True
+
     def post_commit_inline_comment(self, repo_id: str, commit_sha: str, file: str, line: int, body: str) -> bool:
         """
         Post a comment on a specific line of a commit.
@@ -157,18 +441,19 @@ class GitHubSCM(BaseSCM):
         self._request("POST", f"repos/{repo_id}/commits/{commit_sha}/comments", json=data)
         return True
 
-    def get_pull_request_comments(self, repo_id: str, pr_id: int) -> list[dict]:
+    def get_pull_request_comments(self, repo_id: str, pr_id: int, since: str = None) -> list[dict]:
         """
-        Fetch all inline comments on a pull request.
+        Fetch all inline comments on a pull request, or only those updated after since.
         """
-        endpoint = f"repos/{repo_id}/pulls/{pr_id}/comments"
-        response = self._request("GET", endpoint)
-        return response.json()
+        return self._paginate(f"repos/{repo_id}/pulls/{pr_id}/comments", {"since": since} if since else None)
 
     def get_function_content(self, repo_id: str, file_path: str, function_name: str) -> str:
         """
         Fetch the full content of a specific function or class.
         """
-        content = self.get_file_content(repo_id, file_path)
+        try:
+            content = self.get_file_content(repo_id, file_path)
+        except FileTooLargeError as e:
+            return f"File is too large for function extraction: {e}"
         return extract_function_content(content, file_path, function_name)
 
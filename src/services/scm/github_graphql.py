@@ -0,0 +1,140 @@
+import logging
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+# GitHub rejects queries that could return more than 500,000 nodes
+GRAPHQL_MAX_NODES = 500_000
+# ... and any connection asking for more than 100 items
+GRAPHQL_MAX_FIRST = 100
+
+PULL_REQUEST_SNAPSHOT_QUERY = """
+query PullRequestSnapshot(
+  $owner: String!, $name: String!, $number: Int!,
+  $withFiles: Boolean!, $filesFirst: Int!, $filesAfter: String,
+  $withThreads: Boolean!, $threadsFirst: Int!, $threadsAfter: String, $commentsFirst: Int!
+) {
+  rateLimit { cost remaining }
+  repository(owner: $owner, name: $name) {
+    pullRequest(number: $number) {
+      number
+      isDraft
+      changedFiles
+      baseRefName
+      baseRefOid
+      headRefName
+      headRefOid
+      files(first: $filesFirst, after: $filesAfter) @include(if: $withFiles) {
+        pageInfo { hasNextPage endCursor }
+        nodes { path additions deletions changeType }
+      }
+      reviewThreads(first: $threadsFirst, after: $threadsAfter) @include(if: $withThreads) {
+        totalCount
+        pageInfo { hasNextPage endCursor }
+        nodes {
+          isResolved
+          isOutdated
+          path
+          line
+          originalLine
+          comments(first: $commentsFirst) {
+            nodes { databaseId body updatedAt author { login } }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+# GraphQL changeType -> REST /files status
+CHANGE_TYPES = {
+    "ADDED": "added",
+    "DELETED": "removed",
+    "MODIFIED": "modified",
+    "RENAMED": "renamed",
+    "COPIED": "copied",
+    "CHANGED": "changed"
+}
+
+@dataclass
+class QueryPlan:
+    files_first: int
+    threads_first: int
+    comments_first: int
+
+    @property
+    def nodes(self) -> int:
+        """Worst-case node count as GitHub computes it (nested connections multiply)."""
+        return self.files_first + self.threads_first + self.threads_first * self.comments_first
+
+    @property
+    def cost(self) -> int:
+        """
+        Rate-limit points: one request per connection (each thread's comments is its own),
+        divided by 100 and rounded, minimum 1.
+        """
+        requests = (1 if self.files_first else 0) + (1 if self.threads_first else 0) + self.threads_first
+        return max(1, round(requests / 100))
+
+class GraphQLQueryPlanner:
+    """
+    Sizes the connections of the PR snapshot query so every query stays under
+    GitHub's node limit and a target rate-limit cost. Follow-up pages only ask
+    for connections that still have items left, sized to what remains.
+    """
+    def __init__(self, comments_per_thread: int, max_cost: int = 1, max_nodes: int = GRAPHQL_MAX_NODES):
+        self.comments_per_thread = max(1, min(comments_per_thread, GRAPHQL_MAX_FIRST))
+        self.max_cost = max_cost
+        self.max_nodes = max_nodes
+
+    def plan(self, files_remaining: int = None, threads_remaining: int = None) -> QueryPlan:
+        """None means unknown (first page); 0 means the connection is exhausted."""
+        files = GRAPHQL_MAX_FIRST if files_remaining is None else min(files_remaining, GRAPHQL_MAX_FIRST)
+        threads = GRAPHQL_MAX_FIRST if threads_remaining is None else min(threads_remaining, GRAPHQL_MAX_FIRST)
+        plan = QueryPlan(files, threads, self.comments_per_thread if threads else 0)
+
+        # Fewer threads per page keeps both the per-thread comment requests and nodes in budget
+        while plan.threads_first > 1 and (plan.cost > self.max_cost or plan.nodes > self.max_nodes):
+            plan.threads_first -= 1
+        while plan.comments_first > 1 and plan.nodes > self.max_nodes:
+            plan.comments_first -= 1
+        return plan
+
+def snapshot_from_pages(pages: list[dict]) -> dict:
+    """
+    Merges the pullRequest objects of all snapshot pages into REST-shaped data:
+    {"pull_request": {...}, "files": [...], "comments": [...]}.
+    """
+    first = pages[0]
+    pull_request = {
+        "number": first["number"],
+        "draft": first["isDraft"],
+        "changed_files": first["changedFiles"],
+        "base": {"ref": first["baseRefName"], "sha": first["baseRefOid"]},
+        "head": {"ref": first["headRefName"], "sha": first["headRefOid"]}
+    }
+    files = []
+    comments = []
+    for page in pages:
+        for node in (page.get("files") or {}).get("nodes", []):
+            files.append({
+                "filename": node["path"],
+                "status": CHANGE_TYPES.get(node["changeType"], "modified"),
+                "additions": node["additions"],
+                "deletions": node["deletions"],
+                "changes": node["additions"] + node["deletions"]
+            })
+        for thread in (page.get("reviewThreads") or {}).get("nodes", []):
+            for comment in thread["comments"]["nodes"]:
+                comments.append({
+                    "id": comment.get("databaseId"),
+                    "path": thread["path"],
+                    "line": thread["line"] or thread["originalLine"],
+                    "body": comment["body"],
+                    "user": {"login": (comment.get("author") or {}).get("login")},
+                    "updated_at": comment.get("updatedAt"),
+                    "resolved": thread["isResolved"],
+                    "outdated": thread["isOutdated"]
+                })
+    return {"pull_request": pull_request, "files": files, "comments": comments}
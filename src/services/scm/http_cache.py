@@ -0,0 +1,70 @@
+import json
+import requests
+from requests.structures import CaseInsensitiveDict
+from src.config import settings
+from src.utils.cache_backends import get_cache
+
+# Response headers replayed on a 304 (Link keeps pagination working from cache)
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Link")
+
+class CachedResponse:
+    def __init__(self, content: bytes, encoding: str, headers: dict):
+        self.content = content
+        self.encoding = encoding
+        self.headers = headers
+
+    @classmethod
+    def from_response(cls, response: requests.Response) -> "CachedResponse":
+        headers = {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers}
+        return cls(response.content, response.encoding, headers)
+
+    def to_dict(self) -> dict:
+        return {"content": self.content, "encoding": self.encoding, "headers": self.headers}
+
+    def validators(self) -> dict:
+        """Conditional-request headers for revalidating this entry."""
+        headers = {}
+        if "ETag" in self.headers:
+            headers["If-None-Match"] = self.headers["ETag"]
+        if "Last-Modified" in self.headers:
+            headers["If-Modified-Since"] = self.headers["Last-Modified"]
+        return headers
+
+    def to_response(self, not_modified: requests.Response) -> requests.Response:
+        """Rebuilds a 200 response from the cached body for a 304 revalidation."""
+        response = requests.Response()
+        response.status_code = 200
+        response._content = self.content
+        response.encoding = self.encoding
+        response.headers = CaseInsensitiveDict({**self.headers, **not_modified.headers})
+        response.url = not_modified.url
+        response.request = not_modified.request
+        return response
+
+class ConditionalRequestCache:
+    """
+    Stores ETag/Last-Modified validators and bodies of GitHub GET responses so
+    repeat reads can be revalidated with If-None-Match (GitHub doesn't count 304s
+    against the rate limit).
+    """
+    def __init__(self, max_entries: int, max_body_bytes: int):
+        # Entries never go stale on their own: a 304 proves them current
+        self._store = get_cache("github_http", max_entries)
+        self.max_body_bytes = max_body_bytes
+
+    @staticmethod
+    def key(token_key: str, url: str, params: dict, accept: str) -> str:
+        return json.dumps([token_key, url, sorted((params or {}).items()), accept], default=str)
+
+    def get(self, key: str) -> CachedResponse | None:
+        entry = self._store.get(key)
+        return CachedResponse(**entry) if entry else None
+
+    def store(self, key: str, response: requests.Response):
+        if "ETag" not in response.headers and "Last-Modified" not in response.headers:
+            return
+        if len(response.content) > self.max_body_bytes:
+            return
+        self._store.set(key, CachedResponse.from_response(response).to_dict())
+
+http_cache = ConditionalRequestCache(settings.github_http_cache_max_entries, settings.max_file_fetch_bytes)
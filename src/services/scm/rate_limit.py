@@ -0,0 +1,113 @@
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class RateLimitState:
+    limit: int
+    remaining: int
+    reset: float  # epoch seconds
+
+class RateLimitExhausted(Exception):
+    """Raised when the rate limit resets further out than we're willing to wait."""
+    def __init__(self, resource: str, wait: float):
+        self.resource = resource
+        self.wait = wait
+        super().__init__(f"GitHub {resource} rate limit exhausted, resets in {wait:.0f}s")
+
+def token_key(token: str) -> str:
+    """Stable identifier for a token that doesn't keep the token itself around."""
+    return hashlib.sha256((token or "").encode()).hexdigest()[:12]
+
+class RateLimitGovernor:
+    """
+    Process-wide view of GitHub's rate limits per (token, resource), fed from
+    X-RateLimit-* response headers. Before each request it decides how long to wait:
+    - below GITHUB_RATE_LIMIT_SLOWDOWN, requests are paced evenly until the reset,
+    - below GITHUB_RATE_LIMIT_RESERVE, low-priority work (push reviews, drafts) waits
+      for the reset so the remainder is kept for PR reviews,
+    - at zero, everyone waits for the reset (up to GITHUB_RATE_LIMIT_MAX_WAIT).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: dict[tuple[str, str], RateLimitState] = {}
+
+    def update(self, key: str, headers) -> None:
+        try:
+            resource = headers.get("X-RateLimit-Resource", "core")
+            state = RateLimitState(
+                int(headers["X-RateLimit-Limit"]),
+                int(headers["X-RateLimit-Remaining"]),
+                float(headers["X-RateLimit-Reset"])
+            )
+        except (KeyError, ValueError):
+            return
+        with self._lock:
+            self._states[(key, resource)] = state
+
+    def delay(self, key: str, resource: str, priority: str = "normal") -> tuple[float, bool]:
+        """
+        Seconds to wait before the next request, and whether that is a wait for the
+        reset (True) or just pacing (False). Reserves one request of budget.
+        """
+        with self._lock:
+            state = self._states.get((key, resource))
+            now = time.time()
+            if state is None or state.reset <= now:
+                return 0.0, False
+            until_reset = state.reset - now + 1
+            if state.remaining <= 0:
+                return until_reset, True
+            if priority == "low" and state.remaining <= settings.github_rate_limit_reserve:
+                return until_reset, True
+            # Count this request now so concurrent callers don't all see the same budget
+            state.remaining -= 1
+            if state.remaining < settings.github_rate_limit_slowdown:
+                return until_reset / max(state.remaining, 1), False
+            return 0.0, False
+
+    def acquire(self, key: str, resource: str, priority: str = "normal") -> None:
+        """Blocks until a request may be sent, or raises RateLimitExhausted."""
+        wait, until_reset = self.delay(key, resource, priority)
+        if wait <= 0:
+            return
+        if until_reset:
+            if wait > settings.github_rate_limit_max_wait:
+                raise RateLimitExhausted(resource, wait)
+            logger.info(f"GitHub {resource} rate limit low, waiting {wait:.0f}s for the reset ({priority} priority)")
+        else:
+            # Pacing never stalls a request for longer than a reset wait would
+            wait = min(wait, settings.github_rate_limit_max_wait)
+        time.sleep(wait)
+
+    @staticmethod
+    def retry_after(response) -> float | None:
+        """Seconds until a rate-limited (403/429) response can be retried, else None."""
+        if response.status_code not in (403, 429):
+            return None
+        if "Retry-After" in response.headers:
+            # Secondary (abuse) limits
+            try:
+                return float(response.headers["Retry-After"])
+            except ValueError:
+                return None
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            try:
+                return max(float(response.headers["X-RateLimit-Reset"]) - time.time(), 0) + 1
+            except (KeyError, ValueError):
+                return None
+        return None
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            return [
+                {"token": key, "resource": resource, "limit": s.limit, "remaining": s.remaining, "reset": s.reset}
+                for (key, resource), s in self._states.items()
+            ]
+
+rate_limit_governor = RateLimitGovernor()
@@ -1,6 +1,6 @@
-
 import logging
-from src.code_parser.tree_sitter_parser import UniversalParser
+from src.code_parser.tree_sitter_parser import UniversalParser, SemanticCursor
+from src.code_parser.language import language_registry
 
 logger = logging.getLogger(__name__)
 
@@ -17,34 +17,67 @@ class SemanticFilter:
         Returns True if the change between old and new content is semantic.
         Returns False if it's only comments or whitespace.
         """
-        language = self._get_language_from_filename(filename)
+        if old_content == new_content:
+            return False
+
+        language = language_registry.language_for_path(filename)
         if not language:
             # If we don't support the language, assume it's semantic to be safe
             return True
-            
-        old_tokens = self.parser.get_semantic_tokens(old_content, language)
-        new_tokens = self.parser.get_semantic_tokens(new_content, language)
-        
-        # If both fail to parse (empty tokens), we can't be sure, so assume semantic
-        if not old_tokens and not new_tokens and old_content.strip() != new_content.strip():
+
+        try:
+            old_tree, old_source = self.parser.parse(old_content, language)
+            new_tree, new_source = self.parser.parse(new_content, language)
+            differs, saw_tokens = self._compare_trees(
+                SemanticCursor(old_tree, old_source),
+                SemanticCursor(new_tree, new_source)
+            )
+        except Exception as e:
+            logger.warning(f"Semantic comparison failed for {filename}: {e}")
             return True
-            
-        return old_tokens != new_tokens
-
-    def _get_language_from_filename(self, filename: str) -> str:
-        """Maps file extensions to tree-sitter language names."""
-        ext = filename.split('.')[-1].lower()
-        mapping = {
-            'py': 'python',
-            'js': 'javascript',
-            'ts': 'typescript',
-            'tsx': 'tsx',
-            'go': 'go',
-            'java': 'java',
-            'rs': 'rust',
-            'cpp': 'cpp',
-            'cc': 'cpp',
-            'c': 'c',
-            'rb': 'ruby'
-        }
-        return mapping.get(ext)
+
+        # If neither side yields tokens, we can't be sure, so assume semantic
+        if not saw_tokens and old_content.strip() != new_content.strip():
+            return True
+
+        return differs
+
+    @staticmethod
+    def _compare_trees(old: SemanticCursor, new: SemanticCursor) -> tuple[bool, bool]:
+        """
+        Walks both trees in lockstep and stops at the first differing token.
+        Subtrees with the same type and identical bytes at the same depth are skipped without descending.
+        Tokens must also match in depth: in Python an indentation change moves a
+        statement into another block without changing a single token.
+        Returns (differs, saw_tokens).
+        """
+        saw_tokens = False
+        while not old.done and not new.done:
+            old_node, new_node = old.node, new.node
+
+            if (old.depth == new.depth
+                    and old_node.type == new_node.type
+                    and old_node.end_byte - old_node.start_byte == new_node.end_byte - new_node.start_byte
+                    and old.text() == new.text()):
+                old.skip()
+                new.skip()
+                saw_tokens = True
+                continue
+
+            old_leaf, new_leaf = old.is_leaf(), new.is_leaf()
+            if old_leaf and new_leaf:
+                if old.depth != new.depth or old.token() != new.token():
+                    return True, True
+                old.skip()
+                new.skip()
+                saw_tokens = True
+                continue
+
+            # Structure differs (e.g. a comment regrouped nodes): descend until leaves line up
+            if not old_leaf:
+                old.descend()
+            if not new_leaf:
+                new.descend()
+
+        # One side still has tokens left over
+        return old.done != new.done, saw_tokens or not (old.done and new.done)
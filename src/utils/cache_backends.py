@@ -0,0 +1,371 @@
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from urllib.parse import urlparse
+from src.config import settings
+from src.utils.serialization import SerializationError, dumps, loads
+from src.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Reads buffered per SQLiteCache before their accessed_at updates are written on their own
+TOUCH_BATCH_SIZE = 256
+
+_MISSING = object()
+
+def _decode(namespace: str, key: str, blob: bytes, default):
+    """An undecodable value (e.g. written by a worker with other libraries) is a cache miss."""
+    try:
+        return loads(blob)
+    except SerializationError as e:
+        logger.warning(f"Cache {namespace}: ignoring unreadable value for {key}: {e}")
+        return default
+
+class CacheBackend(ABC):
+    """
+    Key/value cache shared by the SCM and agent layers. Keys are strings, values
+    anything src.utils.serialization can encode. ttl_seconds=None means no expiry.
+    """
+    @abstractmethod
+    def get(self, key: str, default=None):
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value, ttl_seconds: float = None):
+        pass
+
+    @abstractmethod
+    def add_if_absent(self, key: str, value=True, ttl_seconds: float = None) -> bool:
+        """Stores key unless a live entry exists. Returns True if it was added."""
+        pass
+
+    @abstractmethod
+    def delete(self, key: str):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+class MemoryCache(CacheBackend):
+    """In-process LRU/TTL cache. Fastest, but private to one worker process."""
+    def __init__(self, namespace: str, max_entries: int, ttl_seconds: float = None):
+        self.namespace = namespace
+        self._store = TTLCache(ttl_seconds or float("inf"), max_entries)
+
+    def get(self, key: str, default=None):
+        return self._store.get(key, default)
+
+    def set(self, key: str, value, ttl_seconds: float = None):
+        self._store.set(key, value, ttl_seconds)
+
+    def add_if_absent(self, key: str, value=True, ttl_seconds: float = None) -> bool:
+        return self._store.add_if_absent(key, value, ttl_seconds)
+
+    def delete(self, key: str):
+        self._store.pop(key)
+
+    def clear(self):
+        self._store.clear()
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+class SQLiteCache(CacheBackend):
+    """
+    Cache in a local SQLite file (WAL mode), shared by every worker process on a host.
+    Expired rows are ignored on read and pruned, then least recently read first once
+    the table is full. Reads don't write: their access times are buffered and saved
+    with the next write (or every TOUCH_BATCH_SIZE reads), so readers in different
+    processes don't contend for the WAL write lock.
+    """
+    def __init__(self, namespace: str, path: str, max_entries: int, ttl_seconds: float = None):
+        self.namespace = namespace
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._writes = 0
+        self._touched = {}  # key -> last read time, not yet saved
+        self._touch_lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    expires_at REAL,
+                    accessed_at REAL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_lru ON cache (namespace, accessed_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets readers in other processes run alongside a writer
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _expiry(self, ttl_seconds: float = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        return time.time() + ttl if ttl and ttl != float("inf") else None
+
+    def get(self, key: str, default=None):
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            return default
+        value = _decode(self.namespace, key, row[0], _MISSING)
+        if value is _MISSING:
+            return default
+        with self._touch_lock:
+            self._touched[key] = now
+            full = len(self._touched) >= TOUCH_BATCH_SIZE
+        if full:
+            with conn:
+                self._save_touched(conn)
+        return value
+
+    def _save_touched(self, conn: sqlite3.Connection):
+        """Writes buffered read times; call inside a write transaction."""
+        with self._touch_lock:
+            touched, self._touched = self._touched, {}
+        if touched:
+            # A row rewritten since it was read keeps its newer time
+            conn.executemany(
+                "UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ? AND accessed_at < ?",
+                [(read_at, self.namespace, key, read_at) for key, read_at in touched.items()]
+            )
+
+    def set(self, key: str, value, ttl_seconds: float = None):
+        conn = self._connect()
+        with conn:
+            self._save_touched(conn)
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, dumps(value), self._expiry(ttl_seconds), time.time())
+            )
+        self._maybe_prune()
+
+    def add_if_absent(self, key: str, value=True, ttl_seconds: float = None) -> bool:
+        conn = self._connect()
+        with conn:
+            self._save_touched(conn)
+            # Replace only an expired row; a live one makes the insert a no-op
+            conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND key = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+                (self.namespace, key, time.time())
+            )
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO cache (namespace, key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, dumps(value), self._expiry(ttl_seconds), time.time())
+            )
+        self._maybe_prune()
+        return cursor.rowcount == 1
+
+    def delete(self, key: str):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+
+    def clear(self):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+
+    def _maybe_prune(self):
+        self._writes += 1
+        if self._writes % 100:
+            return
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+                (self.namespace, time.time())
+            )
+            conn.execute(
+                """
+                DELETE FROM cache WHERE namespace = ? AND rowid IN (
+                    SELECT rowid FROM cache WHERE namespace = ? ORDER BY accessed_at DESC, rowid DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.namespace, self.namespace, self.max_entries)
+            )
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.namespace,)).fetchone()[0]
+
+class RedisProtocolError(Exception):
+    pass
+
+class RedisUnavailable(ConnectionError):
+    """Raised without touching the network while a failed server is cooling down."""
+    pass
+
+class _RESPConnection:
+    """Minimal RESP2 client: enough for GET/SET/DEL/SCAN against Redis or a compatible server."""
+    def __init__(self, host: str, port: int, password: str = None, db: int = 0, timeout: float = None):
+        timeout = settings.cache_redis_timeout if timeout is None else timeout
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.reader = self.sock.makefile("rb")
+        if password:
+            self.execute("AUTH", password)
+        if db:
+            self.execute("SELECT", db)
+
+    def execute(self, *args):
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        self.sock.sendall(b"".join(parts))
+        return self._read()
+
+    def _read(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise RedisProtocolError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(rest)
+            return None if count < 0 else [self._read() for _ in range(count)]
+        raise RedisProtocolError(f"Unexpected reply: {line!r}")
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+class RedisCache(CacheBackend):
+    """
+    Cache on a Redis-protocol server, shared across hosts and containers.
+    Keys are prefixed with the namespace; expiry uses Redis' own PX.
+
+    After a failed connection the server is skipped for CACHE_REDIS_COOLDOWN
+    seconds, so an outage costs one connect timeout rather than one per call.
+    """
+    def __init__(self, namespace: str, url: str, ttl_seconds: float = None, cooldown_seconds: float = None):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.cooldown_seconds = settings.cache_redis_cooldown if cooldown_seconds is None else cooldown_seconds
+        self._down_until = 0.0
+        parsed = urlparse(url)
+        self._address = (parsed.hostname or "localhost", parsed.port or 6379)
+        self._password = parsed.password
+        self._db = int(parsed.path.lstrip("/") or 0)
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _key(self, key: str) -> str:
+        return f"pr-pilot:{self.namespace}:{key}"
+
+    def _execute(self, *args):
+        with self._lock:
+            if time.monotonic() < self._down_until:
+                raise RedisUnavailable(f"{self._address[0]}:{self._address[1]} is cooling down after a failure")
+            for attempt in range(2):
+                fresh = self._conn is None
+                try:
+                    if fresh:
+                        self._conn = _RESPConnection(*self._address, password=self._password, db=self._db)
+                    return self._conn.execute(*args)
+                except (OSError, ConnectionError):
+                    if self._conn:
+                        self._conn.close()
+                    self._conn = None
+                    # A stale connection (e.g. the server restarted) gets one reconnect;
+                    # a failed connect means the server is down, so stop trying for a while
+                    if attempt or fresh:
+                        self._down_until = time.monotonic() + self.cooldown_seconds
+                        raise
+
+    def _expiry_args(self, ttl_seconds: float = None) -> tuple:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        return ("PX", max(int(ttl * 1000), 1)) if ttl and ttl != float("inf") else ()
+
+    def _try(self, default, *args):
+        # A cache outage must not fail reviews: reads miss and writes are dropped
+        try:
+            return self._execute(*args)
+        except RedisUnavailable:
+            return default
+        except (OSError, ConnectionError, RedisProtocolError) as e:
+            logger.warning(f"Redis cache {self.namespace} unavailable: {e}")
+            return default
+
+    def get(self, key: str, default=None):
+        blob = self._try(None, "GET", self._key(key))
+        return default if blob is None else _decode(self.namespace, key, blob, default)
+
+    def set(self, key: str, value, ttl_seconds: float = None):
+        self._try(None, "SET", self._key(key), dumps(value), *self._expiry_args(ttl_seconds))
+
+    def add_if_absent(self, key: str, value=True, ttl_seconds: float = None) -> bool:
+        return self._try("OK", "SET", self._key(key), dumps(value), "NX", *self._expiry_args(ttl_seconds)) == "OK"
+
+    def delete(self, key: str):
+        self._try(None, "DEL", self._key(key))
+
+    def clear(self):
+        cursor = "0"
+        while True:
+            cursor, keys = self._execute("SCAN", cursor, "MATCH", self._key("*"), "COUNT", 500)
+            if keys:
+                self._execute("DEL", *keys)
+            cursor = cursor.decode() if isinstance(cursor, bytes) else cursor
+            if cursor == "0":
+                break
+
+_caches: dict[str, CacheBackend] = {}
+_caches_lock = threading.Lock()
+
+def get_cache(namespace: str, max_entries: int, ttl_seconds: float = None) -> CacheBackend:
+    """
+    Returns the process-wide cache for a namespace on the configured CACHE_BACKEND
+    (memory | sqlite | redis). max_entries bounds the memory and sqlite backends;
+    Redis relies on its own maxmemory policy.
+    """
+    with _caches_lock:
+        if namespace not in _caches:
+            backend = settings.cache_backend.lower()
+            if backend == "sqlite":
+                _caches[namespace] = SQLiteCache(namespace, settings.cache_sqlite_path, max_entries, ttl_seconds)
+            elif backend == "redis":
+                _caches[namespace] = RedisCache(namespace, settings.cache_redis_url, ttl_seconds)
+            else:
+                if backend != "memory":
+                    logger.warning(f"Unknown CACHE_BACKEND {backend!r}, using memory")
+                _caches[namespace] = MemoryCache(namespace, max_entries, ttl_seconds)
+        return _caches[namespace]
@@ -0,0 +1,124 @@
+import re
+from typing import Generator, Iterable, Dict, Any
+
+DIFF_GIT_RE = re.compile(r'^diff --git a/(.*) b/(.*)$')
+
+def _strip_prefix(path: str) -> str | None:
+    """Turns '--- a/x' / '+++ b/x' paths into repo paths (None for /dev/null)."""
+    path = path.split("\t", 1)[0].strip()
+    if path.startswith('"') and path.endswith('"'):
+        # git C-quotes unusual paths, with non-ASCII bytes as octal escapes
+        path = path[1:-1].encode("ascii", "replace").decode("unicode_escape").encode("latin-1").decode("utf-8", "replace")
+    if path == "/dev/null":
+        return None
+    if path[:2] in ("a/", "b/"):
+        return path[2:]
+    return path
+
+def iter_byte_lines(chunks: Iterable[bytes]) -> Generator[bytes, None, None]:
+    """
+    Splits a streamed body into lines on b"\n" only.
+    requests' iter_lines(delimiter=...) yields a spurious b"" whenever a chunk ends on
+    the delimiter, and without one it also splits on \r, \f and other characters a
+    diff line may legitimately contain.
+    """
+    pending = b""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+class _FileDiff:
+    def __init__(self, header: re.Match):
+        self.old_path = header.group(1) if header else None
+        self.new_path = header.group(2) if header else None
+        self.status = "modified"
+        self.patch_lines = []
+        self.additions = 0
+        self.deletions = 0
+        self.binary = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        filename = self.new_path if self.status != "removed" else self.old_path
+        entry = {
+            "filename": filename,
+            "status": self.status,
+            "additions": self.additions,
+            "deletions": self.deletions,
+            "changes": self.additions + self.deletions
+        }
+        # Same shape as GitHub's /files entries: binary files have no patch
+        if self.patch_lines:
+            entry["patch"] = "\n".join(self.patch_lines)
+        if self.status == "renamed":
+            entry["previous_filename"] = self.old_path
+        return entry
+
+def split_unified_diff(lines: Iterable[str]) -> Generator[Dict[str, Any], None, None]:
+    """
+    Splits a multi-file unified diff (git format) into per-file entries while
+    streaming, so only one file's patch is held in memory at a time.
+    Yields dicts shaped like GitHub's /files entries (filename, status, patch, ...).
+    """
+    current = None
+    in_hunks = False
+
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", "replace")
+        line = line.rstrip("\r\n")
+
+        if line.startswith("diff --git "):
+            if current:
+                yield current.to_dict()
+            current = _FileDiff(DIFF_GIT_RE.match(line))
+            in_hunks = False
+            continue
+
+        if current is None:
+            # Commit message / preamble before the first file
+            continue
+
+        if not in_hunks:
+            if line.startswith("@@"):
+                in_hunks = True
+            elif line.startswith("new file mode"):
+                current.status = "added"
+                continue
+            elif line.startswith("deleted file mode"):
+                current.status = "removed"
+                continue
+            elif line.startswith("rename from "):
+                current.status = "renamed"
+                current.old_path = line[len("rename from "):]
+                continue
+            elif line.startswith("rename to "):
+                current.new_path = line[len("rename to "):]
+                continue
+            elif line.startswith("--- "):
+                old = _strip_prefix(line[4:])
+                current.old_path = old or current.old_path
+                continue
+            elif line.startswith("+++ "):
+                new = _strip_prefix(line[4:])
+                current.new_path = new or current.new_path
+                continue
+            elif line.startswith("Binary files ") or line == "GIT binary patch":
+                current.binary = True
+                continue
+            else:
+                # index/mode/similarity lines
+                continue
+
+        if line.startswith("+"):
+            current.additions += 1
+        elif line.startswith("-"):
+            current.deletions += 1
+        current.patch_lines.append(line)
+
+    if current:
+        yield current.to_dict()
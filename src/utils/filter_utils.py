@@ -1,34 +1,90 @@
 import os
+import re
 from src.config import settings
 
-def should_review_file(file_path: str) -> bool:
+def glob_to_regex(pattern: str) -> str:
     """
-    Determines if a file should be reviewed by the LLM based on semantic filtering rules.
+    Translates a gitignore-style glob into a regex over '/'-separated paths.
+    - Patterns without a '/' match at any depth (e.g. '*.pb.go', 'node_modules').
+    - A leading or inner '/' anchors the pattern to the repository root.
+    - A trailing '/' only matches directories.
+    - '**' matches across directories, '*' and '?' stay within one path segment.
     """
-    # 1. Check for ignored extensions
-    _, ext = os.path.splitext(file_path)
-    ignored_extensions = [e.strip().lower() for e in settings.ignored_extensions.split(",")]
-    if ext.lower() in ignored_extensions:
-        return False
-
-    # 2. Check for ignored filenames
-    filename = os.path.basename(file_path)
-    ignored_files = [f.strip().lower() for f in settings.ignored_files.split(",")]
-    if filename.lower() in ignored_files:
-        return False
-
-    # 3. Check for ignored directories
-    path_parts = file_path.split(os.sep)
-    # Also handle forward slash for git paths
-    if '/' in file_path:
-        path_parts = file_path.split('/')
-        
-    ignored_directories = [d.strip().lower() for d in settings.ignored_directories.split(",")]
-    for part in path_parts:
-        if part.lower() in ignored_directories:
+    directory_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 1:]:
+            end = pattern.index("]", i + 1)
+            parts.append("[" + pattern[i + 1:end].replace("!", "^", 1) + "]")
+            i = end + 1
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+
+    prefix = "" if anchored else "(?:.*/)?"
+    # A match on a directory also covers everything underneath it
+    suffix = "/.*" if directory_only else "(?:/.*)?"
+    return f"{prefix}{''.join(parts)}{suffix}"
+
+def compile_globs(patterns: list[str], ignore_case: bool = False) -> re.Pattern | None:
+    """Compiles a list of globs into a single alternation regex (None if empty)."""
+    regexes = [glob_to_regex(p) for p in patterns if p]
+    if not regexes:
+        return None
+    flags = re.IGNORECASE if ignore_case else 0
+    return re.compile("|".join(f"(?:{r})" for r in regexes), flags)
+
+class PathMatcher:
+    """
+    Compiled ignore rules: all patterns are folded into a few combined regexes
+    so each path is checked in a single pass.
+    Negated patterns ('!path') re-include paths excluded by the other rules.
+    """
+    def __init__(self, patterns: list[str], case_insensitive_patterns: list[str] = None):
+        include = [p[1:] for p in patterns if p.startswith("!")]
+        exclude = [p for p in patterns if p and not p.startswith("!")]
+        self._exclude = compile_globs(exclude)
+        self._include = compile_globs(include)
+        self._exclude_nocase = compile_globs(case_insensitive_patterns or [], ignore_case=True)
+
+    def is_ignored(self, file_path: str) -> bool:
+        path = file_path.replace(os.sep, "/").lstrip("/")
+        if self._include and self._include.fullmatch(path):
             return False
+        if self._exclude and self._exclude.fullmatch(path):
+            return True
+        return bool(self._exclude_nocase and self._exclude_nocase.fullmatch(path))
+
+    def filter(self, file_paths: list[str]) -> list[str]:
+        """Returns the paths that are not ignored."""
+        return [p for p in file_paths if not self.is_ignored(p)]
 
-    # 4. Filter out binary files (basic check)
-    # (Optional: specialized checks can be added here)
+def settings_ignore_patterns() -> list[str]:
+    """
+    Expresses the global IGNORED_* settings as globs.
+    Extensions and file names match at any depth; directory names match any path segment.
+    """
+    def split(value: str) -> list[str]:
+        return [v.strip() for v in value.split(",") if v.strip()]
 
-    return True
+    patterns = [f"*{ext}" for ext in split(settings.ignored_extensions)]
+    patterns += split(settings.ignored_files)
+    patterns += split(settings.ignored_directories)
+    return patterns
@@ -0,0 +1,140 @@
+import math
+import re
+import threading
+from collections import Counter
+from src.utils.filter_utils import PathMatcher
+
+# Well-known generated / vendored / minified path conventions
+GENERATED_PATH_PATTERNS = [
+    "*.min.js", "*.min.css", "*.min.mjs", "*.bundle.js", "*.chunk.js",
+    "*_pb2.py", "*_pb2_grpc.py", "*.pb.go", "*.pb.gw.go", "*.pb.cc", "*.pb.h", "*_grpc.pb.go",
+    "*.generated.*", "*.g.dart", "*.freezed.dart", "*_generated.go", "zz_generated.*",
+    "vendor/", "dist/", "__generated__/",
+]
+
+# Markers emitted by code generators in the first lines of a file. Each one has to
+# open its line (after comment/docstring punctuation), so prose that merely mentions
+# "auto-generated" or "do not edit" in a hand-written file doesn't match.
+GENERATED_HEADER_RE = re.compile(
+    r"^\W*(?:note:\s*)?(?:"
+    r"code generated\b.*\bdo not edit"
+    r"|@generated\b"
+    r"|generated by (?:the protocol buffer compiler|swagger|openapi[- ]generator)"
+    r"|generated (?:by|from)\b"
+    r"|(?:this (?:file|class|code) (?:is|was|has been) (?:auto-?\s?|automatically\s)?|auto-?\s?|automatically\s)"
+    r"generated\b(?: by\b| from\b| code\b| file\b|[.,;:!]|\W*$)"
+    r"|do not (?:edit|modify)(?: this file)?(?: manually| by hand)?\W*$"
+    r")",
+    re.IGNORECASE
+)
+HEADER_SCAN_LINES = 15
+
+# Minified / encoded content heuristics, computed over added lines only
+MINIFIED_AVG_LINE_LENGTH = 200
+MINIFIED_MIN_CHARS = 2000
+HIGH_ENTROPY_BITS = 5.5
+HIGH_ENTROPY_MAX_WHITESPACE = 0.05
+
+def parse_gitattributes(content: str) -> PathMatcher | None:
+    """
+    Builds a matcher for paths marked linguist-generated or linguist-vendored
+    in a .gitattributes file. Unset/false attributes re-include a path.
+    """
+    patterns = []
+    for line in content.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        path, *attrs = line.split()
+        for attr in attrs:
+            name, _, value = attr.lstrip("-!").partition("=")
+            if name not in ("linguist-generated", "linguist-vendored"):
+                continue
+            if attr.startswith(("-", "!")) or value == "false":
+                patterns.append(f"!{path}")
+            else:
+                patterns.append(path)
+    return PathMatcher(patterns) if patterns else None
+
+def shannon_entropy(text: str) -> float:
+    """Bits per character."""
+    if not text:
+        return 0.0
+    counts = Counter(text)
+    total = len(text)
+    return -sum(c / total * math.log2(c / total) for c in counts.values())
+
+class GeneratedFileDetector:
+    """
+    Flags generated, vendored and minified files using only the /files metadata
+    and patch text, so they can be dropped before any content fetch or LLM call.
+    """
+    def __init__(self, gitattributes: PathMatcher | None = None):
+        self.gitattributes = gitattributes
+        self.path_matcher = PathMatcher(GENERATED_PATH_PATTERNS)
+
+    def detect(self, file_diff: dict) -> str | None:
+        """Returns the name of the heuristic that matched, or None."""
+        filename = file_diff.get("filename", "")
+        patch = file_diff.get("patch") or ""
+
+        if self.gitattributes and self.gitattributes.is_ignored(filename):
+            return "gitattributes"
+        if self.path_matcher.is_ignored(filename):
+            return "path_pattern"
+
+        header_lines, added_lines = self._split_patch(patch)
+        if any(GENERATED_HEADER_RE.search(line) for line in header_lines):
+            return "generated_header"
+
+        added_text = "\n".join(added_lines)
+        if len(added_text) >= MINIFIED_MIN_CHARS:
+            if len(added_text) / len(added_lines) >= MINIFIED_AVG_LINE_LENGTH:
+                return "minified"
+            whitespace = sum(1 for ch in added_text if ch.isspace()) / len(added_text)
+            if whitespace <= HIGH_ENTROPY_MAX_WHITESPACE and shannon_entropy(added_text) >= HIGH_ENTROPY_BITS:
+                return "high_entropy"
+        return None
+
+    @staticmethod
+    def _split_patch(patch: str) -> tuple[list[str], list[str]]:
+        """
+        Returns (lines at the top of the file, added lines).
+        Header lines are only known when a hunk starts at line 1 of the new file.
+        """
+        header_lines = []
+        added_lines = []
+        in_file_head = False
+        for line in patch.splitlines():
+            if line.startswith("@@"):
+                in_file_head = bool(re.match(r"^@@ -\d+(?:,\d+)? \+1(?:,\d+)? @@", line))
+                continue
+            if line.startswith("+"):
+                added_lines.append(line[1:])
+            if in_file_head and not line.startswith("-"):
+                header_lines.append(line[1:])
+                if len(header_lines) >= HEADER_SCAN_LINES:
+                    in_file_head = False
+        return header_lines, added_lines
+
+class DetectionStats:
+    """
+    Process-wide counters of files dropped per heuristic, with the patch volume they
+    would otherwise have sent to the LLM (changed lines and characters).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, heuristic: str, file_diff: dict):
+        with self._lock:
+            entry = self._stats.setdefault(heuristic, {"files": 0, "changes": 0, "patch_chars": 0})
+            entry["files"] += 1
+            entry["changes"] += int(file_diff.get("changes") or 0)
+            entry["patch_chars"] += len(file_diff.get("patch") or "")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {k: dict(v) for k, v in self._stats.items()}
+
+detection_stats = DetectionStats()
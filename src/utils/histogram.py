@@ -0,0 +1,32 @@
+import threading
+from typing import List
+
+# Upper bounds (seconds) of the default latency buckets (LLM-call scale)
+LATENCY_BUCKETS = [0.5, 1, 2, 5, 10, 30, 60, 120, 300]
+
+class LatencyHistogram:
+    """Cumulative-bucket latency histogram (Prometheus style)."""
+    def __init__(self, buckets: List[float] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.sum += seconds
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    self.counts[i] += 1
+                    return
+            self.counts[-1] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cumulative, running = [], 0
+            for bound, count in zip(self.buckets + ["+Inf"], self.counts):
+                running += count
+                cumulative.append((bound, running))
+            return {"buckets": cumulative, "count": self.count, "sum": round(self.sum, 3)}
@@ -11,7 +11,8 @@ class HunkProcessor:
     def chunk_patch(filename: str, patch: str, max_changes: int = 10) -> Generator[Dict[str, Any], None, None]:
         """
         Parses a unified diff patch and yields chunks limited by the number of changes (+/-).
-        Each chunk includes calculated line numbers for the NEW file.
+        Each chunk includes calculated line numbers for the NEW file and the
+        enclosing symbol git printed in its hunk header ("" if none).
         """
         if not patch:
             return
@@ -23,6 +24,7 @@ class HunkProcessor:
         chunk_lines = []
         change_count = 0
         chunk_start_line = 0
+        symbol = ""
 
         for line in lines:
             header_match = hunk_header_re.match(line)
@@ -34,7 +36,8 @@ class HunkProcessor:
                         "content": "\n".join(chunk_lines),
                         "start_line": chunk_start_line,
                         "end_line": current_new_line,
-                        "changes": change_count
+                        "changes": change_count,
+                        "symbol": symbol
                     }
                     chunk_lines = []
                     change_count = 0
@@ -43,6 +46,7 @@ class HunkProcessor:
                 # We care about the '+' part for the new file line numbers
                 current_new_line = int(header_match.group(3))
                 chunk_start_line = current_new_line
+                symbol = line[header_match.end():].strip()
                 chunk_lines.append(line)  # Keep the header for context
                 continue
 
@@ -76,7 +80,8 @@ class HunkProcessor:
                     "content": "\n".join(chunk_lines),
                     "start_line": chunk_start_line,
                     "end_line": current_new_line - 1 if current_new_line > chunk_start_line else chunk_start_line,
-                    "changes": change_count
+                    "changes": change_count,
+                    "symbol": symbol
                 }
                 # Prepare for next chunk
                 chunk_lines = [f"@@ ... @@ (Continued focus on {filename})"]
@@ -90,5 +95,6 @@ class HunkProcessor:
                 "content": "\n".join(chunk_lines),
                 "start_line": chunk_start_line,
                 "end_line": current_new_line - 1 if current_new_line > chunk_start_line else chunk_start_line,
-                "changes": change_count
+                "changes": change_count,
+                "symbol": symbol
             }
@@ -0,0 +1,136 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable, List
+from src.utils.histogram import LatencyHistogram
+
+# Stage-scale buckets (seconds): from cached GitHub reads to long agent turns
+STAGE_BUCKETS = [0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 120]
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+class Family:
+    """
+    One metric family ready to render. samples are (labels, value) pairs, or for
+    histograms (labels, LatencyHistogram.snapshot()) pairs.
+    """
+    def __init__(self, name: str, kind: str, help_text: str, samples: list):
+        self.name = name
+        self.kind = kind
+        self.help_text = help_text
+        self.samples = samples
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self.samples:
+            if self.kind != "histogram":
+                lines.append(f"{self.name}{format_labels(labels)} {float(value):g}")
+                continue
+            for bound, count in value["buckets"]:
+                le = bound if bound == "+Inf" else f"{float(bound):g}"
+                lines.append(f"{self.name}_bucket{format_labels({**labels, 'le': le})} {count}")
+            lines.append(f"{self.name}_sum{format_labels(labels)} {value['sum']:g}")
+            lines.append(f"{self.name}_count{format_labels(labels)} {value['count']}")
+        return lines
+
+class Counter:
+    """Monotonic counter with optional labels."""
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self) -> Family:
+        with self._lock:
+            samples = [(dict(zip(self.labelnames, key)), value) for key, value in sorted(self._values.items())]
+        return Family(self.name, "counter", self.help_text, samples)
+
+class Histogram:
+    """Labelled histogram; each label set is a LatencyHistogram."""
+    def __init__(self, name: str, help_text: str, labelnames: tuple = (), buckets: List[float] = STAGE_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram(self.buckets)
+        histogram.observe(seconds)
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def collect(self) -> Family:
+        with self._lock:
+            items = sorted(self._histograms.items())
+        samples = [(dict(zip(self.labelnames, key)), histogram.snapshot()) for key, histogram in items]
+        return Family(self.name, "histogram", self.help_text, samples)
+
+class MetricsRegistry:
+    """
+    Process-wide metrics, rendered in the Prometheus text exposition format.
+    Besides its own counters and histograms, collectors turn the existing stats
+    snapshots (scheduler, cache, cascade...) into families at scrape time.
+    """
+    def __init__(self, prefix: str = "prpilot"):
+        self.prefix = prefix
+        self._metrics = []
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def counter(self, name: str, help_text: str, labelnames: tuple = ()) -> Counter:
+        metric = Counter(f"{self.prefix}_{name}", help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labelnames: tuple = (), buckets: List[float] = STAGE_BUCKETS) -> Histogram:
+        metric = Histogram(f"{self.prefix}_{name}", help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Family]]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.collect().render())
+        for collector in self._collectors:
+            for family in collector():
+                lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+# Wall time per review stage: fetch, semantic_filter, chunking, llm_call, tool_call, post
+stage_seconds = metrics.histogram("stage_seconds", "Time spent per review stage.", ("stage",))
+files_filtered = metrics.counter("files_filtered_total", "Files left out of review, by reason.", ("reason",))
+chunks_total = metrics.counter("chunks_total", "Review chunks by outcome (reviewed, cached, skipped_*).", ("outcome",))
+agent_turns = metrics.counter("agent_turns_total", "LLM turns taken by agents.", ("agent",))
+invalid_outputs = metrics.counter("agent_invalid_output_total", "Agent responses rejected as invalid JSON/structure and retried.", ("agent",))
+tool_failures = metrics.counter("tool_failures_total", "Agent tool calls that failed.", ("tool",))
+llm_tokens = metrics.counter("llm_tokens_total", "LLM tokens from provider usage fields.", ("provider", "model", "type"))
+llm_cost = metrics.counter("llm_cost_total", "LLM spend from provider usage and the configured per-1k-token prices.", ("provider", "model"))
@@ -0,0 +1,96 @@
+import math
+import re
+from typing import Dict, Any, List
+from src.code_parser.parser import count_changed_branches
+
+# APIs and idioms whose changes deserve attention first (matched on added and removed lines)
+SECURITY_PATTERNS = {
+    "code_execution": re.compile(r"\b(eval|exec|compile|execfile|Function)\s*\(|\bos\.system\b|\bsubprocess\.|\bchild_process\b|\bRuntime\.getRuntime\(\)\.exec|shell\s*=\s*True"),
+    "deserialization": re.compile(r"\bpickle\.loads?\b|\byaml\.load\b|\bmarshal\.loads?\b|\bObjectInputStream\b|\bunserialize\s*\("),
+    "sql": re.compile(r"\b(SELECT|INSERT|UPDATE|DELETE)\b.+\b(FROM|INTO|SET|WHERE)\b|\.execute\(\s*f?[\"'].*(%s|\{|\+)|\braw\s*\(", re.IGNORECASE),
+    "secrets": re.compile(r"(password|passwd|secret|api[_-]?key|private[_-]?key|access[_-]?token|credential)", re.IGNORECASE),
+    "crypto": re.compile(r"\b(md5|sha1|DES|RC4|ECB)\b|\brandom\.(random|randint)\b|\bMath\.random\b|verify\s*=\s*False|InsecureSkipVerify", re.IGNORECASE),
+    "auth": re.compile(r"\b(auth\w*|permission\w*|is_admin|role|jwt|session|csrf|cors|login|token)\b", re.IGNORECASE),
+    "web_injection": re.compile(r"innerHTML|dangerouslySetInnerHTML|document\.write|\|\s*safe\b|mark_safe|v-html"),
+    "filesystem": re.compile(r"\b(open|unlink|rmtree|chmod|chown)\s*\(|\bos\.remove\b|\.\./"),
+}
+
+# Branching / control-flow tokens over the diff text; only used when the file's language
+# can't be parsed (otherwise branching AST nodes are counted, see add_ast_complexity)
+COMPLEXITY_RE = re.compile(r"\b(if|elif|else|for|while|case|catch|except|try|switch|match|goto|await|yield|lambda)\b|&&|\|\||\?\s*[^:]+:")
+
+HIGH_RISK_PATH_RE = re.compile(r"(^|/)(auth|security|crypto|payments?|billing|permissions?|session|login|admin|middleware)(/|\.|_|$)", re.IGNORECASE)
+LOW_RISK_PATH_RE = re.compile(r"(^|/)(tests?|specs?|__tests__|fixtures?|mocks?|examples?|docs?|snapshots?|__snapshots__|testdata)(/|$)|(_test|\.test|\.spec|_spec)\.\w+$", re.IGNORECASE)
+
+HIGH_RISK_PATH_WEIGHT = 2.0
+LOW_RISK_PATH_WEIGHT = 0.3
+MAX_COMPLEXITY_SCORE = 10
+
+def changed_lines(chunk_content: str) -> List[str]:
+    """Extracts added and removed code lines from a HunkProcessor chunk."""
+    lines = []
+    for line in chunk_content.splitlines():
+        if line.startswith("DEL: -"):
+            lines.append(line[6:])
+        else:
+            number, sep, rest = line.partition(": +")
+            if sep and number.isdigit():
+                lines.append(rest)
+    return lines
+
+def added_line_numbers(chunk_content: str) -> set[int]:
+    """Head line numbers of the lines a chunk adds."""
+    numbers = set()
+    for line in chunk_content.splitlines():
+        number, sep, _ = line.partition(": +")
+        if sep and number.isdigit():
+            numbers.add(int(number))
+    return numbers
+
+def add_ast_complexity(chunks: List[Dict[str, Any]], filename: str, head_content: str):
+    """
+    Stores under chunk['ast_complexity'] the number of branching AST nodes starting on
+    each chunk's added lines in the head tree. Unsupported languages are left to the regex.
+    """
+    counts = count_changed_branches(head_content, filename, [added_line_numbers(c["content"]) for c in chunks])
+    if counts is None:
+        return
+    for chunk, count in zip(chunks, counts):
+        chunk["ast_complexity"] = count
+
+def path_weight(filename: str) -> float:
+    if LOW_RISK_PATH_RE.search(filename):
+        return LOW_RISK_PATH_WEIGHT
+    if HIGH_RISK_PATH_RE.search(filename):
+        return HIGH_RISK_PATH_WEIGHT
+    return 1.0
+
+def score_chunk(chunk: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Computes a risk score for a chunk from security-sensitive APIs, control-flow
+    complexity, churn and path weight. Complexity is the AST count from
+    add_ast_complexity when available, else control-flow tokens in the diff text.
+    A 'risk_weight' on the chunk (per-repo override) replaces the built-in path weight.
+    """
+    code = "\n".join(changed_lines(chunk["content"]))
+    security_hits = sorted(name for name, pattern in SECURITY_PATTERNS.items() if pattern.search(code))
+    complexity = chunk.get("ast_complexity")
+    if complexity is None:
+        complexity = len(COMPLEXITY_RE.findall(code))
+    complexity = min(complexity, MAX_COMPLEXITY_SCORE)
+    churn = math.log2(1 + chunk.get("changes", 0))
+    weight = chunk.get("risk_weight")
+    if weight is None:
+        weight = path_weight(chunk["filename"])
+
+    score = (1 + 3 * len(security_hits) + complexity + churn) * weight
+    return {"score": round(score, 2), "security": security_hits, "complexity": complexity, "weight": weight}
+
+def prioritize_chunks(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Scores every chunk (stored under chunk['risk']) and returns them highest risk first.
+    Ties keep file order.
+    """
+    for chunk in chunks:
+        chunk["risk"] = score_chunk(chunk)
+    return sorted(chunks, key=lambda c: -c["risk"]["score"])
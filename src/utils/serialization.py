@@ -0,0 +1,79 @@
+import base64
+import json
+import zlib
+
+# msgpack for encoding, zstandard for compression (both project dependencies).
+# Without them values fall back to JSON and zlib, e.g. when running from a bare checkout.
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+class SerializationError(ValueError):
+    """A blob this process can't decode: corrupt, or written with a library it lacks."""
+    pass
+
+# Values smaller than this aren't worth compressing
+COMPRESS_MIN_BYTES = 512
+
+# First byte: encoding, second byte: compression
+MSGPACK, JSON = b"m", b"j"
+ZSTD, ZLIB, RAW = b"z", b"l", b"n"
+
+def _json_default(value):
+    if isinstance(value, (bytes, bytearray)):
+        return {"__b64__": base64.b64encode(value).decode("ascii")}
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def _json_object_hook(obj):
+    if len(obj) == 1 and "__b64__" in obj:
+        return base64.b64decode(obj["__b64__"])
+    return obj
+
+def dumps(value) -> bytes:
+    """Serializes JSON-like values (plus bytes) into a compact, self-describing blob."""
+    if msgpack is not None:
+        encoding, payload = MSGPACK, msgpack.packb(value, use_bin_type=True)
+    else:
+        encoding, payload = JSON, json.dumps(value, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+    if len(payload) < COMPRESS_MIN_BYTES:
+        return encoding + RAW + payload
+    if zstandard is not None:
+        return encoding + ZSTD + zstandard.ZstdCompressor(level=3).compress(payload)
+    return encoding + ZLIB + zlib.compress(payload, 6)
+
+def loads(blob: bytes):
+    """
+    Inverse of dumps; reads blobs written with or without msgpack/zstandard.
+    Raises SerializationError for anything it can't decode.
+    """
+    encoding, compression, payload = blob[:1], blob[1:2], blob[2:]
+    if compression == ZSTD and zstandard is None:
+        raise SerializationError("Value was compressed with zstandard, which is not installed")
+    if encoding == MSGPACK and msgpack is None:
+        raise SerializationError("Value was encoded with msgpack, which is not installed")
+    try:
+        if compression == ZSTD:
+            payload = zstandard.ZstdDecompressor().decompress(payload)
+        elif compression == ZLIB:
+            payload = zlib.decompress(payload)
+        elif compression != RAW:
+            raise SerializationError(f"Unknown compression marker {compression!r}")
+
+        if encoding == MSGPACK:
+            return msgpack.unpackb(payload, raw=False)
+        if encoding == JSON:
+            return json.loads(payload, object_hook=_json_object_hook)
+        raise SerializationError(f"Unknown encoding marker {encoding!r}")
+    except SerializationError:
+        raise
+    except Exception as e:
+        raise SerializationError(f"Corrupt cached value: {e}") from e
@@ -0,0 +1,202 @@
+import re
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List
+from src.brain.agents.utils import estimate_tokens
+from src.code_parser.language import language_registry
+from src.code_parser.tree_sitter_parser import UniversalParser
+
+HUNK_HEADER_RE = re.compile(r'^@@ -(\d+),?(\d*) \+(\d+),?(\d*) @@')
+
+# Units below this share of the token budget are merged into their neighbour
+TINY_UNIT_RATIO = 0.25
+
+class SymbolChunker:
+    """
+    Chunking strategy that groups a patch's changes by their enclosing function or
+    class in the head tree, instead of cutting every N changed lines. Changes to one
+    function land in one chunk (even across hunks), oversized functions are split at
+    statement boundaries, and tiny neighbouring units are merged, all within a token
+    budget. Chunks have the same shape as HunkProcessor.chunk_patch's.
+    """
+    def __init__(self):
+        self.parser = UniversalParser()
+
+    def chunk_patch(self, filename: str, patch: str, head_content: str, max_tokens: int) -> List[Dict[str, Any]] | None:
+        """Returns the chunks, or None if the file's language can't be parsed."""
+        language = language_registry.language_for_path(filename)
+        if not patch or not language:
+            return None
+
+        lines = self._parse_patch(patch)
+        anchors = sorted({line["anchor"] for line in lines if line["kind"] in "+- "})
+        owners, boundaries = self._map_symbols(head_content, language, anchors)
+
+        units = self._group_by_symbol(lines, owners)
+        pieces = []
+        for unit in units:
+            pieces.extend(self._split_unit(unit, boundaries, max_tokens))
+        return [self._to_chunk(filename, piece) for piece in self._merge_tiny(pieces, max_tokens)]
+
+    @staticmethod
+    def _parse_patch(patch: str) -> list[dict]:
+        """
+        Numbers each patch line like HunkProcessor does. 'anchor' is the head line a
+        line belongs to (removed lines anchor to the line that replaced them).
+        """
+        lines = []
+        current_new_line = 0
+        for raw in patch.splitlines():
+            header = HUNK_HEADER_RE.match(raw)
+            if header:
+                current_new_line = int(header.group(3))
+                lines.append({"kind": "@", "text": raw, "anchor": current_new_line, "new_line": None})
+            elif not lines:
+                continue
+            elif raw.startswith('+'):
+                lines.append({"kind": "+", "text": f"{current_new_line}: {raw}", "anchor": current_new_line, "new_line": current_new_line})
+                current_new_line += 1
+            elif raw.startswith('-'):
+                lines.append({"kind": "-", "text": f"DEL: {raw}", "anchor": current_new_line, "new_line": None})
+            elif raw.startswith(' '):
+                lines.append({"kind": " ", "text": f"{current_new_line}: {raw}", "anchor": current_new_line, "new_line": current_new_line})
+                current_new_line += 1
+            else:
+                lines.append({"kind": "\\", "text": raw, "anchor": current_new_line, "new_line": None})
+        return lines
+
+    def _map_symbols(self, content: str, language: str, anchors: list) -> tuple[dict, set]:
+        """
+        Maps each anchored head line to its innermost enclosing definition node, and
+        collects the head lines where a statement of a definition body (or the module) starts.
+        """
+        tree, _ = self.parser.parse(content, language)
+        root = tree.root_node
+        owners = {}
+        boundaries = {child.start_point[0] + 1 for child in root.named_children}
+        # Pre-order: nested definitions come later and overwrite their parents
+        for node in self.parser._find_definitions(root, language):
+            first, last = node.start_point[0] + 1, node.end_point[0] + 1
+            for anchor in anchors[bisect_left(anchors, first):bisect_right(anchors, last)]:
+                owners[anchor] = node
+            body = node.child_by_field_name("body") or node
+            boundaries.update(child.start_point[0] + 1 for child in body.named_children)
+        return owners, boundaries
+
+    @staticmethod
+    def _group_by_symbol(lines: list[dict], owners: dict) -> list[dict]:
+        """
+        Splits the patch into units of consecutive changes sharing an enclosing
+        symbol. Context between two units stays with the earlier one until a hunk
+        header or a line of the next unit's symbol starts the next one.
+        """
+        def key_of(line):
+            node = owners.get(line["anchor"])
+            return (node.start_byte, node.end_byte) if node else None
+
+        units = []
+        current = None
+        pending = []
+        for line in lines:
+            if line["kind"] not in "+-":
+                pending.append(line)
+                continue
+            key = key_of(line)
+            if current is None or current["key"] != key:
+                split = 0
+                if current is not None:
+                    while split < len(pending) and pending[split]["kind"] != "@" and key_of(pending[split]) != key:
+                        split += 1
+                    current["lines"].extend(pending[:split])
+                current = {"key": key, "node": owners.get(line["anchor"]), "lines": pending[split:], "changes": 0}
+                units.append(current)
+            else:
+                current["lines"].extend(pending)
+            pending = []
+            current["lines"].append(line)
+            current["changes"] += 1
+        if current is not None:
+            current["lines"].extend(pending)
+
+        # The same symbol changed again in a later hunk joins its first unit
+        merged = []
+        by_key = {}
+        for unit in units:
+            if unit["key"] is not None and unit["key"] in by_key:
+                target = by_key[unit["key"]]
+                target["lines"].extend(unit["lines"] if unit["lines"][0]["kind"] == "@" else [
+                    {"kind": "@", "text": "@@ ... @@", "anchor": unit["lines"][0]["anchor"], "new_line": None}
+                ] + unit["lines"])
+                target["changes"] += unit["changes"]
+                continue
+            by_key[unit["key"]] = unit
+            merged.append(unit)
+        return merged
+
+    @staticmethod
+    def _split_unit(unit: dict, boundaries: set, max_tokens: int) -> list[dict]:
+        """
+        Splits an oversized unit at the last statement boundary (or hunk header) that
+        keeps a piece within budget; a piece with no boundary at all is cut where it is full.
+        """
+        pieces = []
+        piece, tokens, last_boundary = [], 0, None
+        for line in unit["lines"]:
+            cost = estimate_tokens(line["text"])
+            # Never between a removed line and the added line replacing it
+            is_boundary = bool(piece) and (
+                line["kind"] == "@" or (line["new_line"] in boundaries and piece[-1]["kind"] != "-")
+            )
+            if piece and tokens + cost > max_tokens:
+                cut = len(piece) if is_boundary or not last_boundary else last_boundary
+                # Headers and context leading up to this line move along with it
+                if last_boundary and not any(entry["kind"] in "+-" for entry in piece[last_boundary:]):
+                    cut = last_boundary
+                while cut > 1 and piece[cut - 1]["kind"] == "@":
+                    cut -= 1
+                pieces.append(piece[:cut])
+                piece = piece[cut:]
+                tokens = sum(estimate_tokens(entry["text"]) for entry in piece)
+                last_boundary = None
+            elif is_boundary:
+                last_boundary = len(piece)
+            piece.append(line)
+            tokens += cost
+        if piece:
+            pieces.append(piece)
+        return [
+            {"node": unit["node"], "lines": lines, "changes": sum(1 for line in lines if line["kind"] in "+-")}
+            for lines in pieces if any(line["kind"] in "+-" for line in lines)
+        ]
+
+    @staticmethod
+    def _merge_tiny(pieces: list[dict], max_tokens: int) -> list[dict]:
+        merged = []
+        tiny = max_tokens * TINY_UNIT_RATIO
+        for piece in pieces:
+            piece["tokens"] = sum(estimate_tokens(line["text"]) for line in piece["lines"])
+            previous = merged[-1] if merged else None
+            if previous and (piece["tokens"] < tiny or previous["tokens"] < tiny) and previous["tokens"] + piece["tokens"] <= max_tokens:
+                previous["lines"].extend(piece["lines"])
+                previous["changes"] += piece["changes"]
+                previous["tokens"] += piece["tokens"]
+                if previous["node"] is not piece["node"]:
+                    previous["node"] = None
+                continue
+            merged.append(piece)
+        return merged
+
+    @staticmethod
+    def _to_chunk(filename: str, piece: dict) -> Dict[str, Any]:
+        lines = piece["lines"]
+        if lines[0]["kind"] != "@":
+            lines = [{"kind": "@", "text": f"@@ ... @@ (Continued focus on {filename})", "anchor": lines[0]["anchor"], "new_line": None}] + lines
+        numbered = [line["new_line"] for line in lines if line["new_line"] is not None] or [lines[0]["anchor"]]
+        node = piece["node"]
+        return {
+            "filename": filename,
+            "content": "\n".join(line["text"] for line in lines),
+            "start_line": min(numbered),
+            "end_line": max(numbered),
+            "changes": piece["changes"],
+            "symbol": node.text.decode("utf8", "replace").split("\n", 1)[0].strip() if node else ""
+        }
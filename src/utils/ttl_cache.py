@@ -0,0 +1,65 @@
+import threading
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    """
+    Bounded, thread-safe mapping whose entries expire after a TTL (the default,
+    or one given per entry). When full, the least recently used entries are evicted first.
+    """
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()  # key -> (expires_at, value), least recently used first
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float):
+        # TTLs differ per entry, so expired entries can sit anywhere: those at the
+        # front go with the overflow, the rest are dropped when they're next read
+        while self._entries:
+            key, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            self._entries.popitem(last=False)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value=True, ttl_seconds: float = None):
+        with self._lock:
+            now = time.monotonic()
+            self._entries.pop(key, None)
+            self._entries[key] = (now + (ttl_seconds or self.ttl_seconds), value)
+            self._evict(now)
+
+    def add_if_absent(self, key, value=True, ttl_seconds: float = None) -> bool:
+        """Stores key unless a live entry exists. Returns True if it was added."""
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                return False
+            self._entries.pop(key, None)
+            self._entries[key] = (now + (ttl_seconds or self.ttl_seconds), value)
+            self._evict(now)
+            return True
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
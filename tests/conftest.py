@@ -0,0 +1,14 @@
+import os
+import tempfile
+from pathlib import Path
+
+# Ledger, batch store and sqlite cache files go to a scratch directory, not the user's data dir
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="pr-pilot-tests-"))
+
+# src.config validates settings at import time: start from the documented defaults
+ENV_EXAMPLE = Path(__file__).resolve().parent.parent / ".env.example"
+for line in ENV_EXAMPLE.read_text().splitlines():
+    line = line.strip()
+    if line and not line.startswith("#") and "=" in line:
+        key, value = line.split("=", 1)
+        os.environ.setdefault(key.strip(), value.strip())
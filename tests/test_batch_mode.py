@@ -0,0 +1,185 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.config import settings
+from src.services.batch_store import BatchStore
+from src.services.llm.openai_client import OpenAILLM
+from src.services.reviewer import ReviewerService
+from src.utils.metrics import llm_cost
+
+REPO = "org/repo"
+PR = 7
+
+class _BatchHandler(BaseHTTPRequestHandler):
+    """OpenAI Files + Batches endpoints, enough for OpenAILLM.submit_batch/get_batch_results."""
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, payload, raw: bool = False):
+        body = payload.encode() if raw else json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode("utf-8", "replace")
+        server = self.server
+        if self.path == "/v1/files":
+            # The multipart body carries the JSONL input file
+            server.requests = [json.loads(line) for line in body.splitlines() if line.startswith('{"custom_id"')]
+            self._reply({"id": "file-in"})
+        elif self.path == "/v1/batches":
+            self._reply({"id": "batch-1"})
+
+    def do_GET(self):
+        server = self.server
+        if self.path == "/v1/batches/batch-1":
+            server.polls += 1
+            done = server.polls > server.pending_polls
+            self._reply({"status": "completed" if done else "in_progress", "output_file_id": "file-out" if done else None})
+        elif self.path == "/v1/files/file-out/content":
+            lines = [
+                json.dumps({"custom_id": request["custom_id"], "response": {"status_code": 200, "body": {
+                    "choices": [{"message": {"content": server.answers[request["custom_id"]]}}],
+                    "usage": {"prompt_tokens": 600, "completion_tokens": 400}
+                }}})
+                for request in server.requests
+            ]
+            self._reply("\n".join(lines), raw=True)
+
+class MockBatchServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _BatchHandler)
+        self.requests = []
+        self.answers = {}
+        self.polls = 0
+        self.pending_polls = 1
+
+class FakeSCM:
+    def __init__(self):
+        self.inline = []
+        self.commit = []
+
+    def post_inline_comment(self, repo_id, pr_id, file, line, body):
+        self.inline.append((file, line, body))
+        return True
+
+    def post_commit_inline_comment(self, repo_id, commit_sha, file, line, body):
+        self.commit.append((commit_sha, file, line, body))
+        return True
+
+    def get_pull_request_comments(self, repo_id, pr_id, since=None):
+        raise RuntimeError("GitHub is unavailable")
+
+    def get_file_structure(self, *args):
+        return ""
+
+    def get_function_content(self, *args):
+        return ""
+
+def _answer(*comments) -> str:
+    return json.dumps({
+        "reasoning": "", "model": "answer", "tool_call": None,
+        "content": [{"file": "src/app.py", "line": line, "comment": text} for line, text in comments]
+    })
+
+def _chunk(start: int, **extra) -> dict:
+    return {
+        "filename": "src/app.py", "start_line": start, "end_line": start + 1, "changes": 1,
+        "content": f"@@ -{start},1 +{start},2 @@\n{start}:  x = 1\n{start + 1}: +y = 2", **extra
+    }
+
+@pytest.fixture
+def batch_server():
+    server = MockBatchServer()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def reviewer(batch_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "system_prompt_name", "performance")
+    monkeypatch.setattr(settings, "batch_poll_interval", 0.01)
+    monkeypatch.setattr(settings, "review_ledger_enabled", False)
+    monkeypatch.setattr(settings, "review_cache_enabled", False)
+    monkeypatch.setattr(settings, "llm_cost_per_1k_tokens", 1.0)
+    monkeypatch.setattr(settings, "batch_cost_discount", 0.5)
+    llm = OpenAILLM()
+    llm.api_key = "test"
+    llm.model = "batch-test-model"
+    llm.api_url = f"http://127.0.0.1:{batch_server.server_address[1]}/v1/chat/completions"
+    service = ReviewerService()
+    service.llm = llm
+    service.scm = FakeSCM()
+    service._batch_store = BatchStore(str(tmp_path / "batches.db"))
+    return service
+
+def _prepare(reviewer, chunks: list, pr_id=PR) -> list:
+    return [reviewer._prepare_chunk("", REPO, pr_id, chunk, []) for chunk in chunks]
+
+def _cost(model: str) -> float:
+    return llm_cost._values.get(("openai", model), 0)
+
+def test_batch_review_against_mock_server(reviewer, batch_server):
+    batch_server.answers = {"chunk-0": _answer((11, "first")), "chunk-1": _answer((21, "second"))}
+    prepared = _prepare(reviewer, [_chunk(10), _chunk(20)])
+    cost_before = _cost("batch-test-model")
+
+    comments = asyncio.run(reviewer._run_batch(REPO, PR, prepared))
+
+    assert [c["comment"] for c in comments] == ["first", "second"]
+    assert reviewer.scm.inline == [("src/app.py", 11, "first"), ("src/app.py", 21, "second")]
+    assert batch_server.polls == 2
+    assert set(reviewer.batch_store.done_items("batch-1")) == {"chunk-0", "chunk-1"}
+    assert reviewer.batch_store.pending() == []
+    # 2 x 1000 tokens at half of the 1.0 per 1k interactive price
+    assert _cost("batch-test-model") - cost_before == pytest.approx(1.0)
+    # Fetching the results again (as a resuming worker does) charges nothing
+    reviewer.llm.get_batch_results("batch-1")
+    assert _cost("batch-test-model") - cost_before == pytest.approx(1.0)
+
+def test_resume_skips_posted_chunks_and_remembers_their_comments(reviewer, batch_server):
+    batch_server.requests = [{"custom_id": "chunk-0"}, {"custom_id": "chunk-1"}]
+    batch_server.pending_polls = 0
+    batch_server.answers = {
+        "chunk-0": _answer((11, "first")),
+        "chunk-1": _answer((11, "first"), (21, "second"))
+    }
+    items = [{**item, "custom_id": f"chunk-{i}"} for i, item in enumerate(_prepare(reviewer, [_chunk(10), _chunk(20)]))]
+    # A worker posted chunk-0, then died before chunk-1
+    crashed = BatchStore(reviewer.batch_store.path, owner="crashed-worker", lease_seconds=0.01)
+    crashed.save("batch-1", "openai", "batch-test-model", REPO, PR, items)
+    crashed.mark_item_done("batch-1", "chunk-0", [{"line": 11, "comment": "first"}])
+    time.sleep(0.02)
+
+    async def resume():
+        reviewer._init_llm_client = lambda provider, model: reviewer.llm
+        return await asyncio.gather(*await reviewer.resume_pending_batches())
+
+    cost_before = _cost("batch-test-model")
+    [comments] = asyncio.run(resume())
+
+    # chunk-0 isn't reposted, and chunk-1's repeat of its comment is dropped
+    assert reviewer.scm.inline == [("src/app.py", 21, "second")]
+    assert [c["comment"] for c in comments] == ["second"]
+    assert reviewer.batch_store.pending() == []
+    # Only chunk-1 is charged; chunk-0 was charged when the crashed worker recorded it
+    assert _cost("batch-test-model") - cost_before == pytest.approx(0.5)
+
+def test_push_review_batches_post_each_chunk_once(reviewer, batch_server):
+    batch_server.answers = {"chunk-0": _answer((11, "first"))}
+    prepared = _prepare(reviewer, [_chunk(10, commit_sha="c" * 40)], pr_id=None)
+
+    comments = asyncio.run(reviewer._run_batch(REPO, None, prepared))
+
+    assert reviewer.scm.commit == [("c" * 40, "src/app.py", 11, "first")]
+    # review_commit only posts comments that aren't marked as posted already
+    assert all(c["posted"] for c in comments)
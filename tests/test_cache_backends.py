@@ -0,0 +1,256 @@
+import socket
+import socketserver
+import threading
+import time
+import pytest
+from src.utils import cache_backends, serialization
+from src.utils.cache_backends import CacheBackend, MemoryCache, RedisCache, SQLiteCache
+from src.utils.serialization import COMPRESS_MIN_BYTES, SerializationError, dumps, loads
+
+
+class _RESPHandler(socketserver.StreamRequestHandler):
+    """Speaks just enough RESP2 (GET, SET [NX] [PX], DEL, SCAN, AUTH, SELECT) for RedisCache."""
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:-2])):
+                length = int(self.rfile.readline()[1:-2])
+                args.append(self.rfile.read(length + 2)[:-2])
+            self.wfile.write(self.server.command(args))
+
+class FakeRedis(socketserver.ThreadingTCPServer):
+    """Local stand-in for a Redis server, backed by a dict."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _RESPHandler)
+        self.data = {}
+        self.commands = []
+        self.lock = threading.Lock()
+
+    def command(self, args: list) -> bytes:
+        name = args[0].decode().upper()
+        with self.lock:
+            self.commands.append(name)
+            now = time.monotonic()
+            self.data = {k: v for k, v in self.data.items() if v[1] is None or v[1] > now}
+            if name in ("AUTH", "SELECT"):
+                return b"+OK\r\n"
+            if name == "GET":
+                entry = self.data.get(args[1])
+                return b"$-1\r\n" if entry is None else b"$%d\r\n%s\r\n" % (len(entry[0]), entry[0])
+            if name == "SET":
+                options = [a.decode().upper() for a in args[3:]]
+                if "NX" in options and args[1] in self.data:
+                    return b"$-1\r\n"
+                expires = now + int(options[options.index("PX") + 1]) / 1000 if "PX" in options else None
+                self.data[args[1]] = (args[2], expires)
+                return b"+OK\r\n"
+            if name == "DEL":
+                removed = sum(1 for key in args[1:] if self.data.pop(key, None) is not None)
+                return b":%d\r\n" % removed
+            if name == "SCAN":
+                prefix = args[3][:-1]
+                keys = [k for k in self.data if k.startswith(prefix)]
+                return b"*2\r\n$1\r\n0\r\n*%d\r\n" % len(keys) + b"".join(b"$%d\r\n%s\r\n" % (len(k), k) for k in keys)
+            return b"-ERR unknown command\r\n"
+
+@pytest.fixture
+def redis_server():
+    server = FakeRedis()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def _closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.mark.parametrize("libraries", ["msgpack+zstd", "json+zlib"])
+def test_serialization_round_trip(libraries, monkeypatch):
+    if libraries == "json+zlib":
+        monkeypatch.setattr(serialization, "msgpack", None)
+        monkeypatch.setattr(serialization, "zstandard", None)
+    else:
+        assert serialization.msgpack and serialization.zstandard, "declared dependencies must be installed"
+    values = [
+        None, 0, 1.5, "text", ["a", 1, None], {"nested": {"list": [1, 2]}},
+        b"\x00\xffbinary", {"body": "x" * (COMPRESS_MIN_BYTES * 4)}
+    ]
+    for value in values:
+        assert loads(dumps(value)) == value
+    # Large values are compressed
+    assert len(dumps("y" * (COMPRESS_MIN_BYTES * 10))) < COMPRESS_MIN_BYTES
+
+def test_blobs_from_other_libraries_or_corrupt_fail_to_decode(monkeypatch):
+    compact = dumps({"body": "x" * (COMPRESS_MIN_BYTES * 4)})
+    monkeypatch.setattr(serialization, "zstandard", None)
+    with pytest.raises(SerializationError):
+        loads(compact)
+    with pytest.raises(SerializationError):
+        loads(b"jl" + b"not zlib")
+    with pytest.raises(SerializationError):
+        loads(b"??payload")
+
+def test_backends_are_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+@pytest.mark.parametrize("make", [
+    lambda tmp_path: MemoryCache("ns", 100),
+    lambda tmp_path: SQLiteCache("ns", str(tmp_path / "cache.db"), 100),
+], ids=["memory", "sqlite"])
+def test_local_backend_contract(make, tmp_path):
+    cache = make(tmp_path)
+    cache.set("key", {"comments": [1, 2]})
+    assert cache.get("key") == {"comments": [1, 2]}
+    assert cache.get("missing", "default") == "default"
+    assert cache.add_if_absent("delivery") is True
+    assert cache.add_if_absent("delivery") is False
+    cache.set("short", "value", ttl_seconds=0.05)
+    time.sleep(0.1)
+    assert cache.get("short") is None
+    # An expired entry can be added again
+    assert cache.add_if_absent("short", ttl_seconds=10) is True
+    cache.delete("key")
+    assert cache.get("key") is None
+    cache.clear()
+    assert len(cache) == 0
+
+def test_sqlite_prunes_expired_then_oldest(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = SQLiteCache("ns", path, max_entries=50)
+    other = SQLiteCache("other", path, max_entries=50)
+    other.set("kept", 1)
+    cache.set("expiring", 1, ttl_seconds=0.01)
+    time.sleep(0.02)
+    for i in range(99):
+        cache.set(f"key-{i}", i)
+    # The 100th write prunes: the expired row first, then the oldest rows over max_entries
+    assert len(cache) == 50
+    assert cache.get("key-48") is None and cache.get("key-49") == 49 and cache.get("key-98") == 98
+    # Pruning is per namespace
+    assert other.get("kept") == 1
+
+def test_memory_evicts_least_recently_read():
+    cache = MemoryCache("ns", 3)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+    assert cache.get("a") == "a"
+    cache.set("d", "d")
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in ("a", "c", "d")] == ["a", "c", "d"]
+
+def test_memory_expiry_is_per_entry():
+    cache = MemoryCache("ns", 3, ttl_seconds=60)
+    cache.set("long", 1)
+    cache.set("short", 2, ttl_seconds=0.01)
+    time.sleep(0.02)
+    assert cache.get("short") is None and cache.get("long") == 1
+    assert len(cache) == 1
+
+def test_sqlite_prunes_least_recently_read(tmp_path):
+    cache = SQLiteCache("ns", str(tmp_path / "cache.db"), max_entries=50)
+    cache.set("hot", "hot")
+    for i in range(98):
+        cache.set(f"key-{i}", i)
+        if i % 10 == 0:
+            assert cache.get("hot") == "hot"
+    # The 100th write prunes: "hot" was written first but read recently, so it stays
+    cache.set("last", 1)
+    assert len(cache) == 50
+    assert cache.get("hot") == "hot"
+    assert cache.get("key-0") is None and cache.get("key-97") == 97
+
+def test_undecodable_values_are_misses(tmp_path, redis_server, monkeypatch):
+    caches = [
+        SQLiteCache("ns", str(tmp_path / "cache.db"), 100),
+        RedisCache("ns", f"redis://127.0.0.1:{redis_server.server_address[1]}/0"),
+    ]
+    for cache in caches:
+        cache.set("key", ["written", "with", "msgpack"])
+    # A worker without msgpack reads what another worker wrote
+    monkeypatch.setattr(serialization, "msgpack", None)
+    for cache in caches:
+        assert cache.get("key", "miss") == "miss"
+
+def test_sqlite_reads_do_not_write(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_backends, "TOUCH_BATCH_SIZE", 3)
+    cache = SQLiteCache("ns", str(tmp_path / "cache.db"), 100)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+    conn = cache._connect()
+    changes = conn.total_changes
+    assert cache.get("a") == "a" and cache.get("b") == "b"
+    assert conn.total_changes == changes
+    # The batch is saved once it fills up
+    assert cache.get("c") == "c"
+    assert conn.total_changes == changes + 3
+
+def test_sqlite_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first, second = SQLiteCache("ns", path, 100), SQLiteCache("ns", path, 100)
+    assert first.add_if_absent("delivery-1") is True
+    assert second.add_if_absent("delivery-1") is False
+
+def test_redis_backend_against_stand_in(redis_server):
+    port = redis_server.server_address[1]
+    cache = RedisCache("ns", f"redis://:secret@127.0.0.1:{port}/2")
+    other = RedisCache("other", f"redis://127.0.0.1:{port}/0")
+    cache.set("key", {"files": ["a.py"], "blob": b"\x01\x02"})
+    assert cache.get("key") == {"files": ["a.py"], "blob": b"\x01\x02"}
+    assert cache.get("missing", "default") == "default"
+    assert cache.add_if_absent("delivery", ttl_seconds=60) is True
+    assert cache.add_if_absent("delivery", ttl_seconds=60) is False
+    cache.set("short", "value", ttl_seconds=0.05)
+    time.sleep(0.1)
+    assert cache.get("short") is None
+    other.set("key", "other")
+    cache.clear()
+    assert cache.get("delivery") is None and other.get("key") == "other"
+    assert redis_server.commands[:2] == ["AUTH", "SELECT"]
+
+def test_redis_reconnects_after_server_drops_connection(redis_server):
+    cache = RedisCache("ns", f"redis://127.0.0.1:{redis_server.server_address[1]}/0")
+    cache.set("key", 1)
+    cache._conn.sock.shutdown(socket.SHUT_RDWR)
+    assert cache.get("key") == 1
+
+def test_redis_outage_is_a_fast_miss_during_cooldown(monkeypatch):
+    cache = RedisCache("ns", f"redis://127.0.0.1:{_closed_port()}/0", cooldown_seconds=60)
+    connects = []
+    real_connection = cache_backends._RESPConnection
+
+    def counting_connection(*args, **kwargs):
+        connects.append(args)
+        return real_connection(*args, **kwargs)
+
+    monkeypatch.setattr(cache_backends, "_RESPConnection", counting_connection)
+    assert cache.get("key", "miss") == "miss"
+    # A refused connect is not retried, and later calls skip the server entirely
+    assert len(connects) == 1
+    started = time.monotonic()
+    for _ in range(100):
+        assert cache.get("key") is None
+        cache.set("key", 1)
+        assert cache.add_if_absent("delivery") is True
+    assert len(connects) == 1
+    assert time.monotonic() - started < 0.5
+
+def test_redis_is_retried_after_cooldown(redis_server, monkeypatch):
+    cache = RedisCache("ns", f"redis://127.0.0.1:{_closed_port()}/0", cooldown_seconds=0.05)
+    assert cache.get("key") is None
+    monkeypatch.setattr(cache, "_address", ("127.0.0.1", redis_server.server_address[1]))
+    cache.set("key", 1)
+    assert cache.get("key") is None
+    time.sleep(0.1)
+    cache.set("key", 1)
+    assert cache.get("key") == 1
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import threading
+import pytest
+from src.config import settings
+from src.services import reviewer as reviewer_module
+from src.services.cascade import ModelCascade, cascade_stats
+from src.services.llm.base import LLMClient
+from src.services.scheduler import ChunkScheduler
+from src.services.reviewer import ReviewerService
+from src.utils.metrics import llm_cost
+
+REPO = "org/repo"
+
+class FakeLLM(LLMClient):
+    """Answers every call with the given text and reports the given usage (None = no usage fields)."""
+    provider = "fake"
+
+    def __init__(self, answer: str, usage: tuple | None = (0, 0), on_call=None):
+        self.answer = answer
+        self.usage = usage
+        self.on_call = on_call
+        self.calls = 0
+
+    def generate_response(self, messages):
+        self.calls += 1
+        if self.on_call:
+            self.on_call()
+        if self.usage is not None:
+            self.record_usage(*self.usage)
+        return self.answer
+
+class FakeSCM:
+    def __init__(self):
+        self.inline = []
+
+    def post_inline_comment(self, repo_id, pr_id, file, line, body):
+        self.inline.append((file, line, body))
+        return True
+
+    def get_file_structure(self, *args):
+        return ""
+
+    def get_function_content(self, *args):
+        return ""
+
+def _verdict(verdict: str, risk: float = 0.0) -> str:
+    return json.dumps({"verdict": verdict, "risk": risk, "reason": ""})
+
+def _answer(line: int, text: str) -> str:
+    return json.dumps({"reasoning": "", "model": "answer", "tool_call": None, "content": [{"file": "src/app.py", "line": line, "comment": text}]})
+
+def _chunk(start: int) -> dict:
+    return {
+        "filename": "src/app.py", "start_line": start, "end_line": start + 1, "changes": 1,
+        "content": f"@@ -{start},1 +{start},2 @@\n{start}:  x = 1\n{start + 1}: +y = 2"
+    }
+
+def test_screening_tokens_come_from_the_provider_usage():
+    cascade = ModelCascade(FakeLLM(_verdict("clean"), usage=(1234, 56)), FakeSCM())
+    before = cascade_stats.snapshot()["screen_tokens"]
+    assert not cascade.should_escalate(_chunk(10), "x" * 40, deep_estimate=500)
+    assert cascade_stats.snapshot()["screen_tokens"] - before == 1234 + 56
+
+def test_screening_tokens_are_estimated_without_usage_fields():
+    cascade = ModelCascade(FakeLLM(_verdict("clean"), usage=None), FakeSCM())
+    before = cascade_stats.snapshot()["screen_tokens"]
+    cascade.should_escalate(_chunk(10), "x" * 400, deep_estimate=500)
+    assert cascade_stats.snapshot()["screen_tokens"] - before > 100
+
+def test_screening_does_not_hold_a_deep_tier_slot(monkeypatch):
+    monkeypatch.setattr(settings, "system_prompt_name", "performance")
+    monkeypatch.setattr(settings, "review_ledger_enabled", False)
+    monkeypatch.setattr(settings, "review_cache_enabled", False)
+    deep = ChunkScheduler(max_concurrency=1, per_repo_limit=1, max_queued=0)
+    screen = ChunkScheduler(max_concurrency=4, per_repo_limit=4, max_queued=0)
+    monkeypatch.setattr(reviewer_module, "chunk_scheduler", deep)
+    monkeypatch.setattr(reviewer_module, "screen_scheduler", screen)
+    # All four screenings must be in flight at once, which can't happen if each sat in the only deep-tier slot
+    all_screening = threading.Barrier(4, timeout=5)
+
+    service = ReviewerService()
+    service.scm = FakeSCM()
+    service.llm = FakeLLM(_answer(11, "deep finding"))
+    screen_llm = FakeLLM(_verdict("needs_review"), on_call=all_screening.wait)
+    service.cascade = ModelCascade(screen_llm, service.scm)
+
+    tasks = [_chunk(10 * i) for i in range(1, 5)]
+    comments = asyncio.run(service._execute_review(REPO, 1, tasks, {}, None, "parallel"))
+
+    assert not all_screening.broken
+    assert screen_llm.calls == 4 and service.llm.calls == 4
+    assert len(comments) == 4
+    assert screen.snapshot()["completed"] == 4
+    assert deep.snapshot()["completed"] == 4
+
+def test_clean_chunks_never_take_a_deep_tier_slot(monkeypatch):
+    monkeypatch.setattr(settings, "system_prompt_name", "performance")
+    monkeypatch.setattr(settings, "review_ledger_enabled", False)
+    monkeypatch.setattr(settings, "review_cache_enabled", False)
+    deep = ChunkScheduler(max_concurrency=1, per_repo_limit=1, max_queued=0)
+    screen = ChunkScheduler(max_concurrency=2, per_repo_limit=2, max_queued=0)
+    monkeypatch.setattr(reviewer_module, "chunk_scheduler", deep)
+    monkeypatch.setattr(reviewer_module, "screen_scheduler", screen)
+
+    service = ReviewerService()
+    service.scm = FakeSCM()
+    service.llm = FakeLLM(_answer(11, "deep finding"))
+    service.cascade = ModelCascade(FakeLLM(_verdict("clean")), service.scm)
+
+    for mode in ("parallel", "sequential"):
+        assert asyncio.run(service._execute_review(REPO, 1, [_chunk(10), _chunk(20)], {}, None, mode)) == []
+    assert service.llm.calls == 0
+    assert deep.snapshot()["completed"] == 0
+    assert screen.snapshot()["completed"] == 4
+
+def test_screening_tier_is_charged_at_its_own_rate(monkeypatch):
+    monkeypatch.setattr(settings, "cascade_enabled", True)
+    monkeypatch.setattr(settings, "llm_provider", "ollama")
+    monkeypatch.setattr(settings, "cascade_screen_provider", "ollama")
+    monkeypatch.setattr(settings, "cascade_screen_model", "")
+    monkeypatch.setattr(settings, "cascade_screen_endpoints", "")
+    monkeypatch.setattr(settings, "llm_pool_endpoints", "")
+    monkeypatch.setattr(settings, "llm_cost_per_1k_tokens", 10.0)
+    monkeypatch.setattr(settings, "cascade_screen_cost_per_1k_tokens", 1.0)
+    service = ReviewerService()
+    screen, deep = service.cascade.screen_llm, service.llm
+    # Same provider and default model on both tiers: only the client tells them apart
+    assert screen.model == deep.model
+
+    model = deep.model
+    before = llm_cost._values.get(("ollama", model), 0)
+    screen.record_usage(1000, 0)
+    assert llm_cost._values[("ollama", model)] - before == pytest.approx(1.0)
+    deep.record_usage(1000, 0)
+    assert llm_cost._values[("ollama", model)] - before == pytest.approx(11.0)
@@ -0,0 +1,113 @@
+from unittest import mock
+import pytest
+from src.services.scm.github import GitHubSCM
+from src.utils.diff_splitter import iter_byte_lines, split_unified_diff
+
+COMMIT_DIFF = (
+    b"From 1234 Mon Sep 17 00:00:00 2001\n"
+    b"Subject: [PATCH] fix\n"
+    b"\n"
+    b"diff --git a/src/app.py b/src/app.py\n"
+    b"index 1111111..2222222 100644\n"
+    b"--- a/src/app.py\n"
+    b"+++ b/src/app.py\n"
+    b"@@ -1,3 +1,3 @@\n"
+    b" a\n"
+    b"-b\n"
+    b"+c\n"
+    b" d\n"
+)
+EXPECTED_PATCH = "@@ -1,3 +1,3 @@\n a\n-b\n+c\n d"
+
+def _chunks(data: bytes, size: int) -> list[bytes]:
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+def _streamed(data: bytes, size: int):
+    response = mock.MagicMock(status_code=200, headers={})
+    response.iter_content.side_effect = lambda chunk_size: iter(_chunks(data, size))
+    return response
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 16, len(COMMIT_DIFF)])
+def test_chunk_boundaries_add_no_lines(size):
+    lines = list(iter_byte_lines(_chunks(COMMIT_DIFF, size)))
+    assert lines == COMMIT_DIFF.split(b"\n")[:-1]
+
+def test_chunks_ending_on_newlines_keep_the_patch_intact():
+    # every chunk ends right on a newline, which made iter_lines(delimiter=...) yield b""
+    chunks = [line + b"\n" for line in COMMIT_DIFF.split(b"\n")[:-1]]
+    [entry] = split_unified_diff(iter_byte_lines(chunks))
+    assert entry["patch"] == EXPECTED_PATCH
+    assert (entry["additions"], entry["deletions"]) == (1, 1)
+
+def test_last_line_without_newline_is_kept():
+    assert list(iter_byte_lines([b"a\nb", b"c"])) == [b"a", b"bc"]
+
+def test_form_feed_and_carriage_return_do_not_split_lines():
+    assert list(iter_byte_lines([b"+x\x0cy\n+z\r\n"])) == [b"+x\x0cy", b"+z\r"]
+
+@pytest.mark.parametrize("size", [1, 5, 64 * 1024])
+def test_streamed_commit_diff(size):
+    scm = GitHubSCM("token")
+    with mock.patch("requests.request", return_value=_streamed(COMMIT_DIFF, size)):
+        [entry] = scm.iter_commit_file_diffs("org/repo", "a" * 40)
+    assert entry["filename"] == "src/app.py"
+    assert entry["patch"] == EXPECTED_PATCH
+
+PR_DIFF = (
+    b"diff --git a/new.py b/new.py\n"
+    b"new file mode 100644\n"
+    b"index 0000000..1111111\n"
+    b"--- /dev/null\n"
+    b"+++ b/new.py\n"
+    b"@@ -0,0 +1,2 @@\n"
+    b"+x = 1\n"
+    b"+\n"
+    b"diff --git a/old.py b/old.py\n"
+    b"deleted file mode 100644\n"
+    b"--- a/old.py\n"
+    b"+++ /dev/null\n"
+    b"@@ -1 +0,0 @@\n"
+    b"-y = 2\n"
+    b"diff --git a/a.py b/b.py\n"
+    b"similarity index 90%\n"
+    b"rename from a.py\n"
+    b"rename to b.py\n"
+    b"--- a/a.py\n"
+    b"+++ b/b.py\n"
+    b"@@ -1,2 +1,2 @@\n"
+    b" keep\n"
+    b"-old\n"
+    b"+new\n"
+    b"diff --git a/logo.png b/logo.png\n"
+    b"index 3333333..4444444 100644\n"
+    b"Binary files a/logo.png and b/logo.png differ\n"
+)
+
+def test_split_unified_diff_file_entries():
+    added, removed, renamed, binary = split_unified_diff(iter_byte_lines([PR_DIFF]))
+    assert added == {
+        "filename": "new.py", "status": "added", "additions": 2, "deletions": 0, "changes": 2,
+        "patch": "@@ -0,0 +1,2 @@\n+x = 1\n+"
+    }
+    assert (removed["filename"], removed["status"], removed["patch"]) == ("old.py", "removed", "@@ -1 +0,0 @@\n-y = 2")
+    assert (renamed["filename"], renamed["previous_filename"], renamed["status"]) == ("b.py", "a.py", "renamed")
+    assert renamed["patch"] == "@@ -1,2 +1,2 @@\n keep\n-old\n+new"
+    assert binary == {"filename": "logo.png", "status": "modified", "additions": 0, "deletions": 0, "changes": 0}
+
+def test_quoted_paths_are_decoded():
+    diff = (
+        b'diff --git "a/caf\\303\\251.py" "b/caf\\303\\251.py"\n'
+        b'--- "a/caf\\303\\251.py"\n'
+        b'+++ "b/caf\\303\\251.py"\n'
+        b"@@ -1 +1 @@\n-a\n+b\n"
+    )
+    [entry] = split_unified_diff(iter_byte_lines([diff]))
+    assert entry["filename"] == "café.py"
+
+@pytest.mark.parametrize("size", [1, 3, 512, 64 * 1024])
+def test_streamed_pull_request_diff(size):
+    scm = GitHubSCM("token")
+    with mock.patch("requests.request", return_value=_streamed(PR_DIFF, size)):
+        entries = list(scm.iter_pull_request_file_diffs("org/repo", 7))
+    assert entries == list(split_unified_diff(PR_DIFF.decode().splitlines()))
+    assert [e["filename"] for e in entries] == ["new.py", "old.py", "b.py", "logo.png"]
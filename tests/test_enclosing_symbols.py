@@ -0,0 +1,60 @@
+import pytest
+from src.code_parser.parser import get_enclosing_symbols
+
+SOURCE = '''\
+import os
+
+class Store:
+    """Keeps items."""
+
+    def add(self, item):
+        def check(value):
+            return value is not None
+        if check(item):
+            self.items.append(item)
+
+    def clear(self):
+        self.items = []
+
+TOP_LEVEL = 1
+'''
+
+def _names(ranges: list, max_chars: int = 10_000, source: str = SOURCE, path: str = "src/store.py") -> list:
+    return [s and s["name"] for s in get_enclosing_symbols(source, path, ranges, max_chars)]
+
+def test_innermost_definition_wins():
+    # Line 8 is inside check(), nested in add(), nested in Store
+    assert _names([(8, 8), (10, 10), (13, 13), (4, 4)]) == ["check", "add", "clear", "Store"]
+
+def test_range_leaving_a_nested_definition_gets_its_parent():
+    # 8-10 starts in check() but ends in add(): add() spans it all
+    assert _names([(8, 10)]) == ["add"]
+    # 10-13 spans two methods: only the class encloses the whole range
+    assert _names([(10, 13)]) == ["Store"]
+
+def test_range_outside_any_definition_falls_back_to_the_first_line():
+    assert _names([(13, 15)]) == ["clear"]
+    assert _names([(1, 1), (15, 15)]) == [None, None]
+
+def test_symbol_fields_use_one_based_lines_and_whole_source_lines():
+    [symbol] = get_enclosing_symbols(SOURCE, "src/store.py", [(13, 13)], max_chars=10_000)
+    assert symbol == {
+        "name": "clear",
+        "signature": "def clear(self):",
+        "start_line": 12,
+        "end_line": 13,
+        "body": "    def clear(self):\n        self.items = []"
+    }
+
+def test_body_is_truncated_at_a_line_boundary():
+    [symbol] = get_enclosing_symbols(SOURCE, "src/store.py", [(4, 4)], max_chars=60)
+    assert symbol["body"].endswith("\n... (truncated)")
+    kept = symbol["body"][:-len("\n... (truncated)")]
+    assert len(kept) <= 60
+    assert SOURCE.splitlines()[2:2 + len(kept.splitlines())] == kept.splitlines()
+    # Span and signature still describe the whole definition
+    assert (symbol["start_line"], symbol["end_line"], symbol["signature"]) == (3, 13, "class Store:")
+
+@pytest.mark.parametrize("path", ["README.md", "data.unknown", "Makefile"])
+def test_unsupported_languages_get_none_per_range(path):
+    assert get_enclosing_symbols("anything", path, [(1, 1), (2, 3)], max_chars=100) == [None, None]
@@ -0,0 +1,55 @@
+import pytest
+from src.services.fetch_planner import FetchPlan, content_from_added_patch, plan_content_fetches
+
+@pytest.mark.parametrize("patch, content", [
+    ("@@ -0,0 +1,2 @@\n+x = 1\n+y = 2", "x = 1\ny = 2\n"),
+    # A one-line hunk header leaves out the count
+    ("@@ -0,0 +1 @@\n+x = 1", "x = 1\n"),
+    # Without a final newline git appends a marker line, which isn't content
+    ("@@ -0,0 +1,2 @@\n+x = 1\n+y = 2\n\\ No newline at end of file", "x = 1\ny = 2"),
+    ("@@ -0,0 +1 @@\n+x = 1\n\\ No newline at end of file", "x = 1"),
+    # Blank lines and lines that look like diff syntax are content once the '+' is stripped
+    ("@@ -0,0 +1,4 @@\n+\n+-1\n++2\n+@@ x", "\n-1\n+2\n@@ x\n"),
+])
+def test_added_file_content_is_rebuilt_from_the_patch(patch, content):
+    assert content_from_added_patch(patch) == content
+
+@pytest.mark.parametrize("patch", [
+    "",
+    # Not a new file: the hunk starts elsewhere or has a base side
+    "@@ -1,2 +1,3 @@\n x = 1\n+y = 2\n z = 3",
+    "@@ -0,0 +5,2 @@\n+x = 1\n+y = 2",
+    # Line counts that don't match the header (e.g. a patch GitHub truncated)
+    "@@ -0,0 +1,3 @@\n+x = 1\n+y = 2",
+    "@@ -0,0 +1,1 @@\n+x = 1\n+y = 2",
+    "@@ -0,0 +1 @@\n+x = 1\n+y = 2",
+    # Context, removed lines or a second hunk mean this isn't a whole-file addition
+    "@@ -0,0 +1,2 @@\n+x = 1\n y = 2",
+    "@@ -0,0 +1,1 @@\n+x = 1\n-y = 2",
+    "@@ -0,0 +1,1 @@\n+x = 1\n@@ -0,0 +1,1 @@\n+y = 2",
+])
+def test_incomplete_patches_are_not_rebuilt(patch):
+    assert content_from_added_patch(patch) is None
+
+@pytest.mark.parametrize("file_diff, has_base, needs_head, plan", [
+    ({"filename": "a.py", "status": "removed", "changes": 3}, True, True, FetchPlan(skip="file removed")),
+    ({"filename": "b.py", "previous_filename": "a.py", "status": "renamed", "changes": 0}, True, True,
+     FetchPlan(skip="renamed without content changes")),
+    ({"filename": "b.py", "previous_filename": "a.py", "status": "renamed", "additions": 1, "deletions": 1}, True, False,
+     FetchPlan(base_path="a.py", head_path="b.py")),
+    ({"filename": "a.py", "status": "added", "patch": "@@ -0,0 +1 @@\n+x = 1"}, True, True, FetchPlan(head_content="x = 1\n")),
+    # A truncated added patch only costs a fetch when the head is needed
+    ({"filename": "a.py", "status": "added", "patch": "@@ -0,0 +1,9 @@\n+x = 1"}, True, True, FetchPlan(head_path="a.py")),
+    ({"filename": "a.py", "status": "added", "patch": "@@ -0,0 +1,9 @@\n+x = 1"}, True, False, FetchPlan()),
+    ({"filename": "a.py", "status": "modified", "changes": 2}, True, False, FetchPlan(base_path="a.py", head_path="a.py")),
+    # Without a base (root commit) only a wanted head is fetched
+    ({"filename": "a.py", "status": "modified", "changes": 2}, False, False, FetchPlan()),
+    ({"filename": "a.py", "status": "modified", "changes": 2}, False, True, FetchPlan(head_path="a.py")),
+])
+def test_plan_content_fetches(file_diff, has_base, needs_head, plan):
+    assert plan_content_fetches(file_diff, has_base, needs_head) == plan
+
+def test_semantic_check_needs_both_revisions():
+    assert plan_content_fetches({"filename": "a.py", "status": "modified", "changes": 2}, True, False).semantic_check
+    assert not plan_content_fetches({"filename": "a.py", "status": "added", "patch": "@@ -0,0 +1 @@\n+x = 1"}, True, True).semantic_check
+    assert not plan_content_fetches({"filename": "a.py", "status": "modified", "changes": 2}, False, True).semantic_check
@@ -0,0 +1,78 @@
+import re
+import pytest
+from src.config import settings
+from src.models.review_config_model import RepoReviewConfig
+from src.services.review_config import ReviewConfig
+from src.utils.filter_utils import PathMatcher, glob_to_regex
+
+@pytest.mark.parametrize("pattern, path, matches", [
+    # '*' and '?' stay within one path segment
+    ("src/*.py", "src/app.py", True),
+    ("src/*.py", "src/api/app.py", False),
+    ("src/?.py", "src/a.py", True),
+    ("src/?.py", "src/ab.py", False),
+    ("src/?.py", "src//.py", False),
+    # '**' crosses directories, including none
+    ("src/**/*.py", "src/app.py", True),
+    ("src/**/*.py", "src/api/v1/app.py", True),
+    ("src/**", "src/api/v1/app.py", True),
+    ("**/fixtures", "tests/unit/fixtures/data.json", True),
+    # Patterns without '/' match at any depth, with '/' they are anchored to the root
+    ("*.pb.go", "api/v1/service.pb.go", True),
+    ("node_modules", "web/node_modules/react/index.js", True),
+    ("docs/generated", "docs/generated/api.md", True),
+    ("docs/generated", "site/docs/generated/api.md", False),
+    ("/build", "build/out.js", True),
+    ("/build", "web/build/out.js", False),
+    # A trailing '/' only matches directories
+    ("dist/", "dist/app.js", True),
+    ("dist/", "dist", False),
+    # Character classes, including negation
+    ("file[0-9].txt", "file7.txt", True),
+    ("file[!0-9].txt", "file7.txt", False),
+    ("file[!0-9].txt", "fileA.txt", True),
+    # Regex metacharacters are literal
+    ("a+b.py", "a+b.py", True),
+    ("a+b.py", "aab.py", False),
+])
+def test_glob_to_regex(pattern, path, matches):
+    assert bool(re.fullmatch(glob_to_regex(pattern), path)) is matches
+
+def test_negated_patterns_reinclude_paths():
+    matcher = PathMatcher(["vendor/", "!vendor/internal/**"])
+    assert matcher.is_ignored("vendor/lib/x.go")
+    assert not matcher.is_ignored("vendor/internal/x.go")
+    assert matcher.filter(["vendor/lib/x.go", "main.go"]) == ["main.go"]
+
+def test_settings_patterns_ignore_case():
+    matcher = PathMatcher(["src/Generated/*.py"], case_insensitive_patterns=["*.lock", "node_modules"])
+    assert matcher.is_ignored("web/Cargo.LOCK")
+    assert matcher.is_ignored("Node_Modules/x.js")
+    # Repository patterns stay case-sensitive
+    assert matcher.is_ignored("src/Generated/a.py")
+    assert not matcher.is_ignored("src/generated/a.py")
+
+def test_per_path_overrides_apply_in_order():
+    config = ReviewConfig(RepoReviewConfig(overrides=[
+        {"path": "src/**", "model": "small-model", "chunk_size": 20},
+        {"path": "src/payments/**", "model": "large-model", "risk_weight": 2.0},
+        {"path": "*.sql", "chunking": "symbols"},
+    ]))
+    defaults = config.rules_for("README.rst")
+    assert defaults == {"model": None, "chunk_size": settings.review_max_lines, "chunking": settings.review_chunking, "risk_weight": None}
+    assert config.rules_for("src/api/app.py") == {**defaults, "model": "small-model", "chunk_size": 20}
+    # Later overrides win, fields they don't set keep earlier values
+    assert config.rules_for("src/payments/charge.py") == {**defaults, "model": "large-model", "chunk_size": 20, "risk_weight": 2.0}
+    assert config.rules_for("db/migrate.sql")["chunking"] == "symbols"
+
+def test_repo_ignores_and_global_settings_combine(monkeypatch):
+    monkeypatch.setattr(settings, "ignored_extensions", ".lock")
+    monkeypatch.setattr(settings, "ignored_files", "LICENSE")
+    monkeypatch.setattr(settings, "ignored_directories", "node_modules")
+    config = ReviewConfig(RepoReviewConfig(ignore=["docs/**", "!docs/api/**"]))
+    assert not config.should_review("poetry.lock")
+    assert not config.should_review("sub/LICENSE")
+    assert not config.should_review("web/node_modules/x.js")
+    assert not config.should_review("docs/guide.md")
+    assert config.should_review("docs/api/index.md")
+    assert config.should_review("src/app.py")
@@ -0,0 +1,113 @@
+import base64
+import random
+import pytest
+from src.utils.generated_detector import GeneratedFileDetector, parse_gitattributes, shannon_entropy
+
+def _patch(lines: list[str], start: int = 1) -> str:
+    return f"@@ -0,0 +{start},{len(lines)} @@\n" + "\n".join(f"+{line}" for line in lines)
+
+def _detect(filename: str, patch: str = "", gitattributes: str = "") -> str | None:
+    detector = GeneratedFileDetector(parse_gitattributes(gitattributes))
+    return detector.detect({"filename": filename, "patch": patch})
+
+GITATTRIBUTES = """\
+# generated clients
+api/client/** linguist-generated
+api/client/handwritten.py -linguist-generated
+third_party/ linguist-vendored=true
+docs/** linguist-documentation
+assets/legacy.js linguist-vendored=false
+"""
+
+@pytest.mark.parametrize("filename, expected", [
+    ("api/client/models.py", "gitattributes"),
+    ("api/client/deep/nested/types.py", "gitattributes"),
+    ("third_party/lib/util.c", "gitattributes"),
+    # Unset with '-' or '=false', or an unrelated attribute, doesn't mark the path
+    ("api/client/handwritten.py", None),
+    ("assets/legacy.js", None),
+    ("docs/guide/setup.py", None),
+    ("src/api/client/models.py", None),
+])
+def test_gitattributes(filename, expected):
+    assert _detect(filename, gitattributes=GITATTRIBUTES) == expected
+
+def test_gitattributes_without_linguist_attributes():
+    assert parse_gitattributes("*.sh text eol=lf\n# comment\n\n") is None
+
+@pytest.mark.parametrize("filename, expected", [
+    ("static/app.min.js", "path_pattern"),
+    ("static/site.min.css", "path_pattern"),
+    ("proto/user_pb2.py", "path_pattern"),
+    ("proto/user_pb2_grpc.py", "path_pattern"),
+    ("api/user.pb.go", "path_pattern"),
+    ("lib/model.g.dart", "path_pattern"),
+    ("pkg/apis/zz_generated.deepcopy.go", "path_pattern"),
+    ("src/types.generated.ts", "path_pattern"),
+    ("vendor/github.com/pkg/errors/errors.go", "path_pattern"),
+    ("web/dist/main.js", "path_pattern"),
+    ("src/__generated__/schema.ts", "path_pattern"),
+    ("src/app.js", None),
+    ("src/minify.js", None),
+    ("src/pb2_helpers.py", None),
+    ("src/vendors.py", None),
+    ("src/distance.py", None),
+    ("src/generated_report.py", None),
+])
+def test_path_patterns(filename, expected):
+    assert _detect(filename, _patch(["x = 1"])) == expected
+
+@pytest.mark.parametrize("header, expected", [
+    ("// Code generated by protoc-gen-go. DO NOT EDIT.", "generated_header"),
+    ("# @generated by pants", "generated_header"),
+    ("/* Auto-generated by the build, do not edit */", "generated_header"),
+    ('"""This file was automatically generated."""', "generated_header"),
+    ("# DO NOT EDIT", "generated_header"),
+    ("# Helpers for code that is auto-generated elsewhere", None),
+    ("# Please do not edit the fixtures by hand without updating the docs", None),
+    ("def generated_by(user):", None),
+])
+def test_generated_headers(header, expected):
+    assert _detect("src/client.py", _patch([header, "x = 1"])) == expected
+
+def test_generated_header_only_counts_at_the_top_of_the_file():
+    marker = "// Code generated by protoc-gen-go. DO NOT EDIT."
+    assert _detect("src/client.go", _patch([marker, "x := 1"], start=40)) is None
+    assert _detect("src/client.go", _patch(["x := 1"] * 20 + [marker])) is None
+
+def _random_base64(chars: int, seed: int = 0) -> str:
+    return base64.b64encode(random.Random(seed).randbytes(chars)).decode()[:chars]
+
+def _lines(text: str, width: int) -> list[str]:
+    return [text[i:i + width] for i in range(0, len(text), width)]
+
+CODE_LINE = "    total = compute_total(items, discount=rate, currency=currency)  # keep cents"
+
+@pytest.mark.parametrize("filename, lines, expected", [
+    # One very long line of bundled JavaScript
+    ("static/app.js", ["var a=function(b){return b+1};" * 100], "minified"),
+    ("static/app.js", ["a" * 250] * 10, "minified"),
+    # Embedded base64 blob wrapped at 76/100 columns: short lines, but no whitespace and ~6 bits per char
+    ("src/assets.py", _lines(_random_base64(4000), 76), "high_entropy"),
+    ("src/assets.py", _lines(_random_base64(3000, seed=1), 100), "high_entropy"),
+    # Below the size floor, neither heuristic applies
+    ("static/app.js", ["var a=function(b){return b+1};" * 60], None),
+    ("src/assets.py", _lines(_random_base64(1500), 76), None),
+    # Ordinary code: short lines, whitespace, low entropy
+    ("src/billing.py", [CODE_LINE] * 60, None),
+    # Long but low-entropy lines (hex dump) aren't encoded blobs
+    ("src/fixture.py", _lines(random.Random(2).randbytes(2000).hex(), 100), None),
+])
+def test_minified_and_high_entropy_content(filename, lines, expected):
+    assert _detect(filename, _patch(lines, start=50)) == expected
+
+def test_only_added_lines_count_towards_content_heuristics():
+    blob = "a" * 3000
+    patch = f"@@ -50,2 +50,2 @@\n-{blob}\n x = 1\n+y = 2"
+    assert _detect("src/app.js", patch) is None
+
+def test_shannon_entropy():
+    assert shannon_entropy("") == 0.0
+    assert shannon_entropy("aaaa") == 0.0
+    assert shannon_entropy("abab") == pytest.approx(1.0)
+    assert shannon_entropy("".join(chr(c) for c in range(64))) == pytest.approx(6.0)
@@ -0,0 +1,119 @@
+import pytest
+from src.config import settings
+from src.services.scm.github import GitHubSCM
+from src.services.scm.github_graphql import GRAPHQL_MAX_FIRST, GraphQLQueryPlanner, QueryPlan
+
+def test_first_page_asks_for_full_connections():
+    plan = GraphQLQueryPlanner(comments_per_thread=50).plan()
+    assert plan == QueryPlan(files_first=100, threads_first=100, comments_first=50)
+    # Nested comments multiply: 100 files + 100 threads + 100 x 50 comments
+    assert plan.nodes == 5200
+    assert plan.cost == 1
+
+def test_comments_per_thread_is_clamped_to_the_connection_limit():
+    assert GraphQLQueryPlanner(comments_per_thread=500).plan().comments_first == GRAPHQL_MAX_FIRST
+    assert GraphQLQueryPlanner(comments_per_thread=0).plan().comments_first == 1
+
+def test_threads_shrink_to_stay_under_the_node_limit():
+    plan = GraphQLQueryPlanner(comments_per_thread=50, max_nodes=1000).plan()
+    assert plan.files_first == 100
+    assert plan.threads_first == 17
+    assert plan.nodes <= 1000 < QueryPlan(100, 18, 50).nodes
+
+def test_comments_shrink_once_a_single_thread_is_over_the_limit():
+    plan = GraphQLQueryPlanner(comments_per_thread=50, max_nodes=150).plan()
+    assert (plan.threads_first, plan.comments_first) == (1, 49)
+    assert plan.nodes == 150
+
+def test_cost_counts_one_request_per_connection():
+    # files + threads + one comments connection per thread, per 100 requests
+    assert QueryPlan(100, 100, 50).cost == 1
+    assert QueryPlan(1, 149, 1).cost == 2
+    assert QueryPlan(5, 0, 0).cost == 1
+
+def test_threads_shrink_to_stay_under_the_cost_target():
+    plan = GraphQLQueryPlanner(comments_per_thread=10, max_cost=0).plan()
+    assert plan.threads_first == 1
+
+@pytest.mark.parametrize("files_remaining, threads_remaining, expected", [
+    (0, 30, QueryPlan(0, 30, 50)),
+    (5, 0, QueryPlan(5, 0, 0)),
+    (250, 0, QueryPlan(100, 0, 0)),
+    (0, 0, QueryPlan(0, 0, 0)),
+])
+def test_follow_up_pages_are_sized_to_what_remains(files_remaining, threads_remaining, expected):
+    plan = GraphQLQueryPlanner(comments_per_thread=50).plan(files_remaining, threads_remaining)
+    assert plan == expected
+
+def _page(files: list, files_next: bool, threads: list = None, total_threads: int = 0, cursor: str = "c1") -> dict:
+    page = {
+        "number": 7, "isDraft": False, "changedFiles": 3,
+        "baseRefName": "main", "baseRefOid": "b" * 40, "headRefName": "feature", "headRefOid": "h" * 40,
+        "files": {"pageInfo": {"hasNextPage": files_next, "endCursor": cursor}, "nodes": files},
+    }
+    if threads is not None:
+        page["reviewThreads"] = {
+            "totalCount": total_threads,
+            "pageInfo": {"hasNextPage": False, "endCursor": "t1"},
+            "nodes": threads
+        }
+    return page
+
+def _file(path: str, change_type: str, additions: int = 1, deletions: int = 0) -> dict:
+    return {"path": path, "additions": additions, "deletions": deletions, "changeType": change_type}
+
+def test_snapshot_pages_files_and_maps_to_rest_shape(monkeypatch):
+    monkeypatch.setattr(settings, "github_graphql_comments_per_thread", 20)
+    thread = {
+        "isResolved": False, "isOutdated": True, "path": "src/old.py", "line": None, "originalLine": 12,
+        "comments": {"nodes": [{"databaseId": 99, "body": "nit", "updatedAt": "2024-01-01T00:00:00Z", "author": None}]}
+    }
+    pages = [
+        _page([_file("src/new.py", "ADDED", 5), _file("src/gone.py", "DELETED", 0, 9)], True, [thread], total_threads=1),
+        _page([_file("src/app.py", "RENAMED", 2, 1)], False, cursor="c2"),
+    ]
+    calls = []
+
+    def graphql(query, variables):
+        calls.append(variables)
+        return {"rateLimit": {"cost": 1, "remaining": 4999}, "repository": {"pullRequest": pages[len(calls) - 1]}}
+
+    scm = GitHubSCM("graphql-token")
+    monkeypatch.setattr(scm, "_graphql", graphql)
+    snapshot = scm.get_pull_request_snapshot("org/repo", 7)
+
+    first, second = calls
+    assert (first["owner"], first["name"], first["number"]) == ("org", "repo", 7)
+    assert first["withFiles"] and first["withThreads"] and first["commentsFirst"] == 20
+    assert first["filesAfter"] is None
+    # Only the file connection had more: the follow-up asks for the one file left, after the cursor
+    assert second["withFiles"] and not second["withThreads"]
+    assert second["filesFirst"] == 1 and second["filesAfter"] == "c1"
+
+    assert snapshot["pull_request"] == {
+        "number": 7, "draft": False, "changed_files": 3,
+        "base": {"ref": "main", "sha": "b" * 40}, "head": {"ref": "feature", "sha": "h" * 40}
+    }
+    assert [(f["filename"], f["status"], f["changes"]) for f in snapshot["files"]] == [
+        ("src/new.py", "added", 5), ("src/gone.py", "removed", 9), ("src/app.py", "renamed", 3)
+    ]
+    assert snapshot["comments"] == [{
+        "id": 99, "path": "src/old.py", "line": 12, "body": "nit", "user": {"login": None},
+        "updated_at": "2024-01-01T00:00:00Z", "resolved": False, "outdated": True
+    }]
+    assert scm._head_shas[("org/repo", 7)] == "h" * 40
+
+def test_snapshot_comment_line_prefers_the_current_line(monkeypatch):
+    thread = {
+        "isResolved": True, "isOutdated": False, "path": "src/app.py", "line": 4, "originalLine": 2,
+        "comments": {"nodes": [{"databaseId": 1, "body": "x", "updatedAt": None, "author": {"login": "bot"}}]}
+    }
+    page = _page([_file("src/app.py", "MODIFIED")], False, [thread], total_threads=1)
+    page["changedFiles"] = 1
+    scm = GitHubSCM("graphql-token")
+    monkeypatch.setattr(scm, "_graphql", lambda query, variables: {
+        "rateLimit": {"cost": 1, "remaining": 4999}, "repository": {"pullRequest": page}
+    })
+    snapshot = scm.get_pull_request_snapshot("org/repo", 7)
+    assert [(c["line"], c["user"]["login"], c["resolved"]) for c in snapshot["comments"]] == [(4, "bot", True)]
+    assert snapshot["files"][0]["status"] == "modified"
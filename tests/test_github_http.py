@@ -0,0 +1,219 @@
+import json
+import time
+from unittest import mock
+import pytest
+import requests
+from fastapi import HTTPException
+from src.config import settings
+from src.services.scm import github, rate_limit
+from src.services.scm.github import GitHubSCM
+from src.services.scm.http_cache import ConditionalRequestCache
+from src.services.scm.rate_limit import RateLimitExhausted, RateLimitGovernor, token_key
+from src.utils.cache_backends import MemoryCache
+
+def _response(status: int, body=None, headers: dict = None, url: str = "https://api.github.com/repos/org/repo/pulls") -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(body).encode() if body is not None else b""
+    response.encoding = "utf-8"
+    response.headers = requests.structures.CaseInsensitiveDict(headers or {})
+    response.url = url
+    return response
+
+def _rate_headers(remaining: int, reset_in: float = 60, limit: int = 5000) -> dict:
+    return {"X-RateLimit-Limit": str(limit), "X-RateLimit-Remaining": str(remaining), "X-RateLimit-Reset": str(time.time() + reset_in)}
+
+@pytest.fixture
+def http_cache(monkeypatch):
+    monkeypatch.setattr(settings, "github_http_cache", True)
+    cache = ConditionalRequestCache(max_entries=100, max_body_bytes=1024)
+    cache._store = MemoryCache("github_http_test", 100)
+    monkeypatch.setattr(github, "http_cache", cache)
+    return cache
+
+@pytest.fixture
+def governor(monkeypatch):
+    governor = RateLimitGovernor()
+    monkeypatch.setattr(github, "rate_limit_governor", governor)
+    return governor
+
+class _Sent:
+    """requests.request stand-in that replays the given responses and records the request headers."""
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.headers = []
+
+    def __call__(self, method, url, headers=None, **kwargs):
+        self.headers.append(headers)
+        return self.responses.pop(0)
+
+# --- Conditional requests (ETag / 304 replay) ---
+
+def test_not_modified_replays_the_cached_body(http_cache, governor):
+    scm = GitHubSCM("etag-token")
+    link = '<https://api.github.com/repos/org/repo/pulls?page=2>; rel="next", <https://api.github.com/repos/org/repo/pulls?page=3>; rel="last"'
+    sent = _Sent(
+        _response(200, [{"number": 1}], {"ETag": '"v1"', "Link": link, "Content-Type": "application/json"}),
+        _response(304, headers={"ETag": '"v1"', **_rate_headers(4999)}),
+    )
+    with mock.patch("requests.request", sent):
+        first = scm._request("GET", "repos/org/repo/pulls", params={"state": "open"})
+        replayed = scm._request("GET", "repos/org/repo/pulls", params={"state": "open"})
+
+    assert "If-None-Match" not in sent.headers[0]
+    assert sent.headers[1]["If-None-Match"] == '"v1"'
+    assert replayed.status_code == 200
+    assert replayed.json() == first.json() == [{"number": 1}]
+    # Pagination keeps working from the cached Link header; fresh headers from the 304 win
+    assert replayed.links["last"]["url"].endswith("page=3")
+    assert replayed.headers["X-RateLimit-Remaining"] == "4999"
+
+def test_changed_resource_replaces_the_cached_entry(http_cache, governor):
+    scm = GitHubSCM("etag-token")
+    sent = _Sent(
+        _response(200, {"v": 1}, {"ETag": '"v1"'}),
+        _response(200, {"v": 2}, {"ETag": '"v2"'}),
+        _response(304, headers={"ETag": '"v2"'}),
+    )
+    with mock.patch("requests.request", sent):
+        scm._request("GET", "repos/org/repo")
+        assert scm._request("GET", "repos/org/repo").json() == {"v": 2}
+        assert scm._request("GET", "repos/org/repo").json() == {"v": 2}
+    assert [h.get("If-None-Match") for h in sent.headers] == [None, '"v1"', '"v2"']
+
+def test_last_modified_is_revalidated_too(http_cache, governor):
+    scm = GitHubSCM("etag-token")
+    stamp = "Wed, 01 Jan 2026 00:00:00 GMT"
+    sent = _Sent(_response(200, {"v": 1}, {"Last-Modified": stamp}), _response(304))
+    with mock.patch("requests.request", sent):
+        scm._request("GET", "repos/org/repo")
+        assert scm._request("GET", "repos/org/repo").json() == {"v": 1}
+    assert sent.headers[1]["If-Modified-Since"] == stamp
+
+@pytest.mark.parametrize("request_kwargs, first", [
+    # Nothing to revalidate with
+    ({}, _response(200, {"v": 1})),
+    # Larger than the cache's body limit
+    ({}, _response(200, {"v": "x" * 2000}, {"ETag": '"big"'})),
+    # Only GETs are cached, and never streamed bodies
+    ({"method": "POST"}, _response(201, {"v": 1}, {"ETag": '"post"'})),
+    ({"stream": True}, _response(200, {"v": 1}, {"ETag": '"stream"'})),
+])
+def test_uncacheable_responses_are_not_revalidated(http_cache, governor, request_kwargs, first):
+    scm = GitHubSCM("etag-token")
+    method = request_kwargs.pop("method", "GET")
+    sent = _Sent(first, _response(200, {"v": 2}))
+    with mock.patch("requests.request", sent):
+        scm._request(method, "repos/org/repo", **request_kwargs)
+        scm._request(method, "repos/org/repo", **request_kwargs)
+    assert "If-None-Match" not in sent.headers[1]
+
+def test_cache_entries_are_per_token_and_accept_header(http_cache, governor):
+    sent = _Sent(
+        _response(200, {"v": 1}, {"ETag": '"v1"'}),
+        _response(200, {"v": 1}, {"ETag": '"v1"'}),
+        _response(200, "diff", {"ETag": '"d1"'}),
+    )
+    with mock.patch("requests.request", sent):
+        GitHubSCM("token-a")._request("GET", "repos/org/repo")
+        GitHubSCM("token-b")._request("GET", "repos/org/repo")
+        GitHubSCM("token-a")._request("GET", "repos/org/repo", accept="application/vnd.github.v3.diff")
+    assert all("If-None-Match" not in h for h in sent.headers)
+
+def test_not_modified_without_a_cached_body_is_an_error(http_cache, governor):
+    scm = GitHubSCM("etag-token")
+    with mock.patch("requests.request", _Sent(_response(304))):
+        with pytest.raises(HTTPException) as e:
+            scm._request("GET", "repos/org/repo")
+    assert e.value.status_code == 304
+
+# --- Rate limit governor ---
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(settings, "github_rate_limit_slowdown", 100)
+    monkeypatch.setattr(settings, "github_rate_limit_reserve", 50)
+    monkeypatch.setattr(settings, "github_rate_limit_max_wait", 120)
+
+@pytest.mark.parametrize("remaining, priority, waits_for_reset", [
+    (40, "low", True),
+    (50, "low", True),
+    (51, "low", False),
+    (40, "normal", False),
+    (0, "normal", True),
+    (0, "low", True),
+])
+def test_low_priority_work_waits_for_the_reset_near_the_limit(limits, remaining, priority, waits_for_reset):
+    governor = RateLimitGovernor()
+    governor.update("key", _rate_headers(remaining, reset_in=60))
+    wait, until_reset = governor.delay("key", "core", priority)
+    assert until_reset == waits_for_reset
+    if waits_for_reset:
+        assert wait == pytest.approx(61, abs=1)
+    else:
+        # Below the slowdown threshold requests are paced, never held until the reset
+        assert 0 < wait < 60
+
+def test_deferred_requests_do_not_spend_the_reserve(limits):
+    governor = RateLimitGovernor()
+    governor.update("key", _rate_headers(50))
+    for _ in range(5):
+        governor.delay("key", "core", "low")
+    assert governor.snapshot()[0]["remaining"] == 50
+    governor.delay("key", "core", "normal")
+    assert governor.snapshot()[0]["remaining"] == 49
+
+def test_plenty_of_budget_or_a_passed_reset_means_no_wait(limits):
+    governor = RateLimitGovernor()
+    assert governor.delay("key", "core", "low") == (0.0, False)
+    governor.update("key", _rate_headers(4000))
+    assert governor.delay("key", "core", "low") == (0.0, False)
+    governor.update("key", _rate_headers(0, reset_in=-5))
+    assert governor.delay("key", "core", "low") == (0.0, False)
+
+def test_limits_are_tracked_per_token_and_resource(limits):
+    governor = RateLimitGovernor()
+    governor.update("key", _rate_headers(10))
+    governor.update("key", {**_rate_headers(4000), "X-RateLimit-Resource": "graphql"})
+    assert governor.delay("key", "core", "low")[1]
+    assert governor.delay("key", "graphql", "low") == (0.0, False)
+    assert governor.delay("other", "core", "low") == (0.0, False)
+
+def test_acquire_sleeps_until_the_reset_or_gives_up(limits, monkeypatch):
+    slept = []
+    monkeypatch.setattr(rate_limit.time, "sleep", slept.append)
+    governor = RateLimitGovernor()
+    governor.update("key", _rate_headers(10, reset_in=30))
+    governor.acquire("key", "core", "low")
+    assert slept and slept[0] == pytest.approx(31, abs=1)
+
+    governor.update("key", _rate_headers(10, reset_in=600))
+    with pytest.raises(RateLimitExhausted):
+        governor.acquire("key", "core", "low")
+
+def test_low_priority_client_defers_while_pr_reviews_proceed(limits, governor, monkeypatch):
+    monkeypatch.setattr(settings, "github_http_cache", False)
+    slept = []
+    monkeypatch.setattr(rate_limit.time, "sleep", slept.append)
+    sent = _Sent(*[_response(200, {}, _rate_headers(45, reset_in=20)) for _ in range(3)])
+    with mock.patch("requests.request", sent):
+        GitHubSCM("shared-token")._request("GET", "repos/org/repo")
+        assert slept == []
+        # A PR review on the same token is paced, but not held until the reset
+        GitHubSCM("shared-token")._request("GET", "repos/org/repo")
+        assert all(wait < 20 for wait in slept)
+        slept.clear()
+        # A push review waits for the reset before spending the reserve
+        GitHubSCM("shared-token", priority="low")._request("GET", "repos/org/repo")
+        assert slept and slept[0] == pytest.approx(21, abs=1)
+    assert governor.snapshot()[0]["token"] == token_key("shared-token")
+
+def test_low_priority_request_fails_fast_when_the_reset_is_too_far(limits, governor, monkeypatch):
+    monkeypatch.setattr(settings, "github_http_cache", False)
+    sent = _Sent(_response(200, {}, _rate_headers(45, reset_in=3600)))
+    with mock.patch("requests.request", sent):
+        GitHubSCM("far-token")._request("GET", "repos/org/repo")
+        with pytest.raises(HTTPException) as e:
+            GitHubSCM("far-token", priority="low")._request("GET", "repos/org/repo")
+    assert e.value.status_code == 429
+    assert len(sent.headers) == 1
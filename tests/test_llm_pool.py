@@ -0,0 +1,117 @@
+import threading
+import time
+import pytest
+from fastapi import HTTPException
+from src.config import settings
+from src.services.llm.base import LLMClient
+from src.services.llm.pool import LLMClientPool, PoolEndpoint
+
+
+class SlowLLM(LLMClient):
+    """Records its peak concurrency; fails when told to."""
+    def __init__(self, seconds: float = 0.05, fail: bool = False):
+        self.model = "test-model"
+        self.seconds = seconds
+        self.fail = fail
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_response(self, messages):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.seconds)
+            if self.fail:
+                raise RuntimeError("endpoint down")
+            return "ok"
+        finally:
+            with self._lock:
+                self.active -= 1
+
+@pytest.fixture(autouse=True)
+def pool_settings(monkeypatch):
+    monkeypatch.setattr(settings, "llm_pool_health_interval", 0)
+    monkeypatch.setattr(settings, "llm_pool_max_inflight_per_endpoint", 2)
+    monkeypatch.setattr(settings, "llm_pool_acquire_timeout", 5)
+
+def _call_concurrently(pool, n):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pool.generate_response([]))) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_inflight_cap_is_enforced_per_endpoint():
+    clients = [SlowLLM(), SlowLLM()]
+    pool = LLMClientPool([PoolEndpoint(f"e{i}", c) for i, c in enumerate(clients)])
+    assert _call_concurrently(pool, 12) == ["ok"] * 12
+    # Calls beyond 2 x 2 slots waited instead of piling onto an endpoint
+    assert [c.peak for c in clients] == [2, 2]
+    assert sum(c.calls for c in clients) == 12
+
+def test_saturated_pool_times_out(monkeypatch):
+    monkeypatch.setattr(settings, "llm_pool_max_inflight_per_endpoint", 1)
+    monkeypatch.setattr(settings, "llm_pool_acquire_timeout", 0.05)
+    pool = LLMClientPool([PoolEndpoint("e0", SlowLLM(seconds=0.5))])
+    worker = threading.Thread(target=pool.generate_response, args=([],))
+    worker.start()
+    time.sleep(0.05)
+    with pytest.raises(HTTPException) as error:
+        pool.generate_response([])
+    assert error.value.status_code == 503
+    worker.join()
+
+def test_failed_call_fails_over_to_another_endpoint():
+    broken, working = SlowLLM(seconds=0, fail=True), SlowLLM(seconds=0)
+    pool = LLMClientPool([PoolEndpoint("broken", broken), PoolEndpoint("working", working)])
+    assert pool.generate_response([]) == "ok"
+    assert working.calls == 1
+
+def test_freed_slot_reaches_the_waiter_that_can_use_it(monkeypatch):
+    monkeypatch.setattr(settings, "llm_pool_max_inflight_per_endpoint", 1)
+    monkeypatch.setattr(settings, "llm_pool_acquire_timeout", 2)
+    pool = LLMClientPool([PoolEndpoint("e0", SlowLLM()), PoolEndpoint("e1", SlowLLM())])
+    e0, e1 = pool._acquire(set()), pool._acquire(set())
+    assert (e0.name, e1.name) == ("e0", "e1")
+    acquired = {}
+
+    def wait_for(name, exclude):
+        started = time.monotonic()
+        endpoint = pool._acquire(exclude)
+        acquired[name] = (endpoint.name, time.monotonic() - started)
+
+    # The first waiter already tried e0; the second one can take it
+    first = threading.Thread(target=wait_for, args=("first", {"e0"}))
+    second = threading.Thread(target=wait_for, args=("second", {"e1"}))
+    first.start()
+    time.sleep(0.05)
+    second.start()
+    time.sleep(0.05)
+    pool._release(e0, ok=True, seconds=0)
+    second.join(timeout=3)
+    assert acquired["second"][0] == "e0"
+    assert acquired["second"][1] < 1
+    pool._release(e1, ok=True, seconds=0)
+    first.join(timeout=3)
+    assert acquired["first"][0] == "e1"
+
+def test_model_override_shares_the_pool(monkeypatch):
+    monkeypatch.setattr(settings, "llm_pool_health_interval", 3600)
+    clients = [SlowLLM(seconds=0), SlowLLM(seconds=0)]
+    pool = LLMClientPool([PoolEndpoint(f"e{i}", c) for i, c in enumerate(clients)])
+    view = pool.with_model("override-model")
+    assert pool.with_model("override-model") is view
+    assert pool.with_model("test-model") is pool
+    before = threading.active_count()
+    assert view.generate_response([]) == "ok"
+    assert pool.generate_response([]) == "ok"
+    # One probe for the pool, however many models route through it
+    assert threading.active_count() == before + 1
+    assert view.model == "override-model"
+    assert sum(e.latency.snapshot()["count"] for e in pool.endpoints) == 2
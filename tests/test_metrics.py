@@ -0,0 +1,121 @@
+import re
+import pytest
+from src.api.metrics import PROMETHEUS_CONTENT_TYPE, get_metrics
+from src.brain.agents.base_agent import agent_stats
+from src.config import settings
+from src.services.cascade import cascade_stats
+from src.services.review_memory import memory_stats
+from src.utils.generated_detector import detection_stats
+from src.utils.metrics import Family, MetricsRegistry, format_labels, stage_seconds
+
+# name{labels} value, as the text exposition format expects
+SAMPLE_RE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_][a-zA-Z0-9_]*="([^"\\]|\\.)*",?)*\})? \S+$')
+
+def test_counter_renders_help_type_and_labelled_samples():
+    registry = MetricsRegistry(prefix="test")
+    counter = registry.counter("files_total", "Files seen.", ("reason",))
+    counter.inc(reason="ignored")
+    counter.inc(2, reason="generated")
+    assert registry.render().splitlines() == [
+        "# HELP test_files_total Files seen.",
+        "# TYPE test_files_total counter",
+        'test_files_total{reason="generated"} 2',
+        'test_files_total{reason="ignored"} 1',
+    ]
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    registry = MetricsRegistry(prefix="test")
+    histogram = registry.histogram("stage_seconds", "Stage time.", ("stage",), buckets=[0.1, 1])
+    for seconds in (0.05, 0.5, 0.5, 3):
+        histogram.observe(seconds, stage="fetch")
+    lines = registry.render().splitlines()
+    assert lines[1] == "# TYPE test_stage_seconds histogram"
+    assert lines[2:] == [
+        'test_stage_seconds_bucket{stage="fetch",le="0.1"} 1',
+        'test_stage_seconds_bucket{stage="fetch",le="1"} 3',
+        'test_stage_seconds_bucket{stage="fetch",le="+Inf"} 4',
+        'test_stage_seconds_sum{stage="fetch"} 4.05',
+        'test_stage_seconds_count{stage="fetch"} 4',
+    ]
+
+def test_label_values_are_escaped():
+    assert format_labels({}) == ""
+    assert format_labels({"path": 'C:\\src\n"x"'}) == '{path="C:\\\\src\\n\\"x\\""}'
+    family = Family("test_errors_total", "counter", "Errors.", [({"detail": 'say "hi"\n'}, 1)])
+    assert family.render()[-1] == 'test_errors_total{detail="say \\"hi\\"\\n"} 1'
+
+def test_collectors_are_rendered_at_scrape_time():
+    registry = MetricsRegistry(prefix="test")
+    values = {"queued": 1}
+    registry.register_collector(lambda: [Family("test_queued", "gauge", "Queued.", [({}, values["queued"])])])
+    values["queued"] = 5
+    assert registry.render().splitlines()[-1] == "test_queued 5"
+
+def test_metrics_endpoint_serves_valid_exposition_text():
+    stage_seconds.observe(0.2, stage="fetch")
+    response = get_metrics()
+    assert response.media_type == PROMETHEUS_CONTENT_TYPE
+    text = response.body.decode()
+    assert text.endswith("\n")
+    lines = text.splitlines()
+    assert "# TYPE prpilot_stage_seconds histogram" in lines
+    assert any(line.startswith('prpilot_stage_seconds_bucket{stage="fetch",le="+Inf"}') for line in lines)
+    assert "# TYPE prpilot_webhook_ingest_seconds histogram" in lines
+    for line in lines:
+        if not line.startswith("#"):
+            assert SAMPLE_RE.match(line), line
+
+def _sample(text: str, line_prefix: str) -> float:
+    [line] = [sample for sample in text.splitlines() if sample.startswith(line_prefix + " ")]
+    return float(line.rsplit(" ", 1)[1])
+
+def test_cascade_savings_are_exported(monkeypatch):
+    monkeypatch.setattr(settings, "llm_cost_per_1k_tokens", 10.0)
+    monkeypatch.setattr(settings, "cascade_screen_cost_per_1k_tokens", 1.0)
+    before = get_metrics().body.decode()
+    cascade_stats.record(escalated=False, screen_tokens=1000, deep_estimate=2000)
+    cascade_stats.record(escalated=True, screen_tokens=1000, deep_estimate=2000)
+    after = get_metrics().body.decode()
+
+    def delta(name):
+        return _sample(after, name) - _sample(before, name)
+
+    assert delta('prpilot_cascade_chunks_total{result="screened"}') == 2
+    assert delta('prpilot_cascade_chunks_total{result="escalated"}') == 1
+    assert delta("prpilot_cascade_screen_tokens_total") == 2000
+    assert delta("prpilot_cascade_deep_tokens_avoided_total") == 2000
+    # 2000 deep tokens avoided at 10/1k, 2000 screening tokens at 1/1k
+    assert delta("prpilot_cascade_cost_saved_total") == pytest.approx(18)
+
+def test_agent_turns_are_exported_per_context():
+    before = get_metrics().body.decode()
+    agent_stats.record({"llm_calls": 3, "tool_calls": 2}, with_context=False)
+    agent_stats.record({"llm_calls": 1, "tool_calls": 0}, with_context=True)
+    after = get_metrics().body.decode()
+    for context, calls in (("without_context", 3), ("with_context", 1)):
+        name = f'prpilot_agent_llm_calls_total{{context="{context}"}}'
+        assert _sample(after, name) - _sample(before, name) == calls
+        name = f'prpilot_agent_chunks_total{{context="{context}"}}'
+        assert _sample(after, name) - _sample(before, name) == 1
+
+def test_generated_file_savings_are_exported_per_heuristic():
+    detection_stats.record("test-heuristic", {"changes": 40, "patch": "x" * 300})
+    detection_stats.record("test-heuristic", {"changes": 2, "patch": None})
+    text = get_metrics().body.decode()
+    assert _sample(text, 'prpilot_generated_files_total{heuristic="test-heuristic"}') == 2
+    assert _sample(text, 'prpilot_generated_changes_total{heuristic="test-heuristic"}') == 42
+    assert _sample(text, 'prpilot_generated_patch_chars_total{heuristic="test-heuristic"}') == 300
+
+def test_memory_savings_are_exported():
+    before = get_metrics().body.decode()
+    memory_stats.record(injected_tokens=100, file_tokens=400, injected=2, capped=3)
+    after = get_metrics().body.decode()
+
+    def delta(name):
+        return _sample(after, name) - _sample(before, name)
+
+    assert delta("prpilot_memory_chunks_total") == 1
+    assert delta("prpilot_memory_tokens_total") == 100
+    assert delta("prpilot_memory_file_tokens_total") == 400
+    assert delta("prpilot_memory_tokens_saved_total") == 300
+    assert delta('prpilot_memory_comments_total{result="capped"}') == 3
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import time
+import pytest
+from src.brain.agents.base_agent import AgentStats
+from src.config import settings
+from src.services import review_budget
+from src.services import reviewer as reviewer_module
+from src.services.llm.base import LLMClient
+from src.services.review_budget import DEFAULT_EXPECTED_TURNS, ReviewBudget, expected_turns
+from src.services.reviewer import ReviewerService
+
+REPO = "org/repo"
+COMMIT = "c" * 40
+
+class FakeLLM(LLMClient):
+    def __init__(self):
+        self.calls = 0
+
+    def generate_response(self, messages):
+        self.calls += 1
+        return json.dumps({"reasoning": "", "model": "answer", "tool_call": None, "content": []})
+
+class FakeSCM:
+    def __init__(self):
+        self.comments = []
+
+    def get_file_structure(self, *args, **kwargs):
+        return ""
+
+    def get_function_content(self, *args, **kwargs):
+        return ""
+
+    def post_comment(self, repo_id, pr_id, body):
+        self.comments.append(("pr", pr_id, body))
+        return True
+
+    def post_commit_comment(self, repo_id, commit_sha, body):
+        self.comments.append(("commit", commit_sha, body))
+        return True
+
+    def get_commit(self, repo_id, commit_sha):
+        return {"sha": commit_sha, "parents": [{"sha": "p" * 40}]}
+
+    def get_file_content(self, repo_id, path, ref=None, missing_ok=False):
+        return None
+
+    def iter_commit_file_diffs(self, repo_id, commit_sha):
+        return iter([])
+
+    def get_commit_comments(self, repo_id, commit_sha):
+        return []
+
+def _chunk(start: int, risk: float) -> dict:
+    return {
+        "filename": "src/app.py", "start_line": start, "end_line": start + 1, "changes": 1, "risk": {"score": risk},
+        "content": f"@@ -{start},1 +{start},2 @@\n{start}:  x = 1\n{start + 1}: +y = 2"
+    }
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(settings, "system_prompt_name", "performance")
+    monkeypatch.setattr(settings, "review_ledger_enabled", False)
+    monkeypatch.setattr(settings, "review_cache_enabled", False)
+    monkeypatch.setattr(settings, "cascade_enabled", False)
+    monkeypatch.setattr(reviewer_module, "expected_turns", lambda: 1)
+    service = ReviewerService()
+    service.llm = FakeLLM()
+    service.scm = FakeSCM()
+    return service
+
+def _budget_for(service, chunks: list) -> ReviewBudget:
+    """A budget that fits exactly the given chunks (memory-less prompts render as "None")."""
+    return ReviewBudget(max_tokens=sum(service._prepare_chunk("None", REPO, 1, dict(c), [])["estimate"] for c in chunks))
+
+def test_parallel_reservations_follow_risk_order(service, monkeypatch):
+    # Highest risk first, as prioritize_chunks orders them; higher-risk chunks finish preparing last
+    tasks = [_chunk(10 * i, risk=1 - i / 10) for i in range(1, 7)]
+    prepare_chunk = service._prepare_chunk
+
+    def slow_for_high_risk(previous_comments, repo_id, pr_id, chunk, file_memory=None):
+        time.sleep(chunk["risk"]["score"] * 0.1)
+        return prepare_chunk(previous_comments, repo_id, pr_id, chunk, file_memory)
+
+    budget = _budget_for(service, tasks[:2])
+    monkeypatch.setattr(service, "_prepare_chunk", slow_for_high_risk)
+    asyncio.run(service._execute_review(REPO, 1, tasks, {}, budget, "parallel"))
+
+    assert [c["start_line"] for c in budget.reviewed] == [10, 20]
+    assert [c["start_line"] for c in budget.skipped] == [30, 40, 50, 60]
+    assert service.llm.calls == 2
+
+def test_reservation_scales_with_expected_turns(service, monkeypatch):
+    one_turn = service._prepare_chunk("", REPO, 1, _chunk(10, 0), [])["estimate"]
+    monkeypatch.setattr(reviewer_module, "expected_turns", lambda: 3)
+    assert service._prepare_chunk("", REPO, 1, _chunk(10, 0), [])["estimate"] == one_turn * 3
+
+def test_expected_turns_follow_observed_agent_turns(monkeypatch):
+    stats = AgentStats()
+    monkeypatch.setattr(review_budget, "agent_stats", stats)
+    assert expected_turns() == DEFAULT_EXPECTED_TURNS
+    stats.record({"llm_calls": 4, "tool_calls": 3}, with_context=False)
+    stats.record({"llm_calls": 1, "tool_calls": 0}, with_context=True)
+    assert expected_turns() == 2.5
+    stats.record({"llm_calls": 0, "tool_calls": 0}, with_context=True)
+    stats.record({"llm_calls": 0, "tool_calls": 0}, with_context=True)
+    stats.record({"llm_calls": 0, "tool_calls": 0}, with_context=True)
+    assert expected_turns() == 1.0
+
+def test_commit_review_posts_the_budget_summary(service, monkeypatch):
+    tasks = [_chunk(10 * i, risk=1 - i / 10) for i in range(1, 4)]
+
+    async def build_review_tasks(*args):
+        return [dict(t) for t in tasks]
+
+    monkeypatch.setattr(service, "_build_review_tasks", build_review_tasks)
+    budget = _budget_for(service, tasks[:1])
+    monkeypatch.setattr(ReviewBudget, "from_settings", classmethod(lambda cls: budget))
+    asyncio.run(service.review_commit(REPO, COMMIT, "parallel"))
+
+    [(kind, target, body)] = service.scm.comments
+    assert (kind, target) == ("commit", COMMIT)
+    assert "review budget reached" in body
+    assert "lines 20-21" in body and "lines 30-31" in body
@@ -0,0 +1,86 @@
+from unittest import mock
+import pytest
+from src.config import settings
+from src.services import review_cache
+from src.services.review_cache import ReviewResultCache, hunk_fingerprint, normalize_hunk
+from src.utils import cache_backends
+from src.utils.symbol_chunker import SymbolChunker
+
+MODEL = "test-model"
+REPO = "acme/app"
+
+@pytest.fixture
+def make_cache(monkeypatch):
+    def make(max_entries: int = 100) -> ReviewResultCache:
+        monkeypatch.setattr(settings, "review_cache_max_entries", max_entries)
+        return ReviewResultCache()
+    with mock.patch.dict(cache_backends._caches, clear=True):
+        yield make
+
+def _chunk(body: str, start_line: int = 10) -> dict:
+    lines = [f"@@ -{start_line},1 +{start_line},1 @@ def run():", f"DEL: -{body}_old", f"{start_line}: +{body}"]
+    return {"filename": "src/app.py", "content": "\n".join(lines), "start_line": start_line}
+
+def test_hit_is_remapped_to_the_new_position(make_cache):
+    cache = make_cache()
+    cache.set(REPO, _chunk("x = 1", 10), MODEL, [{"line": 10, "body": "nit"}])
+    assert cache.get(REPO, _chunk("x = 1", 50), MODEL) == [{"line": 50, "body": "nit"}]
+    assert cache.get(REPO, _chunk("x = 2", 10), MODEL) is None
+    assert cache.get(REPO, _chunk("x = 1", 10), "other-model") is None
+
+def test_results_are_not_shared_across_repositories(make_cache):
+    cache = make_cache()
+    cache.set(REPO, _chunk("x = 1"), MODEL, [{"line": 10, "body": "quotes acme/app code"}])
+    assert cache.get("other/private", _chunk("x = 1"), MODEL) is None
+    assert cache.get(REPO, _chunk("x = 1"), MODEL) == [{"line": 10, "body": "quotes acme/app code"}]
+
+def test_prompt_change_moves_to_a_fresh_namespace(make_cache, monkeypatch):
+    cache = make_cache()
+    cache.set(REPO, _chunk("x = 1"), MODEL, [{"line": 10, "body": "old prompt"}])
+    monkeypatch.setitem(review_cache.PROMPT_REGISTRY, settings.system_prompt_name, "a new prompt")
+    assert cache.get(REPO, _chunk("x = 1"), MODEL) is None
+
+def _function_with_two_edits(gap: int, shift: int = 0) -> tuple[str, str]:
+    """
+    (patch, head content) for one function, preceded by `shift` lines, edited
+    near its top and again `gap` lines further down.
+    """
+    preamble = [f"x{i} = {i}" for i in range(shift)]
+    body = ["    step()"] * (gap + 4)
+    head = "\n".join(preamble + ["def run():"] + body + ["    return 0", ""])
+    first, second = shift + 1, shift + gap + 3
+    patch = "\n".join([
+        f"@@ -{first},3 +{first},3 @@",
+        " def run():",
+        "-    step(-1)",
+        "+" + body[0],
+        " " + body[1],
+        f"@@ -{second},3 +{second},3 @@ def run():",
+        " " + body[gap],
+        "-    step(-1)",
+        "+" + body[gap + 1],
+        " " + body[gap + 2],
+    ])
+    return patch, head
+
+def _symbol_chunk(gap: int, shift: int = 0) -> dict:
+    [chunk] = SymbolChunker().chunk_patch("src/app.py", *_function_with_two_edits(gap, shift), max_tokens=2000)
+    return chunk
+
+def test_hunk_spacing_is_part_of_the_fingerprint(make_cache):
+    near, far, moved = _symbol_chunk(10), _symbol_chunk(30), _symbol_chunk(10, shift=40)
+    assert hunk_fingerprint(near) != hunk_fingerprint(far)
+    assert hunk_fingerprint(near) == hunk_fingerprint(moved)
+
+    cache = make_cache()
+    second_hunk_line = near["start_line"] + 13
+    cache.set(REPO, near, MODEL, [{"line": second_hunk_line, "body": "second hunk"}])
+    assert cache.get(REPO, far, MODEL) is None
+    # The same hunks at the same spacing elsewhere in the file are remapped as a whole
+    assert cache.get(REPO, moved, MODEL) == [{"line": second_hunk_line + 40, "body": "second hunk"}]
+
+def test_normalize_hunk_keeps_offsets_of_later_hunks():
+    content = "@@ -5,2 +5,2 @@ def f():\n5:  a\nDEL: -b\n6: +c\n@@ ... @@\n20: +d"
+    body, signature = normalize_hunk(content)
+    assert signature == "def f():"
+    assert body == "@@ +0\n a\nDEL: -b\n+c\n@@ +15\n+d"
@@ -0,0 +1,74 @@
+import json
+import logging
+from unittest import mock
+import pytest
+from fastapi import HTTPException
+from src.config import settings
+from src.services.review_config import load_review_config
+from src.services.scm.github import GitHubSCM
+
+
+def _not_found():
+    response = mock.MagicMock(status_code=404, text='{"message": "Not Found"}', headers={})
+    response.__enter__.return_value = response
+    return response
+
+def test_missing_config_files_are_not_logged_as_errors(caplog):
+    scm = GitHubSCM("token")
+    with mock.patch("requests.request", return_value=_not_found()), caplog.at_level(logging.DEBUG):
+        config = load_review_config(scm, "org/no-config", "a" * 40)
+    assert config.should_review("src/app.py")
+    assert not [r for r in caplog.records if r.levelno >= logging.WARNING]
+
+def test_unexpected_404_is_still_an_error(caplog):
+    scm = GitHubSCM("token")
+    with mock.patch("requests.request", return_value=_not_found()), pytest.raises(HTTPException) as error:
+        scm.get_file_content("org/repo", "src/app.py", ref="b" * 40)
+    assert error.value.status_code == 404
+    assert any(r.levelno == logging.ERROR for r in caplog.records)
+
+class _ConfigSCM:
+    """Serves a review config whose content can change between calls."""
+    def __init__(self, config: dict):
+        self.config = config
+        self.fetches = []
+
+    def get_file_content(self, repo_id, path, ref=None, missing_ok=False):
+        self.fetches.append((path, ref))
+        return json.dumps(self.config) if path == settings.repo_config_path else None
+
+def test_config_is_cached_per_sha():
+    scm = _ConfigSCM({"ignore": ["legacy/**"]})
+    first = load_review_config(scm, "org/cached", "c" * 40)
+    scm.config = {"ignore": []}
+    assert load_review_config(scm, "org/cached", "c" * 40) is first
+    assert len(scm.fetches) == 2
+
+def test_config_without_sha_is_not_cached():
+    scm = _ConfigSCM({"ignore": ["legacy/**"]})
+    assert not load_review_config(scm, "org/no-sha", None).should_review("legacy/a.py")
+    scm.config = {"ignore": []}
+    assert load_review_config(scm, "org/no-sha", None).should_review("legacy/a.py")
+
+class _FailingSCM(_ConfigSCM):
+    """Fails to read one path with the given status, serves the config otherwise."""
+    def __init__(self, config: dict, failing_path: str, status_code: int):
+        super().__init__(config)
+        self.failing_path = failing_path
+        self.status_code = status_code
+
+    def get_file_content(self, repo_id, path, ref=None, missing_ok=False):
+        if path == self.failing_path and self.status_code:
+            self.fetches.append((path, ref))
+            raise HTTPException(status_code=self.status_code, detail="boom")
+        return super().get_file_content(repo_id, path, ref, missing_ok)
+
+@pytest.mark.parametrize("failing_path", [settings.repo_config_path, ".gitattributes"])
+@pytest.mark.parametrize("status_code", [500, 429, 403])
+def test_config_built_after_a_failed_fetch_is_not_cached(failing_path, status_code):
+    repo = f"org/flaky-{status_code}-{failing_path}"
+    scm = _FailingSCM({"ignore": ["legacy/**"]}, failing_path, status_code)
+    load_review_config(scm, repo, "d" * 40)
+    scm.status_code = None
+    assert not load_review_config(scm, repo, "d" * 40).should_review("legacy/a.py")
+    assert len(scm.fetches) == 4
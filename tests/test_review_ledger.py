@@ -0,0 +1,70 @@
+import pytest
+from src.config import settings
+from src.services.review_cache import hunk_fingerprint
+from src.services.review_ledger import ReviewLedger
+from src.services.review_memory import memory_by_file
+from src.services.reviewer import ReviewerService
+
+REPO = "org/repo"
+
+@pytest.fixture
+def ledger(tmp_path):
+    return ReviewLedger(str(tmp_path / "ledger.db"))
+
+def _github_comment(comment_id: int, line: int, body: str, updated_at: str) -> dict:
+    return {"id": comment_id, "path": "src/app.py", "line": line, "body": body, "user": {"login": "bot"}, "updated_at": updated_at}
+
+def test_synced_comments_are_upserted(ledger):
+    ledger.record_comments(REPO, 1, [_github_comment(1, 10, "old text", "2026-01-01T00:00:00Z")], "2026-01-01T00:00:00Z")
+    ledger.record_comments(REPO, 1, [_github_comment(1, 10, "edited", "2026-01-02T00:00:00Z")], "2026-01-02T00:00:00Z")
+    assert [c["body"] for c in ledger.memory(REPO, 1)] == ["edited"]
+    assert ledger.last_synced(REPO, 1) == "2026-01-02T00:00:00Z"
+    assert ledger.last_synced(REPO, 2) is None
+
+def test_own_comment_seen_twice_is_remembered_once(ledger):
+    # Posted by the bot, then fetched back from GitHub on the next sync
+    ledger.record_posted(REPO, 1, "a" * 40, "fp", "src/app.py", 10, "Use a set here")
+    ledger.record_comments(REPO, 1, [_github_comment(7, 10, "Use a set here", "2026-01-01T00:00:00Z")])
+    ledger.record_comments(REPO, 1, [_github_comment(8, 12, "Other", "2026-01-01T00:00:00Z")])
+    memory = ledger.memory(REPO, 1)
+    assert len(memory) == 3
+    assert sorted((e["line"], e["body"]) for e in memory_by_file(memory)["src/app.py"]) == [(10, "Use a set here"), (12, "Other")]
+    assert ledger.memory(REPO, 2) == []
+
+def test_reviewed_chunks_are_tracked_per_pull_request(ledger):
+    ledger.record_chunk(REPO, 1, "src/app.py", "fp-1", "a" * 40, 2)
+    # Still reviewed after a new push (another head SHA), but only in this PR and file
+    assert ledger.chunk_reviewed(REPO, 1, "src/app.py", "fp-1")
+    assert not ledger.chunk_reviewed(REPO, 2, "src/app.py", "fp-1")
+    assert not ledger.chunk_reviewed(REPO, 1, "src/other.py", "fp-1")
+    assert not ledger.chunk_reviewed(REPO, 1, "src/app.py", "fp-2")
+
+def test_runs_record_durations(ledger):
+    run_id = ledger.start_run(REPO, 1, "a" * 40, "parallel")
+    ledger.finish_run(run_id, chunks=4, comments=2, tokens=1000)
+    [run] = ledger.runs(REPO)
+    assert (run["chunks"], run["comments"], run["tokens"], run["execution_mode"]) == (4, 2, 1000, "parallel")
+    assert run["duration"] >= 0
+
+def test_reviewer_skips_chunks_the_ledger_has_seen(ledger, monkeypatch):
+    monkeypatch.setattr(settings, "system_prompt_name", "performance")
+    monkeypatch.setattr(settings, "review_cache_enabled", False)
+    reviewer = ReviewerService()
+    reviewer._ledger = ledger
+    chunk = {
+        "filename": "src/app.py", "start_line": 10, "end_line": 11, "changes": 1, "head_sha": "b" * 40,
+        "content": "@@ -10,1 +10,2 @@\n10:  x = 1\n11: +y = 2"
+    }
+    assert reviewer._prepare_chunk("", REPO, 1, chunk, []) is not None
+
+    ledger.record_chunk(REPO, 1, "src/app.py", hunk_fingerprint(chunk), "a" * 40, 0)
+    assert reviewer._prepare_chunk("", REPO, 1, chunk, []) is None
+    # The same hunk moved by an unrelated edit above it is still the same hunk
+    moved = {**chunk, "start_line": 40, "end_line": 41, "content": "@@ -40,1 +40,2 @@\n40:  x = 1\n41: +y = 2"}
+    assert reviewer._prepare_chunk("", REPO, 1, moved, []) is None
+    # Push reviews don't use the ledger
+    assert reviewer._prepare_chunk("", REPO, None, {**chunk, "commit_sha": "c" * 40}, []) is not None
+
+def test_data_files_default_to_the_data_dir():
+    for path in (settings.review_ledger_path, settings.batch_store_path, settings.cache_sqlite_path):
+        assert path.startswith(settings.data_dir)
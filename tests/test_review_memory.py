@@ -0,0 +1,84 @@
+from src.brain.agents.utils import estimate_tokens
+from src.services.review_memory import known_comments, memory_by_file, memory_stats, select_memory, symbol_ranges
+
+def _entry(line: int, body: str, updated_at: str = "2026-01-01T00:00:00Z") -> dict:
+    return {"line": line, "body": body, "updated_at": updated_at}
+
+def _chunk(start: int, end: int, symbol: str = None) -> dict:
+    return {"filename": "src/app.py", "start_line": start, "end_line": end, "symbol": symbol}
+
+def _lines(memory: str) -> list[int]:
+    return [int(line.split(":")[0].removeprefix("Line ")) for line in memory.splitlines()]
+
+def test_margin_bounds_are_inclusive():
+    entries = [_entry(line, f"comment {line}") for line in (4, 5, 10, 25, 30, 31, None)]
+    memory, tokens = select_memory(entries, _chunk(10, 20), margin=5, max_tokens=0)
+    assert _lines(memory) == [5, 10, 25]
+    assert tokens == sum(estimate_tokens(f"Line {line}: comment {line}") for line in (5, 10, 25))
+
+def test_zero_margin_keeps_only_the_chunk_lines():
+    entries = [_entry(9, "before"), _entry(10, "first"), _entry(20, "last"), _entry(21, "after")]
+    memory, _ = select_memory(entries, _chunk(10, 20), margin=0, max_tokens=0)
+    assert _lines(memory) == [10, 20]
+
+def test_nothing_in_scope():
+    memory, tokens = select_memory([_entry(100, "far away")], _chunk(10, 20), margin=5, max_tokens=0)
+    assert (memory, tokens) == ("None", 0)
+
+def test_comments_elsewhere_in_the_enclosing_symbol_are_included():
+    chunks = [_chunk(10, 20, "handle"), _chunk(40, 50, "handle"), _chunk(80, 90, "other")]
+    ranges = symbol_ranges(chunks)
+    assert ranges == {("src/app.py", "handle"): [(10, 20), (40, 50)], ("src/app.py", "other"): [(80, 90)]}
+    entries = [_entry(45, "later in handle"), _entry(85, "in other"), _entry(60, "between")]
+    memory, _ = select_memory(entries, chunks[0], ranges[("src/app.py", "handle")], margin=0, max_tokens=0)
+    assert _lines(memory) == [45]
+
+def test_token_cap_keeps_the_most_recent_comments():
+    entries = [
+        _entry(12, "old " * 20, "2026-01-01T00:00:00Z"),
+        _entry(14, "newest " * 20, "2026-03-01T00:00:00Z"),
+        _entry(16, "newer " * 20, "2026-02-01T00:00:00Z"),
+    ]
+    cost = {e["line"]: estimate_tokens(f"Line {e['line']}: {e['body']}") for e in entries}
+    # Room for two: the newest ones win, and are listed in line order
+    memory, tokens = select_memory(entries, _chunk(10, 20), margin=0, max_tokens=cost[14] + cost[16])
+    assert _lines(memory) == [14, 16]
+    assert tokens == cost[14] + cost[16]
+    # One token short of the second comment: only the newest fits
+    memory, tokens = select_memory(entries, _chunk(10, 20), margin=0, max_tokens=cost[14] + cost[16] - 1)
+    assert _lines(memory) == [14]
+    # 0 disables the cap
+    memory, _ = select_memory(entries, _chunk(10, 20), margin=0, max_tokens=0)
+    assert _lines(memory) == [12, 14, 16]
+
+def test_token_cap_applies_across_the_symbol_ranges():
+    # A long symbol collects comments from all of its chunks; the cap still bounds the prompt
+    ranges = [(10, 20), (100, 110), (200, 210)]
+    entries = [_entry(line, "x" * 80, f"2026-01-{day:02d}T00:00:00Z") for day, line in enumerate((15, 105, 205), start=1)]
+    per_comment = estimate_tokens(f"Line 105: {'x' * 80}")
+    memory, tokens = select_memory(entries, _chunk(10, 20, "handle"), ranges, margin=0, max_tokens=2 * per_comment)
+    assert _lines(memory) == [105, 205]
+    assert tokens <= 2 * per_comment
+
+def test_stats_count_injected_and_capped_comments():
+    before = memory_stats.snapshot()
+    entries = [_entry(11, "a " * 40, "2026-02-01T00:00:00Z"), _entry(12, "b " * 40, "2026-01-01T00:00:00Z"), _entry(500, "far")]
+    select_memory(entries, _chunk(10, 20), margin=0, max_tokens=estimate_tokens(f"Line 11: {'a ' * 40}"))
+    after = memory_stats.snapshot()
+    assert after["chunks"] - before["chunks"] == 1
+    assert after["comments_injected"] - before["comments_injected"] == 1
+    assert after["comments_capped"] - before["comments_capped"] == 1
+    assert after["tokens_saved"] > before["tokens_saved"]
+
+def test_memory_by_file_and_known_comments():
+    grouped = memory_by_file([
+        {"path": "src/app.py", "line": 3, "body": "Use a set", "updated_at": "2026-01-02T00:00:00Z"},
+        {"path": "src/app.py", "line": 3, "body": "Use a set", "created_at": "2026-01-01T00:00:00Z"},
+        {"path": "src/app.py", "line": None, "original_line": 7, "body": "Outdated"},
+        {"path": None, "line": 1, "body": "PR-level"},
+    ])
+    assert grouped == {"src/app.py": [
+        {"line": 3, "body": "Use a set", "updated_at": "2026-01-02T00:00:00Z"},
+        {"line": 7, "body": "Outdated", "updated_at": ""}
+    ]}
+    assert known_comments(grouped["src/app.py"]) == {(3, "use a set"), (7, "outdated")}
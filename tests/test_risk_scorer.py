@@ -0,0 +1,46 @@
+from src.utils.hunk_processor import HunkProcessor
+from src.utils.risk_scorer import add_ast_complexity, score_chunk
+
+HEAD = '''def handle(request):
+    # if the user tries this, or retries it, for a while
+    message = "if you try to log in, or else"
+    if request.user and request.user.is_active:
+        for item in request.items:
+            process(item)
+    return message
+'''
+
+def _chunks(patch: str, filename: str = "app/views.py"):
+    return list(HunkProcessor.chunk_patch(filename, patch, 10))
+
+def test_keywords_in_comments_and_strings_do_not_count():
+    patch = (
+        "@@ -1,3 +1,4 @@\n def handle(request):\n"
+        "+    # if the user tries this, or retries it, for a while\n"
+        "+    message = \"if you try to log in, or else\"\n"
+        "     return message\n"
+    )
+    chunks = _chunks(patch)
+    add_ast_complexity(chunks, "app/views.py", HEAD)
+    assert chunks[0]["ast_complexity"] == 0
+    assert score_chunk(chunks[0])["complexity"] == 0
+
+def test_branching_nodes_on_added_lines_count():
+    patch = (
+        "@@ -3,2 +3,5 @@\n     message = \"if you try to log in, or else\"\n"
+        "+    if request.user and request.user.is_active:\n"
+        "+        for item in request.items:\n"
+        "+            process(item)\n"
+        "     return message\n"
+    )
+    chunks = _chunks(patch)
+    add_ast_complexity(chunks, "app/views.py", HEAD)
+    # if_statement + boolean_operator + for_statement
+    assert chunks[0]["ast_complexity"] == 3
+
+def test_unsupported_language_falls_back_to_diff_keywords():
+    patch = "@@ -1,1 +1,2 @@\n a\n+if x then y else z\n"
+    chunks = _chunks(patch, "script.lua")
+    add_ast_complexity(chunks, "script.lua", "a\nif x then y else z\n")
+    assert "ast_complexity" not in chunks[0]
+    assert score_chunk(chunks[0])["complexity"] == 2
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+from src.services.scheduler import ChunkScheduler
+
+
+def _run_order(scheduler, jobs):
+    """Runs (repo, label) jobs concurrently through the scheduler; returns labels in start order."""
+    started = []
+    lock = threading.Lock()
+
+    def work(label):
+        with lock:
+            started.append(label)
+
+    async def main():
+        await asyncio.gather(*(scheduler.run(repo, work, label) for repo, label in jobs))
+
+    asyncio.run(main())
+    return started
+
+
+def test_small_repo_is_not_starved_by_a_large_backlog():
+    scheduler = ChunkScheduler(max_concurrency=1, per_repo_limit=1, max_queued=0)
+    jobs = [("big/repo", f"big-{i}") for i in range(20)] + [("small/repo", f"small-{i}") for i in range(3)]
+    started = _run_order(scheduler, jobs)
+    # Queued after 20 chunks of big/repo, small/repo's chunks still alternate with them
+    assert [started.index(f"small-{i}") for i in range(3)] == [1, 3, 5]
+    assert scheduler.snapshot()["completed"] == 23
+
+
+def test_weights_share_slots_proportionally():
+    scheduler = ChunkScheduler(max_concurrency=1, per_repo_limit=1, max_queued=0, weights={"heavy/repo": 2})
+    jobs = [("heavy/repo", "heavy")] * 10 + [("light/repo", "light")] * 10
+    started = _run_order(scheduler, jobs)
+    assert started[:9].count("heavy") == 6
+
+
+def test_per_repo_limit_caps_concurrency():
+    scheduler = ChunkScheduler(max_concurrency=10, per_repo_limit=2, max_queued=0)
+    running = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+    release = threading.Event()
+
+    def work():
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        release.wait(1)
+        with lock:
+            running["now"] -= 1
+
+    async def main():
+        tasks = [asyncio.create_task(scheduler.run("one/repo", work)) for _ in range(6)]
+        await asyncio.sleep(0.1)
+        assert scheduler.snapshot()["running_by_repo"] == {"one/repo": 2}
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert running["peak"] == 2
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    scheduler = ChunkScheduler(max_concurrency=1, per_repo_limit=1, max_queued=0)
+    release = threading.Event()
+
+    async def main():
+        running = asyncio.create_task(scheduler.run("a/repo", release.wait, 1))
+        waiting = asyncio.create_task(scheduler.run("b/repo", lambda: "done"))
+        await asyncio.sleep(0.05)
+        assert scheduler.snapshot()["queued"] == 1
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert scheduler.snapshot()["queued"] == 0
+        release.set()
+        await running
+        # The slot is free again and nothing is left behind
+        assert await scheduler.run("b/repo", lambda: "done") == "done"
+
+    asyncio.run(main())
+    snapshot = scheduler.snapshot()
+    assert snapshot["active"] == 0 and snapshot["queued_by_repo"] == {} and snapshot["running_by_repo"] == {}
+
+
+def test_cancelled_running_chunk_releases_its_slot():
+    scheduler = ChunkScheduler(max_concurrency=1, per_repo_limit=1, max_queued=0)
+    release = threading.Event()
+
+    async def main():
+        running = asyncio.create_task(scheduler.run("a/repo", release.wait, 1))
+        await asyncio.sleep(0.05)
+        running.cancel()
+        await asyncio.gather(running, return_exceptions=True)
+        release.set()
+        assert await scheduler.run("a/repo", lambda: "next") == "next"
+
+    asyncio.run(main())
+    assert scheduler.snapshot()["active"] == 0
@@ -0,0 +1,77 @@
+import pytest
+from src.code_parser.tree_sitter_parser import SemanticCursor
+from src.services.semantic_filter import SemanticFilter
+
+BASE = '''\
+def total(items, retries=3):
+    # running total
+    result = 0
+    for item in items:
+        result += item * retries
+    return result
+'''
+
+@pytest.fixture(scope="module")
+def semantic_filter():
+    return SemanticFilter()
+
+@pytest.mark.parametrize("new", [
+    BASE.replace("# running total", "# running sum"),
+    BASE.replace("    # running total\n", ""),
+    BASE.replace("result = 0", "result = 0  # start at zero"),
+    BASE + "# trailing note\n",
+    "# header\n" + BASE,
+], ids=["edited", "removed", "added-inline", "added-trailing", "added-leading"])
+def test_comment_only_changes_are_noise(semantic_filter, new):
+    assert not semantic_filter.is_semantic_change(BASE, new, "src/app.py")
+
+@pytest.mark.parametrize("new", [
+    BASE.replace("result = 0", "result   =   0"),
+    BASE.replace("for item in items:", "for item in items :"),
+    BASE.replace("(items, retries=3)", "(\n    items,\n    retries=3\n)"),
+    BASE + "\n\n\n",
+    "\n" + BASE,
+], ids=["inner-spaces", "before-colon", "wrapped-arguments", "trailing-lines", "leading-line"])
+def test_whitespace_only_changes_are_noise(semantic_filter, new):
+    assert not semantic_filter.is_semantic_change(BASE, new, "src/app.py")
+
+@pytest.mark.parametrize("new", [
+    BASE.replace("result = 0", "result = 1"),
+    BASE.replace("retries=3", "retries=4"),
+    BASE.replace("item * retries", "item + retries"),
+    BASE.replace("    return result\n", "    return result\n    print(result)\n"),
+    BASE.replace("    return result\n", ""),
+    BASE + "total([])\n",
+    # Whitespace that is syntax: the return moves into the loop body
+    BASE.replace("    return result", "        return result"),
+], ids=["literal", "default", "operator", "appended-statement", "removed-statement", "appended-call", "indentation"])
+def test_real_changes_are_semantic(semantic_filter, new):
+    assert semantic_filter.is_semantic_change(BASE, new, "src/app.py")
+
+def test_change_next_to_a_comment_is_semantic(semantic_filter):
+    # The comment regroups nodes on one side; the lockstep walk must still reach the changed token
+    new = BASE.replace("    # running total\n    result = 0", "    result = 0  # running total\n    result = 2")
+    assert semantic_filter.is_semantic_change(BASE, new, "src/app.py")
+
+def test_identical_and_unsupported_files(semantic_filter):
+    assert not semantic_filter.is_semantic_change(BASE, BASE, "src/app.py")
+    # Unknown languages can't be checked, so any change counts
+    assert semantic_filter.is_semantic_change("a  b", "a b", "notes.unknownext")
+
+def test_text_without_tokens_is_semantic(semantic_filter):
+    assert semantic_filter.is_semantic_change("# one\n", "# two\n", "src/app.py")
+
+def test_comparison_stops_at_the_first_difference(semantic_filter, monkeypatch):
+    old = BASE.replace("result = 0", "result = 1") + "".join(f"x{i} = {i}\n" for i in range(2000))
+    new = BASE + "".join(f"x{i} = {i}\n" for i in range(2000))
+    steps = 0
+    skip = SemanticCursor.skip
+
+    def counting_skip(self):
+        nonlocal steps
+        steps += 1
+        skip(self)
+
+    monkeypatch.setattr(SemanticCursor, "skip", counting_skip)
+    assert semantic_filter.is_semantic_change(old, new, "src/app.py")
+    assert steps < 100
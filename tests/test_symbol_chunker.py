@@ -0,0 +1,127 @@
+import difflib
+import random
+import pytest
+from src.utils.symbol_chunker import SymbolChunker
+
+def _function(name: str, size: int, edited: set = frozenset(), wrapped: bool = False) -> list[str]:
+    """
+    A function with `size` distinct statements; statements in `edited` are changed.
+    Wrapped statements span two lines, and only their second line is edited.
+    """
+    body = []
+    for i in range(size):
+        suffix = " + 1" if i in edited else ""
+        body += [f"    {name}_{i} = compute(", f"        {i}){suffix}"] if wrapped else [f"    {name}_{i} = compute({i}){suffix}"]
+    return [f"def {name}():"] + body + [f"    return {name}_0", ""]
+
+def _patch(old: list[str], new: list[str], context: int = 3) -> str:
+    return "\n".join(difflib.unified_diff(old, new, lineterm="", n=context)).split("\n", 2)[2]
+
+def _chunk(old: list[str], new: list[str], max_tokens: int, context: int = 3) -> list[dict]:
+    return SymbolChunker().chunk_patch("src/app.py", _patch(old, new, context), "\n".join(new) + "\n", max_tokens=max_tokens)
+
+def _changed_lines(chunks: list[dict]) -> tuple[list[int], list[str]]:
+    """(head line numbers of added lines, text of removed lines) across all chunks."""
+    added, removed = [], []
+    for chunk in chunks:
+        for line in chunk["content"].splitlines():
+            if line.startswith("DEL: -"):
+                removed.append(line[len("DEL: -"):])
+            elif ": +" in line and line.split(": +", 1)[0].isdigit():
+                added.append(int(line.split(":", 1)[0]))
+    return added, removed
+
+def test_changes_are_grouped_by_enclosing_function():
+    old = _function("alpha", 8) + _function("beta", 8)
+    new = _function("alpha", 8, {2, 3}) + _function("beta", 8, {4})
+    chunks = _chunk(old, new, max_tokens=60)
+    assert [c["symbol"] for c in chunks] == ["def alpha():", "def beta():"]
+    assert [c["changes"] for c in chunks] == [4, 2]
+    assert chunks[0]["end_line"] < 11 <= chunks[1]["start_line"]
+
+def _outer(inner_edited: set = frozenset(), outer_edited: set = frozenset()) -> list[str]:
+    """outer() with statements 0-9 and 20-29 around a nested inner() function."""
+    inner = ["    " + line if line else line for line in _function("inner", 8, inner_edited)]
+    head = [f"    outer_{i} = compute({i}){' + 1' if i in outer_edited else ''}" for i in range(10)]
+    tail = [f"    outer_{i} = compute({i}){' + 1' if i in outer_edited else ''}" for i in range(20, 30)]
+    return ["def outer():"] + head + inner + tail + ["    return inner", ""]
+
+def test_later_hunks_of_a_function_rejoin_its_chunk():
+    old = _outer()
+    new = _outer(inner_edited={4}, outer_edited={1, 2, 27, 28})
+    chunks = _chunk(old, new, max_tokens=120, context=1)
+    # outer's hunks before and after the nested function form one chunk
+    assert [c["symbol"] for c in chunks] == ["def outer():", "def inner():"]
+    outer = chunks[0]["content"]
+    assert "outer_1 = compute(1) + 1" in outer and "outer_28 = compute(28) + 1" in outer
+    assert "inner_4" not in outer
+    assert chunks[0]["changes"] == 8 and chunks[1]["changes"] == 2
+
+def test_tiny_units_are_merged_into_their_neighbour():
+    old = _function("alpha", 4) + _function("beta", 4)
+    new = _function("alpha", 4, {1}) + _function("beta", 4, {2})
+    [chunk] = _chunk(old, new, max_tokens=2000)
+    # A merged chunk spans two symbols, so it claims neither
+    assert chunk["symbol"] == ""
+    assert chunk["changes"] == 4
+
+@pytest.mark.parametrize("max_tokens", [60, 90, 150])
+def test_oversized_function_is_split_at_statement_boundaries(max_tokens):
+    old = _function("alpha", 30, wrapped=True)
+    new = _function("alpha", 30, set(range(0, 30, 3)), wrapped=True)
+    chunks = _chunk(old, new, max_tokens=max_tokens)
+    assert len(chunks) > 1
+    assert all(c["symbol"] == "def alpha():" for c in chunks)
+    for chunk in chunks[1:]:
+        first = chunk["content"].splitlines()[1]
+        # A continued piece starts on a statement's first line, not inside a wrapped call
+        assert first.endswith("= compute("), first
+
+@pytest.mark.parametrize("max_tokens", range(30, 200, 7))
+def test_removed_line_stays_with_its_replacement(max_tokens):
+    old = _function("alpha", 40)
+    new = _function("alpha", 40, set(range(0, 40, 2)))
+    for chunk in _chunk(old, new, max_tokens=max_tokens):
+        lines = chunk["content"].splitlines()
+        for line, following in zip(lines, lines[1:] + [""]):
+            if line.startswith("DEL:"):
+                assert following.endswith(line[len("DEL: -"):] + " + 1"), f"{line!r} split from its replacement"
+
+def test_unsupported_language_falls_back():
+    assert SymbolChunker().chunk_patch("notes.txt", "@@ -1 +1 @@\n-a\n+b", "b\n", max_tokens=100) is None
+
+@pytest.mark.parametrize("seed", range(20))
+def test_every_changed_line_lands_in_exactly_one_chunk(seed):
+    rng = random.Random(seed)
+    old, new = [], []
+    for f in range(rng.randint(1, 6)):
+        size = rng.randint(1, 25)
+        edited = {i for i in range(size) if rng.random() < 0.3}
+        old += _function(f"f{f}", size)
+        new += _function(f"f{f}", size, edited)
+        if rng.random() < 0.3:
+            new += [f"EXTRA_{f} = {f}", ""]
+    if old == new:
+        new += ["TAIL = 1"]
+    patch = _patch(old, new, context=rng.randint(0, 3))
+    expected_added = [int(i) for i in _numbered_additions(patch)]
+    expected_removed = [line[1:] for line in patch.splitlines() if line.startswith("-")]
+
+    chunks = SymbolChunker().chunk_patch("src/app.py", patch, "\n".join(new) + "\n", max_tokens=rng.choice([40, 80, 200, 2000]))
+    added, removed = _changed_lines(chunks)
+    assert sorted(added) == expected_added
+    assert sorted(removed) == sorted(expected_removed)
+    assert sum(c["changes"] for c in chunks) == len(expected_added) + len(expected_removed)
+
+def _numbered_additions(patch: str) -> list[int]:
+    """Head line numbers of a patch's added lines."""
+    added, line_no = [], 0
+    for line in patch.splitlines():
+        if line.startswith("@@"):
+            line_no = int(line.split("+")[1].split(",")[0].split(" ")[0])
+        elif line.startswith("+"):
+            added.append(line_no)
+            line_no += 1
+        elif line.startswith(" "):
+            line_no += 1
+    return added
@@ -0,0 +1,87 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.api import webhook
+from src.config import settings
+from src.handlers.github_handler import GitHubEventHandler
+from src.utils.cache_backends import MemoryCache
+
+SECRET = "test-secret"
+
+class SaturatedScheduler:
+    saturated = True
+
+    def retry_after(self) -> int:
+        return 42
+
+@pytest.fixture
+def handled(monkeypatch):
+    """Events the webhook handed to the background handler, as (event, body, delivery)."""
+    events = []
+
+    async def handle_raw_event(event, body, delivery_id=None):
+        events.append((event, body, delivery_id))
+
+    monkeypatch.setattr(settings, "github_webhook_secret", SECRET)
+    monkeypatch.setattr(webhook, "seen_deliveries", MemoryCache("webhook_deliveries", 100))
+    monkeypatch.setattr(GitHubEventHandler, "handle_raw_event", handle_raw_event)
+    return events
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(webhook.router)
+    return TestClient(app)
+
+def _post(client, body: bytes, delivery: str = "delivery-1", event: str = "push"):
+    signature = "sha256=" + hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+    return client.post("/webhook/github", content=body, headers={
+        "X-Hub-Signature-256": signature, "X-GitHub-Event": event, "X-GitHub-Delivery": delivery
+    })
+
+def test_redelivery_is_ignored(client, handled):
+    body = json.dumps({"ref": "refs/heads/main"}).encode()
+
+    first = _post(client, body)
+    again = _post(client, body)
+
+    assert first.status_code == 202 and first.json()["status"] == "event_received"
+    assert again.status_code == 202 and again.json() == {"status": "duplicate_ignored", "delivery": "delivery-1"}
+    assert handled == [("push", body, "delivery-1")]
+
+def test_saturated_scheduler_sheds_load(client, handled, monkeypatch):
+    scheduler = webhook.chunk_scheduler
+    monkeypatch.setattr(webhook, "chunk_scheduler", SaturatedScheduler())
+    body = json.dumps({"ref": "refs/heads/main"}).encode()
+
+    response = _post(client, body)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "42"
+    assert handled == []
+    # Not recorded as seen, so GitHub's redelivery is accepted once the backlog drains
+    monkeypatch.setattr(webhook, "chunk_scheduler", scheduler)
+    assert _post(client, body).json()["status"] == "event_received"
+    assert handled == [("push", body, "delivery-1")]
+
+def test_invalid_json_is_accepted_and_dropped_in_the_background(client, handled):
+    response = _post(client, b"{not json")
+
+    assert response.status_code == 202
+    assert handled == [("push", b"{not json", "delivery-1")]
+
+def test_handle_raw_event_drops_invalid_json(monkeypatch):
+    dispatched = []
+
+    async def handle_event(event, payload):
+        dispatched.append((event, payload))
+
+    monkeypatch.setattr(GitHubEventHandler, "handle_event", handle_event)
+    asyncio.run(GitHubEventHandler.handle_raw_event("push", b"{not json", "delivery-1"))
+    asyncio.run(GitHubEventHandler.handle_raw_event("push", b'{"ref": "refs/heads/main"}', "delivery-2"))
+
+    assert dispatched == [("push", {"ref": "refs/heads/main"})]